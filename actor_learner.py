@@ -0,0 +1,76 @@
+##treino actor-learner: N processos rodam o FractionTutorEnv com a politica mais recente e mandam trechos de
+##trajetoria por memoria compartilhada; o learner treina continuamente, com correcao V-trace do policy lag.
+##salva o mesmo bundle do train_ppo.py (pesos no formato do PPO do SB3 + VecNormalize), entao o eval e o registro funcionam igual
+from __future__ import annotations
+import argparse
+import os
+from dataclasses import asdict, fields
+from pathlib import Path
+
+from tutor.actor_learner import LearnerConfig, train
+from tutor.model_registry import ModelRegistry, make_meta, save_bundle
+from tutor.envs.fraction_tutor_env import FractionTutorEnv
+
+
+#bundle igual ao do train_ppo.py: PPO do SB3 com os pesos do learner e VecNormalize com as estatisticas dele
+def export_bundle(path: str, policy, obs_rms, bank: str, env_kwargs: dict, meta: dict) -> None:
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+    venv = VecNormalize(DummyVecEnv([lambda: FractionTutorEnv(bank_path=bank, **env_kwargs)]),
+                        norm_obs=True, norm_reward=False, clip_obs=5.0)
+    venv.obs_rms = obs_rms
+    venv.training = False
+    model = PPO("MlpPolicy", venv, seed=meta["seed"])
+    model.policy.load_state_dict(policy.state_dict())
+    save_bundle(path, model, venv, meta)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default="data/items_bank.jsonl")
+    ap.add_argument("--timesteps", type=int, default=200_000)
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="processos actor")
+    ap.add_argument("--unroll", type=int, default=32, help="passos por trecho de trajetoria")
+    ap.add_argument("--batch_trajs", type=int, default=16, help="trechos por update do learner")
+    ap.add_argument("--ring_slots", type=int, default=8, help="trechos em voo por actor (tamanho do buffer circular)")
+    ap.add_argument("--max_lag", type=int, default=20, help="descarta trechos gerados mais de N updates atras")
+    ap.add_argument("--rho_bar", type=float, default=1.0, help="truncamento do peso de importancia (V-trace)")
+    ap.add_argument("--c_bar", type=float, default=1.0)
+    ap.add_argument("--learning_rate", type=float, default=5e-4)
+    ap.add_argument("--gamma", type=float, default=0.99)
+    ap.add_argument("--ent_coef", type=float, default=0.01)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max_steps", type=int, default=20)
+    ap.add_argument("--belief", choices=["heuristic", "bayes"], default="heuristic")
+    ap.add_argument("--topics", type=str, default=None, help="(banco multi-topico) lista separada por virgula")
+    ap.add_argument("--history", type=int, default=0)
+    ap.add_argument("--out", type=str, default="models/ppo_actor_learner.zip")
+    ap.add_argument("--name", type=str, default=None)
+    ap.add_argument("--registry", type=str, default="models", help="pasta do registro (mesmo default do eval_baselines.py)")
+    args = ap.parse_args()
+
+    topics = [t.strip() for t in args.topics.split(",")] if args.topics else None
+    env_kwargs = {"max_steps": args.max_steps, "belief": args.belief, "topics": topics, "history": args.history}
+    names = {f.name for f in fields(LearnerConfig)}
+    cfg = LearnerConfig(n_workers=args.workers, **{k: v for k, v in vars(args).items() if k in names})
+
+    policy, obs_rms, stats = train(args.bank, env_kwargs, cfg)
+    summary = stats.summary()
+    print(f"Done: {summary['env_steps']} steps in {summary['seconds']}s ({summary['steps_per_sec']} steps/s) | "
+          f"lag mean {summary['lag_mean']:.1f} p95 {summary['lag_p95']:.0f} | dropped {summary['dropped_trajectories']} | "
+          f"learner waited {summary['learner_wait_sec']}s, actors waited {summary['actor_waits']} times")
+
+    meta = make_meta(args.bank, seed=args.seed, max_steps=args.max_steps, algo="PPO",
+                     env_kwargs={"belief": args.belief, "topics": topics, "history": args.history},
+                     timesteps=summary["env_steps"], trainer="actor_learner",
+                     actor_learner={**asdict(cfg), **summary})
+    export_bundle(args.out, policy, obs_rms, args.bank, env_kwargs, meta)
+    name = args.name or Path(args.out).stem
+    registry = ModelRegistry(args.registry)
+    registry.register(name, args.out, meta)
+    print(f"Saved model bundle -> {args.out}")
+    print(f"Registered as '{name}' in {registry.index_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,19 @@
 from __future__ import annotations
 import argparse #rodar pelo terminal
-from dataclasses import dataclass
 import json
 from pathlib import Path
 import random
 
 import numpy as np
-import matplotlib.pyplot as plt
-from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
 
 from tutor.envs.fraction_tutor_env import FractionTutorEnv
-
-##resultado de um episodio
-@dataclass
-class EpisodeResult:
-    return_sum: float #soma total das recompensas do episodio
-    abandoned: bool #se o aluno abandonou (baixo engaj)
-    steps: int #numero de questoes feitas
-    completed: bool
-    reason: str | None
+from tutor.bandit import LinearBandit
+from tutor.model_registry import LoadedModel, load_model
+from tutor.info_policy import InfoGainPolicy, PosteriorInfoPolicy
+from tutor.policies import BASELINES, FnPolicy
+from tutor.policy_table import PolicyTable
+from tutor.rollout import EpisodeResult, episode_reason, rollout_batch
+from tutor.stats import compare
 
 #rodando um ep com uma politica
 def run_episode(env: FractionTutorEnv, policy_fn, rng: random.Random, seed: int) -> EpisodeResult:
@@ -38,12 +32,7 @@ def run_episode(env: FractionTutorEnv, policy_fn, rng: random.Random, seed: int)
         ret += float(r)
         steps += 1
 
-    reason = last_info.get("reason", None)
-    if reason is None:
-        if truncated:
-            reason = "time_limit"
-        elif done:
-            reason = "low_engagement"
+    reason = episode_reason(last_info, done, truncated)
 
     abandoned = (reason == "low_engagement")
     completed = (reason == "time_limit")
@@ -100,61 +89,112 @@ def policy_engagement(obs, rng: random.Random) -> int:
     fmt_i = ["short_text", "multiple_choice", "visual", "scaffold"].index(fmt)
     return fmt_i * 5 + (d - 1)
 
-#carregando o PPO e a normalizacao
-def load_ppo(model_path: str, bank: str) -> tuple[PPO, VecNormalize]:
-    def _thunk():
-        return FractionTutorEnv(bank_path=bank, max_steps=20, seed=0)
-    venv = DummyVecEnv([_thunk])
-    venv = VecNormalize.load("models/vecnormalize.pkl", venv)
-    #desligando modo treino (pra nao atualizar estatisticas e nao normalizar a recompensa)
-    venv.training = False
-    venv.norm_reward = False
-    model = PPO.load(model_path, env=venv)
-    return model, venv
+#carregando o PPO (bundle com pesos + normalizacao, por nome no registro ou caminho)
+def load_ppo(model: str, bank: str, registry: str = "models") -> LoadedModel:
+    return load_model(model, bank=bank, root=registry)
+
+#histograma dos retornos (matplotlib só é importado aqui, quando o grafico é pedido)
+def plot_hist(res: dict, out_png: Path) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure()
+    for k, eps in res.items():
+        plt.hist([e.return_sum for e in eps], bins=20, alpha=0.5, label=k)
+    plt.xlabel("Retorno do episodio")
+    plt.ylabel("Contagem")
+    plt.legend()
+    plt.savefig(out_png, dpi=140, bbox_inches="tight")
+    print(f"Wrote {out_png}")
 
 #execucao e metricas
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--bank", type=str, default="data/items_bank.jsonl")
-    ap.add_argument("--model", type=str, default="models/ppo_20actions.zip")
+    ap.add_argument("--model", type=str, default="models/ppo_20actions.zip", help="nome no registro ou caminho do bundle")
+    ap.add_argument("--registry", type=str, default="models")
     ap.add_argument("--episodes", type=int, default=200)
     ap.add_argument("--seed", type=int, default=1)
     ap.add_argument("--outdir", type=str, default="runs/eval")
+    ap.add_argument("--ci_width", type=float, default=None,
+                    help="para antes de --episodes quando todo IC 95%% do retorno tiver essa largura")
+    ap.add_argument("--hist", action="store_true", help="salva o histograma dos retornos (returns_hist.png)")
+    ap.add_argument("--chunk", type=int, default=50, help="episodios por rodada quando usar --ci_width")
+    ap.add_argument("--table", type=str, nargs="*", default=[], help="politicas compiladas (.npz do scripts/compile_policy.py)")
+    ap.add_argument("--bandit", type=str, default=None, help="snapshot do bandit online (scripts/bandit_online.py), avaliado guloso")
     args = ap.parse_args()
 
     Path(args.outdir).mkdir(parents=True, exist_ok=True)
 
-    res = {}
-
-    #avaliando as baselines
-    for name, pol in [("random", policy_random), ("staircase", policy_staircase), ("engagement", policy_engagement)]:
-        eps = []
-        for i in range(args.episodes):
-            env = FractionTutorEnv(bank_path=args.bank, max_steps=20, seed=args.seed + i)
-            rng = random.Random(args.seed + 10_000 + i)
-            eps.append(run_episode(env, pol, rng, seed=args.seed + i))
-        res[name] = eps #guardando os episodios pra cada baseline
+    #todas as politicas rodam nos mesmos episodios (mesmas seeds de env), pra comparacao pareada
+    policies = {name: FnPolicy(fn, seed=args.seed + 10_000) for name, fn in BASELINES.items()}
+    env_kwargs = {name: {"max_steps": 20} for name in policies}
+    #ganho de informacao (tabela theta x engajamento): mantem a propria posterior bayesiana (na escala da tabela)
+    #e roda no mesmo env heuristico das outras, entao o retorno (que inclui o bonus de incerteza) é comparavel
+    policies["info"] = PosteriorInfoPolicy()
+    env_kwargs["info"] = {"max_steps": 20}
 
     #avaliando o PPO
     try:
-        model, venv = load_ppo(args.model, args.bank)
-
-        ##definindo a politica que usa o PPO pra escolher a ação
-        def policy_ppo(obs, rng):
-            obs_arr = np.asarray(obs, dtype=np.float32).reshape(1, -1)
-            obs_norm = venv.normalize_obs(obs_arr)
-            a, _ = model.predict(obs_norm, deterministic=True)
-            return int(np.asarray(a).item())
-
-        eps = []
-        for i in range(args.episodes):
-            env2 = FractionTutorEnv(bank_path=args.bank, max_steps=20, seed=args.seed + 1000 + i)
-            rng = random.Random(args.seed + 20_000 + i)
-            eps.append(run_episode(env2, policy_ppo, rng, seed=args.seed + 1000 + i))
-        res["ppo"] = eps
+        ppo = load_ppo(args.model, args.bank, args.registry)
+        policies["ppo"] = ppo #o LoadedModel ja segue o protocolo BatchPolicy (act em lote)
+        env_kwargs["ppo"] = ppo.env_kwargs #mesmo env do treino (max_steps, belief, ...)
     except Exception as e:
         print(f"[WARN] Could not load PPO model: {e}")
 
+    #politicas compiladas em tabela: rodam no mesmo env da politica de origem (guardado no meta da tabela)
+    for path in args.table:
+        table = PolicyTable.load(path)
+        name = f"table:{Path(path).stem}"
+        policies[name] = table
+        env_kwargs[name] = table.meta.get("env_kwargs", {"max_steps": 20})
+        #tabela em outro belief (ex.: info, compilada no env bayes): a politica de origem roda junto no mesmo env,
+        #pra que a diferenca pareada tabela - origem fique na mesma escala de recompensa
+        belief = env_kwargs[name].get("belief", "heuristic")
+        source = table.meta.get("source")
+        if belief != "heuristic" and (source == "info" or source in BASELINES):
+            ref = f"{source}@{belief}"
+            policies[ref] = InfoGainPolicy() if source == "info" else FnPolicy(BASELINES[source], seed=args.seed + 10_000)
+            env_kwargs[ref] = env_kwargs[name]
+
+    #bandit online congelado no snapshot: sem exploracao e sem aprender durante a avaliacao
+    if args.bandit:
+        bandit = LinearBandit.load(args.bandit)
+        bandit.explore = False
+        policies["bandit"] = bandit
+        env_kwargs["bandit"] = {"max_steps": 20}
+
+    #o bonus de incerteza da recompensa depende da crenca do env: politica em outro belief nao está na mesma escala
+    for name, kw in env_kwargs.items():
+        if kw.get("belief", "heuristic") != "heuristic":
+            print(f"[WARN] {name} runs with belief={kw['belief']!r}: its returns are not on the same scale as the others")
+
+    res = {name: [] for name in policies}
+    seeds = [args.seed + i for i in range(args.episodes)]
+    chunk = args.chunk if args.ci_width else args.episodes
+    cmp = None
+    done_eps = 0
+    while done_eps < len(seeds):
+        batch = seeds[done_eps:done_eps + chunk]
+        for name, pol in policies.items():
+            envs = [FractionTutorEnv(bank_path=args.bank, seed=s, **env_kwargs[name]) for s in batch]
+            res[name] += rollout_batch(envs, pol, batch) #guardando os episodios pra cada politica
+        done_eps += len(batch)
+
+        cmp = compare(
+            {k: [e.return_sum for e in v] for k, v in res.items()},
+            {k: [1.0 if e.abandoned else 0.0 for e in v] for k, v in res.items()},
+            target_width=args.ci_width,
+        )
+        #só a regra de precisao decide a parada: a largura do IC nao depende de quem está na frente, entao
+        #olhar varias vezes nao infla o erro dos testes (parar quando o ranking "decide" inflaria)
+        if args.ci_width and done_eps >= 2 * args.chunk:
+            widest = max(p["ci_width"] for p in cmp["policies"].values())
+            if widest <= args.ci_width:
+                print(f"Stopping after {done_eps} episodes (widest CI: {widest:.3f}, ranking settled: {cmp['ranking_settled']})")
+                break
+
     #salvando as metricas
     out_json = Path(args.outdir) / "summary.json"
     #resumo
@@ -182,16 +222,15 @@ def main():
     out_json.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
     print(f"Wrote {out_json}")
 
-    #histograma
-    plt.figure()
-    for k, eps in res.items():
-        plt.hist([e.return_sum for e in eps], bins=20, alpha=0.5, label=k)
-    plt.xlabel("Retorno do episodio")
-    plt.ylabel("Contagem")
-    plt.legend()
-    out_png = Path(args.outdir) / "returns_hist.png"
-    plt.savefig(out_png, dpi=140, bbox_inches="tight")
-    print(f"Wrote {out_png}")
+    #ICs bootstrap + diferencas pareadas entre politicas
+    out_cmp = Path(args.outdir) / "comparison.json"
+    out_cmp.write_text(json.dumps(cmp, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Wrote {out_cmp}")
+    for k, p in cmp["policies"].items():
+        print(f"{k:>10}: return {p['mean_return']:.3f} [{p['ci_return'][0]:.3f}, {p['ci_return'][1]:.3f}]")
+
+    if args.hist:
+        plot_hist(res, Path(args.outdir) / "returns_hist.png")
 
 if __name__ == "__main__":
     main()
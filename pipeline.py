@@ -0,0 +1,169 @@
+##pipeline do experimento (o mesmo fluxo do notebook) como DAG com cache: banco -> PPO por seed -> avaliacao por
+##seed -> relatorio. Cada etapa só roda de novo quando muda algo que entra nela (args, codigo, banco, modelo)
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from tutor.pipeline import Pipeline, Stage
+
+ROOT = Path(__file__).resolve().parent
+BANK_FILE = "items_bank.jsonl"
+MODEL_FILE = "ppo.zip"
+#codigo que entra na chave de cada etapa (o corpo da funcao da etapa ja entra sozinho)
+TUTOR_CODE = ("tutor/*.py", "tutor/envs/*.py")
+
+
+#subprocesso de um CLI do repo; com etapas em paralelo cada processo usa 1 thread do torch/BLAS
+def _call(args: list, parallel: bool) -> None:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    if parallel:
+        env.update(OMP_NUM_THREADS="1", MKL_NUM_THREADS="1")
+    subprocess.run([sys.executable, *map(str, args)], check=True, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+
+
+#banco offline por templates + itens do LLM (data/items_seed.jsonl), se existirem
+def bank_stage(n_per_cell: int, seed: int, extra: str, parallel: bool) -> Stage:
+    def run(out: Path, deps: Dict[str, Path]) -> None:
+        bank = out / BANK_FILE
+        _call([ROOT / "scripts/generate_bank_templates.py", "--out", bank, "--n_per_cell", n_per_cell, "--seed", seed],
+              parallel)
+        extra_path = ROOT / extra
+        if extra_path.is_file():
+            with bank.open("a", encoding="utf-8") as f:
+                f.write(extra_path.read_text(encoding="utf-8"))
+
+    return Stage("bank", run, params={"n_per_cell": n_per_cell, "seed": seed},
+                 code=("scripts/generate_bank_templates.py",), inputs=(extra,))
+
+
+def train_stage(seed: int, timesteps: int, config: str | None, parallel: bool) -> Stage:
+    def run(out: Path, deps: Dict[str, Path]) -> None:
+        cmd = [ROOT / "train_ppo.py", "--bank", deps["bank"] / BANK_FILE, "--timesteps", timesteps,
+               "--seed", seed, "--out", out / MODEL_FILE, "--name", f"ppo_seed{seed}",
+               "--registry", out] #registro dentro da saida do estagio (nao mexe no models/)
+        if config:
+            cmd += ["--config", ROOT / config]
+        _call(cmd, parallel)
+
+    return Stage(f"train_seed{seed}", run, deps=("bank",), params={"seed": seed, "timesteps": timesteps},
+                 code=("train_ppo.py", *TUTOR_CODE), inputs=(config,) if config else ())
+
+
+def eval_stage(seed: int, episodes: int, eval_seed: int, parallel: bool) -> Stage:
+    def run(out: Path, deps: Dict[str, Path]) -> None:
+        train = deps[f"train_seed{seed}"]
+        _call([ROOT / "eval_baselines.py", "--bank", deps["bank"] / BANK_FILE, "--model", train / MODEL_FILE,
+               "--registry", train, "--episodes", episodes, "--seed", eval_seed, "--outdir", out], parallel)
+
+    return Stage(f"eval_seed{seed}", run, deps=("bank", f"train_seed{seed}"),
+                 params={"episodes": episodes, "eval_seed": eval_seed},
+                 code=("eval_baselines.py", *TUTOR_CODE))
+
+
+#relatorio: PPO media ± desvio entre seeds, baselines, graficos e o relatorio de uma sessao do PPO (report.py)
+def report_stage(seeds: list[int]) -> Stage:
+    def run(out: Path, deps: Dict[str, Path]) -> None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from report import template_report
+        from tutor.envs.fraction_tutor_env import FractionTutorEnv
+        from tutor.model_registry import load_model
+
+        evals = {s: json.loads((deps[f"eval_seed{s}"] / "summary.json").read_text(encoding="utf-8")) for s in seeds}
+        first = evals[seeds[0]]
+        metrics = ("mean_return", "abandon_rate", "mean_steps")
+        ppo_runs = [evals[s]["ppo"] for s in seeds if "ppo" in evals[s]]
+        ppo = {m: {"mean": float(np.mean([r[m] for r in ppo_runs])),
+                   "std": float(np.std([r[m] for r in ppo_runs], ddof=1)) if len(ppo_runs) > 1 else 0.0}
+               for m in metrics} if ppo_runs else None
+        #baselines nao dependem do modelo: a avaliacao da primeira seed vale pra todas (mesmos episodios)
+        baselines = {k: v for k, v in first.items() if k != "ppo"}
+        summary = {"seeds": seeds, "ppo": ppo, "ppo_per_seed": {s: evals[s].get("ppo") for s in seeds},
+                   "baselines": baselines}
+        (out / "summary.json").write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+        labels = list(baselines) + (["ppo"] if ppo else [])
+        for m, title in zip(metrics, ("Retorno médio", "Taxa de abandono", "Passos médios por episódio")):
+            vals = [baselines[k][m] for k in baselines] + ([ppo[m]["mean"]] if ppo else [])
+            err = [0.0] * len(baselines) + ([ppo[m]["std"]] if ppo else [])
+            plt.figure()
+            plt.bar(labels, vals, yerr=err, capsize=4)
+            plt.title(title + (f" (PPO: {len(ppo_runs)} seeds)" if ppo else ""))
+            plt.xticks(rotation=20)
+            plt.savefig(out / f"{m}.png", dpi=140, bbox_inches="tight")
+            plt.close()
+
+        lines = ["# Resultado do pipeline", "", "| política | retorno | abandono | passos |", "|---|---|---|---|"]
+        for k in baselines:
+            b = baselines[k]
+            lines.append(f"| {k} | {b['mean_return']:.3f} | {b['abandon_rate']:.3f} | {b['mean_steps']:.2f} |")
+        if ppo:
+            lines.append(f"| ppo ({len(ppo_runs)} seeds) | {ppo['mean_return']['mean']:.3f} ± {ppo['mean_return']['std']:.3f} "
+                         f"| {ppo['abandon_rate']['mean']:.3f} ± {ppo['abandon_rate']['std']:.3f} "
+                         f"| {ppo['mean_steps']['mean']:.2f} ± {ppo['mean_steps']['std']:.2f} |")
+
+            #uma sessao do PPO da primeira seed, com o relatorio pro aluno
+            train = deps[f"train_seed{seeds[0]}"]
+            model = load_model(train / MODEL_FILE, root=train)
+            env = FractionTutorEnv(bank_path=str(deps["bank"] / BANK_FILE), seed=3, **model.env_kwargs)
+            obs, _ = env.reset(seed=999)
+            log, done, trunc = [], False, False
+            while not (done or trunc):
+                obs, _, done, trunc, info = env.step(int(model.act(obs[None])[0]))
+                log.append(info)
+            lines += ["", "## Relatório de uma sessão (PPO)", "", "```", template_report(log), "```"]
+        (out / "report.md").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    return Stage("report", run, deps=("bank", *(f"train_seed{s}" for s in seeds[:1]), *(f"eval_seed{s}" for s in seeds)),
+                 params={"seeds": seeds}, code=("report.py", *TUTOR_CODE))
+
+
+def build(args) -> Pipeline:
+    parallel = args.workers > 1
+    stages = [bank_stage(args.n_per_cell, args.bank_seed, args.extra_bank, parallel)]
+    for s in args.seeds:
+        stages.append(train_stage(s, args.timesteps, args.config, parallel))
+        stages.append(eval_stage(s, args.episodes, args.eval_seed, parallel))
+    stages.append(report_stage(args.seeds))
+    return Pipeline(stages, cache_root=args.cache, root=ROOT, workers=args.workers)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    ap.add_argument("--timesteps", type=int, default=50_000)
+    ap.add_argument("--config", type=str, default=None, help="JSON com hiperparametros do PPO (ex.: runs/tune/best_config.json)")
+    ap.add_argument("--n_per_cell", type=int, default=12)
+    ap.add_argument("--bank_seed", type=int, default=42)
+    ap.add_argument("--extra_bank", type=str, default="data/items_seed.jsonl", help="itens extras anexados ao banco (LLM)")
+    ap.add_argument("--episodes", type=int, default=200)
+    ap.add_argument("--eval_seed", type=int, default=999)
+    ap.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    ap.add_argument("--cache", type=str, default=str(ROOT / "runs/cache"))
+    ap.add_argument("--outdir", type=str, default="runs/pipeline", help="copia dos artefatos do relatorio")
+    ap.add_argument("--only", type=str, nargs="*", default=None, help="roda só essas etapas (e as dependencias)")
+    ap.add_argument("--force", type=str, nargs="*", default=[], help="refaz essas etapas mesmo com cache")
+    args = ap.parse_args()
+
+    pipe = build(args)
+    results = pipe.run(targets=args.only, force=args.force)
+
+    n_cached = sum(r.cached for r in results.values())
+    print(f"{len(results)} stages: {len(results) - n_cached} ran, {n_cached} cached")
+    if "report" in results:
+        outdir = Path(args.outdir)
+        shutil.rmtree(outdir, ignore_errors=True)
+        shutil.copytree(results["report"].path, outdir)
+        print(f"Wrote {outdir} (from {results['report'].path})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+##analise do banco: agrupa itens repetidos/quase repetidos (chave canonica + MinHash/LSH) e salva os
+##clusters ao lado do banco (<banco>.clusters.npz), que o QuestionBank usa pra nao repetir conteudo na sessao
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.dedup import cluster_statements, save_clusters  # noqa: E402
+from tutor.question_bank import QuestionBank  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default="data/items_bank.jsonl")
+    ap.add_argument("--threshold", type=float, default=0.5, help="similaridade MinHash minima (texto com numeros mascarados)")
+    ap.add_argument("--num_perm", type=int, default=64)
+    ap.add_argument("--bands", type=int, default=16)
+    ap.add_argument("--report", type=str, default=None, help="JSON opcional com os clusters com mais de 1 item")
+    args = ap.parse_args()
+
+    bank = QuestionBank(args.bank)
+    texts = [it.statement for it in bank.items]
+
+    t0 = time.perf_counter()
+    exact = cluster_statements(texts, use_minhash=False)
+    groups = cluster_statements(texts, threshold=args.threshold, num_perm=args.num_perm, bands=args.bands)
+    elapsed = time.perf_counter() - t0
+
+    sizes = Counter(groups.tolist())
+    dup_clusters = {g: n for g, n in sizes.items() if n > 1}
+    print(f"{len(texts)} itens | {int(exact.max()) + 1} conteudos distintos (chave canonica) | "
+          f"{len(sizes)} clusters (com MinHash) | {elapsed:.2f}s")
+    print(f"{len(dup_clusters)} clusters com repeticao, cobrindo {sum(dup_clusters.values())} itens")
+    for g, n in sorted(dup_clusters.items(), key=lambda kv: -kv[1])[:5]:
+        first = next(i for i, x in enumerate(groups) if x == g)
+        print(f"  {n}x  {texts[first][:80]!r}")
+
+    out = save_clusters(args.bank, bank.items, groups)
+    print(f"Wrote {out}")
+
+    if args.report:
+        members = {}
+        for i, g in enumerate(groups.tolist()):
+            if g in dup_clusters:
+                members.setdefault(g, []).append({"id": bank.items[i].id, "statement": texts[i]})
+        Path(args.report).write_text(json.dumps(list(members.values()), indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Wrote {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+##bandit contextual online (LinUCB/Thompson): atualiza o estado com um stream de eventos jsonl em lotes,
+##com snapshot periodico; --simulate treina online contra o simulador (alunos em lote) pra ver a curva de aprendizado
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.bandit import ALGOS, LinearBandit  # noqa: E402
+
+
+def open_state(args) -> LinearBandit:
+    if Path(args.state).is_file() and not args.fresh:
+        bandit = LinearBandit.load(args.state, seed=args.seed)
+        print(f"Loaded {args.state} ({bandit.algo}, {bandit.n_updates} updates)")
+        return bandit
+    return LinearBandit(algo=args.algo, alpha=args.alpha, v=args.v, lam=args.lam, seed=args.seed)
+
+
+def read_events(path: str) -> Iterator[dict]:
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+#eventos sem "correct"/"reward" mas com item_id + response sao corrigidos no lote (tutor/grading.py)
+def grade_missing(rows: list[dict], grader) -> None:
+    todo = [r for r in rows if r.get("correct") is None and r.get("reward") is None and "response" in r]
+    if todo and grader is not None:
+        ids = [r.get("item_id", "") for r in todo]
+        ok = grader.gradable(ids)
+        for r, c, g in zip(todo, grader.grade(ids, [str(r["response"]) for r in todo]), ok):
+            r["correct"] = bool(c) if g else None
+
+
+def run_stream(bandit: LinearBandit, args) -> None:
+    grader = None
+    if args.bank:
+        from tutor.grading import Grader
+        from scripts.grade_responses import load_items
+        grader = Grader(load_items(args.bank))
+
+    n_used = n_seen = since_snap = 0
+    t_update = 0.0
+    rows: list[dict] = []
+
+    def flush() -> None:
+        nonlocal n_used, since_snap, t_update
+        grade_missing(rows, grader)
+        t0 = time.perf_counter()
+        used = bandit.update_events(rows)
+        t_update += time.perf_counter() - t0
+        n_used += used
+        since_snap += used
+        rows.clear()
+        if args.snapshot_every and since_snap >= args.snapshot_every:
+            bandit.save(args.state)
+            since_snap = 0
+
+    for ev in read_events(args.events):
+        rows.append(ev)
+        n_seen += 1
+        if len(rows) >= args.batch:
+            flush()
+    if rows:
+        flush()
+    bandit.save(args.state)
+    print(f"{n_seen} events | {n_used} used for updates | {n_used / max(t_update, 1e-9):,.0f} updates/s")
+    print(f"Wrote {args.state} ({bandit.n_updates} updates total)")
+
+
+#treino online contra o simulador: a cada passo o bandit decide pra todos os alunos ativos e aprende com
+#as respostas do passo (uma atualizacao em lote); cada rodada sao alunos novos
+def run_simulation(bandit: LinearBandit, args) -> None:
+    from tutor.envs.vec_tutor_env import VecFractionTutorEnv
+
+    venv = VecFractionTutorEnv(args.sim_bank, args.simulate, seed=args.seed, belief=args.belief)
+    log = None
+    if args.log_events:
+        Path(args.log_events).parent.mkdir(parents=True, exist_ok=True)
+        log = open(args.log_events, "w", encoding="utf-8")
+    t_act = t_upd = 0.0
+    n_dec = 0
+    for rnd in range(args.rounds):
+        obs = venv.reset(seed=args.seed + 1000 * rnd)
+        rets = np.zeros(venv.n)
+        while venv.active.any():
+            rows = np.flatnonzero(venv.active)
+            o = obs[rows].copy()
+            t0 = time.perf_counter()
+            a = bandit.act(o)
+            t_act += time.perf_counter() - t0
+            actions = np.zeros(venv.n, dtype=np.int64)
+            actions[rows] = a
+            obs, r, terminated, truncated, info = venv.step(actions)
+            rets += r
+            t0 = time.perf_counter()
+            bandit.update(o, a, r[rows])
+            t_upd += time.perf_counter() - t0
+            n_dec += len(rows)
+            if log is not None:
+                for i, oi, ai in zip(rows, o, a):
+                    log.write(json.dumps({"obs": [round(float(x), 4) for x in oi], "action": int(ai),
+                                          "correct": bool(info["correct"][i]), "reward": round(float(r[i]), 4)}) + "\n")
+        print(f"round {rnd:3d}: mean return {rets.mean():7.3f} | {bandit.n_updates} updates")
+    if log is not None:
+        log.close()
+        print(f"Wrote {args.log_events}")
+    bandit.save(args.state)
+    print(f"Per decision: act {t_act / n_dec * 1e6:.2f} us | update {t_upd / n_dec * 1e6:.2f} us (batched)")
+    print(f"Wrote {args.state}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--state", type=str, default="models/bandit.npz", help="snapshot (carregado se existir)")
+    ap.add_argument("--fresh", action="store_true", help="ignora o snapshot existente e comeca do zero")
+    ap.add_argument("--algo", choices=ALGOS, default="ucb")
+    ap.add_argument("--alpha", type=float, default=1.0, help="bonus de exploracao do UCB")
+    ap.add_argument("--v", type=float, default=0.5, help="escala da amostragem do Thompson")
+    ap.add_argument("--lam", type=float, default=1.0, help="regularizacao ridge")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--events", type=str, default=None, help="jsonl com {obs, action, correct|reward|response} ('-' = stdin)")
+    ap.add_argument("--bank", type=str, default=None, help="banco pra corrigir eventos que só tem item_id + response")
+    ap.add_argument("--batch", type=int, default=4096, help="eventos por atualizacao")
+    ap.add_argument("--snapshot_every", type=int, default=100_000, help="eventos entre snapshots (0 = só no fim)")
+    ap.add_argument("--simulate", type=int, default=0, help="alunos simulados por rodada (treino online no simulador)")
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--sim_bank", type=str, default=str(ROOT / "data/items_bank.jsonl"))
+    ap.add_argument("--belief", choices=["heuristic", "bayes"], default="heuristic")
+    ap.add_argument("--log_events", type=str, default=None, help="grava os eventos da simulacao em jsonl")
+    args = ap.parse_args()
+
+    if not args.events and not args.simulate:
+        ap.error("pass --events or --simulate")
+    bandit = open_state(args)
+    if args.events:
+        run_stream(bandit, args)
+    if args.simulate:
+        run_simulation(bandit, args)
+
+if __name__ == "__main__":
+    main()
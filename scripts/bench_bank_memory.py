@@ -0,0 +1,70 @@
+##compara a memoria retida de um banco grande como lista de Item (pydantic) vs lista de CompactItem
+##(nos dois casos cada linha passa pela validacao do Item; no compacto o Item é descartado logo depois)
+##obs: os textos (enunciado/solucao) vem dos dicts de origem e sao compartilhados, entao nao entram em nenhuma das contas
+from __future__ import annotations
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.compact import CompactItem  # noqa: E402
+from tutor.question_bank import READING_LOAD  # noqa: E402
+from tutor.schema import Item  # noqa: E402
+
+
+#replica as linhas do banco com ids unicos ate ter n itens (como num banco gerado em escala)
+def synthetic_rows(bank: Path, n: int) -> list[dict]:
+    base = [json.loads(l) for l in bank.read_text(encoding="utf-8").splitlines() if l.strip()]
+    rows = []
+    for i in range(n):
+        obj = dict(base[i % len(base)])
+        obj["id"] = f"{obj['id']}_r{i}"
+        obj.setdefault("reading_load", READING_LOAD.get(obj.get("format")))
+        rows.append(obj)
+    return rows
+
+
+def measure(build) -> tuple[float, float, object]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    cur, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cur / 2**20, elapsed, obj
+
+
+def gc_pass() -> float:
+    t0 = time.perf_counter()
+    gc.collect()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default=str(ROOT / "data/items_bank.jsonl"))
+    ap.add_argument("--n", type=int, default=100_000)
+    args = ap.parse_args()
+
+    rows = synthetic_rows(Path(args.bank), args.n)
+    mb_items, t_items, items = measure(lambda: [Item.model_validate(r) for r in rows])
+    gc_items = gc_pass()
+    del items
+    mb_compact, t_compact, compact = measure(lambda: [CompactItem.from_item(Item.model_validate(r)) for r in rows])
+    gc_compact = gc_pass()
+
+    print(f"{args.n} itens")
+    print(f"  Item (pydantic):  {mb_items:8.1f} MiB  ({mb_items * 2**20 / args.n:6.0f} B/item)  build {t_items:.2f}s  gc.collect {gc_items * 1e3:.1f} ms")
+    print(f"  CompactItem:      {mb_compact:8.1f} MiB  ({mb_compact * 2**20 / args.n:6.0f} B/item)  build {t_compact:.2f}s  gc.collect {gc_compact * 1e3:.1f} ms")
+    del compact
+
+if __name__ == "__main__":
+    main()
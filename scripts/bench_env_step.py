@@ -0,0 +1,47 @@
+##mede passos/segundo do FractionTutorEnv com a observacao original (6 campos) e com historico (buffer circular)
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.envs.fraction_tutor_env import FractionTutorEnv  # noqa: E402
+
+
+#acoes pre-sorteadas (o custo do rng da politica nao entra na conta); reset quando o episodio acaba
+def steps_per_sec(env: FractionTutorEnv, n_steps: int, seed: int) -> float:
+    actions = np.random.default_rng(seed).integers(0, env.action_space.n, size=n_steps)
+    env.reset(seed=seed)
+    t0 = time.perf_counter()
+    for a in actions:
+        _, _, done, truncated, _ = env.step(int(a))
+        if done or truncated:
+            env.reset()
+    return n_steps / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default=str(ROOT / "data/items_bank.jsonl"))
+    ap.add_argument("--steps", type=int, default=50_000)
+    ap.add_argument("--history", type=int, nargs="+", default=[0, 8, 32])
+    ap.add_argument("--belief", choices=["heuristic", "bayes"], default="heuristic")
+    ap.add_argument("--repeats", type=int, default=3)
+    args = ap.parse_args()
+
+    base = None
+    print(f"{'history':>8s} {'obs_dim':>8s} {'buffer':>8s} {'passos/s':>10s} {'vs 6-dim':>9s}")
+    for h in args.history:
+        env = FractionTutorEnv(args.bank, seed=0, belief=args.belief, history=h)
+        best = max(steps_per_sec(env, args.steps, seed=r) for r in range(args.repeats))
+        base = base or (best if h == 0 else None)
+        rel = f"{best / base:8.2f}x" if base else f"{'-':>9s}"
+        print(f"{h:8d} {env.observation_space.shape[0]:8d} {env._hist.nbytes:7d}B {best:10.0f} {rel}")
+
+if __name__ == "__main__":
+    main()
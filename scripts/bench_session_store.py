@@ -0,0 +1,94 @@
+##mede o SessionStore com muitas sessoes: memoria por aluno, decisoes em micro-lote (obs_batch -> politica ->
+##record), custo do WAL, snapshot e recuperacao (reabre o diretorio e confere que o estado voltou igual)
+from __future__ import annotations
+import argparse
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.policies import BASELINES, FnPolicy  # noqa: E402
+from tutor.session_store import SessionStore  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=1024, help="alunos por micro-lote de decisao")
+    ap.add_argument("--batches", type=int, default=2000)
+    ap.add_argument("--churn", type=float, default=0.01, help="fracao do lote que encerra e abre sessao nova")
+    ap.add_argument("--policy", choices=list(BASELINES), default="engagement")
+    ap.add_argument("--dir", type=str, default="runs/session_store")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    shutil.rmtree(args.dir, ignore_errors=True)
+    rng = np.random.default_rng(args.seed)
+    policy = FnPolicy(BASELINES[args.policy], seed=args.seed)
+    #snapshot automatico desligado aqui: o snapshot é medido separado no fim
+    store = SessionStore(capacity=args.sessions, path=args.dir, snapshot_every=0)
+
+    t0 = time.perf_counter()
+    for start in range(0, args.sessions, 100_000):
+        store.open(min(100_000, args.sessions - start))
+    t_open = time.perf_counter() - t0
+    print(f"{len(store):,} sessions | {store.state.nbytes / 1e6:.1f} MB state ({store.state.itemsize} B/session) | "
+          f"opened in {t_open:.2f}s")
+
+    obs = np.empty((args.batch, 6), dtype=np.float32)
+    n_churn = int(args.batch * args.churn)
+    t_obs = t_act = t_rec = 0.0
+    n_dec = 0
+    t0 = time.perf_counter()
+    for _ in range(args.batches):
+        slots = np.unique(rng.integers(0, store.capacity, args.batch)) #micro-lote de alunos distintos
+        slots = slots[store.state["alive"][slots] == 1]
+        t1 = time.perf_counter()
+        o = store.obs_batch(slots, out=obs[:len(slots)])
+        t2 = time.perf_counter()
+        a = policy.act(o)
+        t3 = time.perf_counter()
+        #resposta simulada (a dinamica do aluno nao importa aqui: mede o custo do store)
+        d = a % 5 + 1
+        correct = rng.random(len(slots)) < 0.6
+        store.record(slots, d, correct, load=rng.choice([0.2, 0.35, 0.45, 0.7], len(slots)),
+                     engagement=np.clip(o[:, 2] - 0.02, 0.0, 1.0))
+        t4 = time.perf_counter()
+        t_obs, t_act, t_rec = t_obs + t2 - t1, t_act + t3 - t2, t_rec + t4 - t3
+        n_dec += len(slots)
+        if n_churn: #algumas sessoes acabam e alunos novos entram (reusando slots da free list)
+            store.close(slots[:n_churn])
+            store.open(n_churn)
+    total = time.perf_counter() - t0
+    print(f"{n_dec:,} decisions in {total:.2f}s = {n_dec / total:,.0f}/s | per decision: obs {t_obs / n_dec * 1e9:.0f} ns, "
+          f"policy {t_act / n_dec * 1e9:.0f} ns, record+WAL {t_rec / n_dec * 1e9:.0f} ns")
+    st = store.stats()
+    print(f"WAL: {st['wal_rows']:,} rows, {st['wal_bytes'] / 1e6:.1f} MB")
+
+    #recuperacao só com o WAL (nenhum snapshot foi feito ainda)
+    expected = store.state.copy()
+    store.close_store()
+    t0 = time.perf_counter()
+    replay = SessionStore(path=args.dir, snapshot_every=0)
+    t_replay = time.perf_counter() - t0
+    ok = np.array_equal(replay.state[:len(expected)], expected)
+    print(f"Recovery from WAL only: {t_replay:.2f}s | state identical: {ok} | {len(replay):,} sessions")
+
+    t0 = time.perf_counter()
+    replay.snapshot()
+    t_snap = time.perf_counter() - t0
+    replay.close_store()
+    t0 = time.perf_counter()
+    again = SessionStore(path=args.dir, snapshot_every=0)
+    t_load = time.perf_counter() - t0
+    ok = np.array_equal(again.state[:len(expected)], expected)
+    print(f"Snapshot: {t_snap:.2f}s | recovery from snapshot: {t_load:.2f}s | state identical: {ok}")
+    again.close_store()
+
+if __name__ == "__main__":
+    main()
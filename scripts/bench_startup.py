@@ -0,0 +1,57 @@
+##mede o tempo de inicializacao (processo novo) dos pontos de entrada mais usados
+from __future__ import annotations
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+#(nome, comando) - tudo roda a partir da raiz do repo; "{tmp}" vira um diretorio temporario (nada de artefato no repo)
+CASES = [
+    ("python (vazio)", [sys.executable, "-c", "pass"]),
+    ("import tutor.question_bank", [sys.executable, "-c", "import tutor.question_bank"]),
+    ("import tutor.envs.fraction_tutor_env", [sys.executable, "-c", "import tutor.envs.fraction_tutor_env"]),
+    ("import eval_baselines", [sys.executable, "-c", "import eval_baselines"]),
+    ("import train_ppo", [sys.executable, "-c", "import train_ppo"]),
+    ("eval_baselines --help", [sys.executable, "eval_baselines.py", "--help"]),
+    ("train_ppo --help", [sys.executable, "train_ppo.py", "--help"]),
+    ("banco: carregar + amostrar", [sys.executable, "-c",
+        "from tutor.question_bank import QuestionBank; QuestionBank('data/items_bank.jsonl').sample('visual', 3)"]),
+    ("eval so baselines (5 eps, sem PPO)", [sys.executable, "eval_baselines.py", "--episodes", "5",
+        "--model", "__sem_modelo__", "--outdir", "{tmp}"]),
+]
+
+#quais modulos pesados cada caso acabou importando
+HEAVY = ["pydantic", "gymnasium", "matplotlib", "torch", "stable_baselines3"]
+
+
+def heavy_imports(cmd: list[str]) -> list[str]:
+    if cmd[1] != "-c":
+        return []
+    probe = cmd[2] + "\nimport sys; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY,)
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True)
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'caso':<40} {'mediana':>9} {'min':>9}  modulos pesados")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, cmd in CASES:
+            cmd = [c.replace("{tmp}", tmp) for c in cmd]
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+                times.append(time.perf_counter() - t0)
+            print(f"{name:<40} {statistics.median(times):>8.3f}s {min(times):>8.3f}s  {','.join(heavy_imports(cmd))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+##compila uma politica (PPO do registro ou baseline) numa tabela uint8 sobre o grid quantizado da observacao,
+##mede a concordancia com a politica original em estados de episodios reais e o custo de uma decisao
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.envs.vec_tutor_env import VecFractionTutorEnv  # noqa: E402
+from tutor.info_policy import InfoGainPolicy  # noqa: E402
+from tutor.policies import BASELINES, FnPolicy  # noqa: E402
+from tutor.policy_table import DEFAULT_RESOLUTION, PolicyTable, agreement, compile_policy  # noqa: E402
+from tutor.rollout import rollout_vec  # noqa: E402
+
+
+#guarda toda observacao que a politica viu (estados realmente visitados, pra medir concordancia)
+class Recorder:
+    def __init__(self, policy):
+        self.policy = policy
+        self.seen: list[np.ndarray] = []
+
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        self.seen.append(np.array(obs, dtype=np.float32))
+        return self.policy.act(obs)
+
+    def observations(self) -> np.ndarray:
+        return np.concatenate(self.seen) if self.seen else np.zeros((0, 6), dtype=np.float32)
+
+
+#baseline pelo nome ou PPO do registro -> (politica, env_kwargs do env em que ela roda)
+def resolve(name: str, bank: str, registry: str, seed: int):
+    if name in BASELINES:
+        return FnPolicy(BASELINES[name], seed=seed), {"max_steps": 20}
+    #info no env bayes de proposito: a tabela é funcao só da obs, e a tabela do info é indexada por theta.
+    #Só no env bayes o skill_est da obs é o theta da posterior; a posterior propria do PosteriorInfoPolicy
+    #(usada no env heuristico) é estado escondido e nao cabe numa tabela de obs
+    if name == "info":
+        return InfoGainPolicy(), {"max_steps": 20, "belief": "bayes"}
+    from tutor.model_registry import load_model
+    model = load_model(name, bank=bank, root=registry)
+    kw = model.env_kwargs
+    if model.recurrent or kw.get("history") or kw.get("topics") or kw.get("time_feature"):
+        raise ValueError(f"Model {name} does not use the plain 6-dim observation (recurrent/history/topics/time_feature); "
+                         f"it cannot be compiled into a table.")
+    return model, {"max_steps": kw.get("max_steps", 20), "belief": kw.get("belief", "heuristic")}
+
+
+#ns por decisao: act_one (uma obs, python puro) e act em lote (por linha)
+def latency(table: PolicyTable, obs: np.ndarray, repeats: int = 3) -> tuple[float, float]:
+    rows = [tuple(map(float, o)) for o in obs]
+    one = batch = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for o in rows:
+            table.act_one(o)
+        one = min(one, (time.perf_counter() - t0) / len(rows) * 1e9)
+        t0 = time.perf_counter()
+        table.act(obs)
+        batch = min(batch, (time.perf_counter() - t0) / len(obs) * 1e9)
+    return one, batch
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--policy", type=str, required=True, help="random/staircase/engagement/info ou modelo do registro "
+                         "(info é compilada e medida no env belief=bayes, o mesmo em que o eval roda a tabela)")
+    ap.add_argument("--bank", type=str, default=str(ROOT / "data/items_bank.jsonl"))
+    ap.add_argument("--registry", type=str, default="models")
+    ap.add_argument("--res_est", type=int, default=DEFAULT_RESOLUTION["skill_est"], help="pontos do grid em skill_est")
+    ap.add_argument("--res_unc", type=int, default=DEFAULT_RESOLUTION["skill_unc"], help="pontos do grid em skill_unc")
+    ap.add_argument("--res_eng", type=int, default=DEFAULT_RESOLUTION["engagement"], help="pontos do grid em engagement")
+    ap.add_argument("--episodes", type=int, default=2000, help="episodios pra medir concordancia e retorno")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", type=str, default=None, help="default: models/tables/<policy>.npz")
+    args = ap.parse_args()
+
+    policy, env_kwargs = resolve(args.policy, args.bank, args.registry, args.seed + 10_000)
+    resolution = {"skill_est": args.res_est, "skill_unc": args.res_unc, "engagement": args.res_eng}
+
+    t0 = time.perf_counter()
+    table = compile_policy(policy, resolution=resolution,
+                           meta={"source": args.policy, "env_kwargs": env_kwargs, "resolution": resolution})
+    t_compile = time.perf_counter() - t0
+
+    #estados reais: episodios da politica original no env vetorizado; depois a tabela nos mesmos alunos (CRN)
+    venv = VecFractionTutorEnv(args.bank, args.episodes, seed=args.seed, **env_kwargs)
+    rec = Recorder(policy)
+    orig = rollout_vec(venv, rec, seed=args.seed)
+    seen = rec.observations()
+    comp = rollout_vec(venv, table, seed=args.seed)
+    agree = agreement(table, policy, seen)
+    table.meta.update({"agreement": agree, "n_states": int(len(seen))})
+
+    out = Path(args.out or f"models/tables/{Path(args.policy).stem}.npz")
+    table.save(out)
+    one_ns, batch_ns = latency(table, seen[:20_000])
+
+    print(f"Grid {'x'.join(map(str, table.shape))} = {table.table.size} cells ({table.table.nbytes / 1024:.0f} KiB), "
+          f"compiled in {t_compile:.2f}s")
+    print(f"Agreement with {args.policy} on {len(seen)} visited states: {agree:.1%}")
+    print(f"Mean return: original {orig['return'].mean():.3f} | table {comp['return'].mean():.3f} "
+          f"(abandon {orig['abandoned'].mean():.1%} | {comp['abandoned'].mean():.1%})")
+    print(f"Decision: act_one {one_ns:.0f} ns | batch act {batch_ns:.0f} ns/obs")
+    print(f"Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,17 @@ import argparse
 import json
 import math #pq preciso fazer contas de mmc em questoes scaffold
 import random
+import sys
 from dataclasses import dataclass
+from decimal import Decimal
 from fractions import Fraction
 from pathlib import Path
 from typing import Tuple
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tutor.grading import parse_answer  # noqa: E402
+
 FORMATS = ["short_text", "multiple_choice", "visual", "scaffold"] #formatos possiveis de questao
 DIFFICULTIES = [1, 2, 3, 4, 5] #dificuldades
 
@@ -244,8 +250,140 @@ def make_scaffold(rng: random.Random, d: int) -> dict:
         "correct_index": -1,
     }
 
+##OUTROS TOPICOS (mesmos 4 formatos e 5 dificuldades, pra rodar o mesmo tutor)
+
+#decimal no formato brasileiro (virgula)
+def dec_str(x: Decimal) -> str:
+    return format(x.normalize(), "f").replace(".", ",")
+
+#numero decimal com mais casas conforme a dificuldade
+def rand_decimal(rng: random.Random, d: int) -> Decimal:
+    places = 1 if d <= 2 else 2
+    top = 10 if d <= 3 else 100
+    return Decimal(rng.randint(1, top * 10 ** places - 1)) / Decimal(10 ** places)
+
+#monta as 3 alternativas erradas + a certa, embaralhadas. Distrator com o mesmo valor da resposta (ex.: "0,450"
+#pra "0,45") é descartado pelo valor (parse_answer do tutor/grading.py), nao só pelo texto
+def mcq_options(rng: random.Random, answer: str, wrong: list[str]) -> tuple[list[str], int]:
+    seen = {parse_answer(answer)}
+    opts = []
+
+    def add(cand: str) -> None:
+        code = parse_answer(cand)
+        if code not in seen:
+            seen.add(code)
+            opts.append(cand)
+
+    for w in wrong:
+        add(w)
+    #distratores repetidos: completo com vizinhos numericos, resposta ± k unidades da ultima casa
+    pct = "%" if answer.endswith("%") else ""
+    value = Decimal(answer.rstrip("%").replace(",", "."))
+    step = Decimal(1).scaleb(min(0, value.normalize().as_tuple().exponent))
+    k = 1
+    while len(opts) < 3:
+        for cand in (value + k * step, value - k * step):
+            if cand > 0 and len(opts) < 3:
+                add(dec_str(cand) + pct)
+        k += 1
+    opts = opts[:3] + [answer]
+    rng.shuffle(opts)
+    return opts, opts.index(answer)
+
+def make_decimal(rng: random.Random, fmt: str, d: int) -> dict:
+    a, b = rand_decimal(rng, d), rand_decimal(rng, d)
+    if fmt == "visual":
+        if d <= 2:
+            shaded = rng.randint(1, 9)
+            ans = dec_str(Decimal(shaded) / 10)
+            stmt = (f"Imagine uma barra dividida em 10 partes iguais. {shaded} partes estão pintadas. "
+                    "Que número decimal representa a parte pintada?")
+            sol = f"{shaded} de 10 partes = {shaded}/10 = {ans}."
+            skills = ["representação visual", "décimos"]
+        else:
+            x, y = Decimal(rng.randint(1, 99)) / 100, Decimal(rng.randint(1, 9)) / 10
+            rel = "maior" if x > y else ("menor" if x < y else "igual")
+            ans = rel
+            stmt = (f"Num quadro de 100 quadradinhos, {int(x * 100)} estão pintados; numa barra de 10 partes, "
+                    f"{int(y * 10)} estão pintadas. A parte pintada do quadro é maior, menor ou igual à da barra?")
+            sol = f"Comparando {dec_str(x)} e {dec_str(y)}, a primeira é {rel} que a segunda."
+            skills = ["comparação de decimais", "representação visual"]
+        return {"statement": stmt, "answer": ans, "solution": sol, "skills": skills,
+                "tags": ["decimais", "visual", "template"], "options": [], "correct_index": -1}
+
+    op = rng.choice(["add", "sub"] if d <= 2 else ["add", "sub", "mul"])
+    if op == "sub" and b > a:
+        a, b = b, a
+    res = {"add": a + b, "sub": a - b, "mul": a * b}[op]
+    sym = {"add": "+", "sub": "−", "mul": "×"}[op]
+    skill = {"add": "soma de decimais", "sub": "subtração de decimais", "mul": "multiplicação de decimais"}[op]
+    ans = dec_str(res)
+    if fmt == "scaffold":
+        stmt = (
+            "Resolva passo a passo (preencha mentalmente as lacunas):\n"
+            f"1) Escreva {dec_str(a)} e {dec_str(b)} com o mesmo número de casas decimais: ___ e ___.\n"
+            "2) Alinhe as vírgulas, uma embaixo da outra.\n"
+            f"3) Faça a conta {dec_str(a)} {sym} {dec_str(b)} como se fossem números inteiros: ___.\n"
+            "4) Coloque a vírgula no resultado: ___."
+        )
+        return {"statement": stmt, "answer": ans, "solution": f"Resultado: {ans}.",
+                "skills": ["valor posicional", skill, "scaffold"], "tags": ["decimais", "scaffold", "template"],
+                "options": [], "correct_index": -1}
+    stmt = f"Calcule: {dec_str(a)} {sym} {dec_str(b)}."
+    item = {"statement": stmt, "answer": ans, "solution": f"Resposta: {ans}. (Alinhe as vírgulas.)",
+            "skills": [skill], "tags": ["decimais", "template"], "options": [], "correct_index": -1}
+    if fmt == "multiple_choice":
+        #erros comuns: vírgula no lugar errado e conta sem alinhar as casas
+        wrong = [dec_str(res * 10), dec_str(res / 10), dec_str(res + Decimal("0.1")), dec_str(abs(res - 1))]
+        item["options"], item["correct_index"] = mcq_options(rng, ans, wrong)
+        item["statement"] = stmt.replace("Calcule:", "Escolha a alternativa correta para:")
+        item["skills"] = [skill, "múltipla escolha"]
+    return item
+
+def make_percent(rng: random.Random, fmt: str, d: int) -> dict:
+    pct_pool = [10, 25, 50] if d <= 2 else ([5, 15, 20, 30, 75] if d <= 4 else [12, 35, 45, 65, 85])
+    pct = rng.choice(pct_pool)
+    base = rng.choice([20, 40, 60, 80, 100, 120, 200] if d <= 3 else [36, 48, 75, 150, 240, 360])
+    res = Decimal(pct * base) / 100
+    ans = dec_str(res)
+    if fmt == "visual":
+        shaded = rng.randint(1, 99)
+        stmt = (f"Num quadro de 100 quadradinhos, {shaded} estão pintados. "
+                "Qual porcentagem do quadro está pintada?")
+        return {"statement": stmt, "answer": f"{shaded}%", "solution": f"{shaded} de 100 = {shaded}%.",
+                "skills": ["representação visual", "porcentagem como parte de 100"],
+                "tags": ["porcentagem", "visual", "template"], "options": [], "correct_index": -1}
+    if fmt == "scaffold":
+        stmt = (
+            "Resolva passo a passo (preencha mentalmente as lacunas):\n"
+            f"1) Escreva {pct}% como fração de 100: ___/100.\n"
+            f"2) Divida {base} por 100: ___.\n"
+            f"3) Multiplique o resultado por {pct}: ___.\n"
+            f"4) Então {pct}% de {base} = ___."
+        )
+        return {"statement": stmt, "answer": ans, "solution": f"{base} ÷ 100 × {pct} = {ans}.",
+                "skills": ["porcentagem de um número", "scaffold"], "tags": ["porcentagem", "scaffold", "template"],
+                "options": [], "correct_index": -1}
+    stmt = f"Quanto é {pct}% de {base}?"
+    item = {"statement": stmt, "answer": ans, "solution": f"{pct}% de {base} = {base} × {pct}/100 = {ans}.",
+            "skills": ["porcentagem de um número"], "tags": ["porcentagem", "template"], "options": [],
+            "correct_index": -1}
+    if fmt == "multiple_choice":
+        #erros comuns: divide pela porcentagem, esquece de dividir por 100, soma
+        wrong = [dec_str(res * 10), dec_str(Decimal(base) / pct), str(pct * base), str(pct + base)]
+        item["options"], item["correct_index"] = mcq_options(rng, ans, wrong)
+        item["statement"] = f"Escolha a alternativa correta: quanto é {pct}% de {base}?"
+        item["skills"] = ["porcentagem de um número", "múltipla escolha"]
+    return item
+
+TOPICS = ["frações", "decimais", "porcentagem"]
+
 ##aqui chamo qual função chamar (das def acima) dependendo do tormato
-def generate_one(rng: random.Random, fmt: str, d: int) -> dict:
+def generate_one(rng: random.Random, fmt: str, d: int, topic: str = "frações") -> dict:
+    if topic == "decimais":
+        return make_decimal(rng, fmt, d)
+    if topic == "porcentagem":
+        return make_percent(rng, fmt, d)
     if fmt == "short_text":
         return make_short_text(rng, d)
     if fmt == "multiple_choice":
@@ -261,6 +399,9 @@ def main():
     ap.add_argument("--n_per_cell", type=int, default=10, help="items per (format,difficulty)")
     ap.add_argument("--seed", type=int, default=0)
     ap.add_argument("--append", action="store_true")
+    ap.add_argument("--topic", choices=TOPICS, default="frações")
+    ap.add_argument("--manifest", type=str, default=None,
+                    help="(opcional) registra o banco gerado nesse manifesto multi-topico (ex.: data/topics.json)")
     args = ap.parse_args()
 
     rng = random.Random(args.seed)
@@ -272,10 +413,10 @@ def main():
         for fmt in FORMATS:
             for d in DIFFICULTIES:
                 for v in range(1, args.n_per_cell + 1):
-                    payload = generate_one(rng, fmt, d)
+                    payload = generate_one(rng, fmt, d, args.topic)
                     item = {
-                        "id": f"frações_{fmt}_d{d}_t{args.seed}_v{v}",
-                        "topic": "frações",
+                        "id": f"{args.topic}_{fmt}_d{d}_t{args.seed}_v{v}",
+                        "topic": args.topic,
                         "format": fmt,
                         "difficulty": d,
                         "variation": v,
@@ -290,6 +431,9 @@ def main():
                     }
                     f.write(json.dumps(item, ensure_ascii=False) + "\n")
     print(f"Wrote -> {out.resolve()}")
+    if args.manifest:
+        from tutor.question_bank import update_manifest
+        print(f"Manifest -> {update_manifest(args.manifest, out, args.topic).resolve()}")
 
 if __name__ == "__main__":
     main()
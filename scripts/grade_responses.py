@@ -0,0 +1,71 @@
+##corrige um log de respostas (jsonl com item_id e response por linha) contra o gabarito do banco
+##e grava o mesmo log com o campo "correct"; serve pra reprocessar sessoes gravadas
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from tutor.grading import Grader  # noqa: E402
+from tutor.question_bank import MultiTopicBank, QuestionBank, is_manifest  # noqa: E402
+
+
+#itens de um banco (.jsonl) ou de todos os topicos de um manifesto (.json)
+def load_items(bank: str) -> list:
+    if is_manifest(bank):
+        mb = MultiTopicBank(bank)
+        return [it for t in mb.topics for it in mb.shard(t).items]
+    return QuestionBank(bank).items
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default=str(ROOT / "data/items_bank.jsonl"), help=".jsonl ou manifesto multi-topico .json")
+    ap.add_argument("--log", type=str, required=True, help="jsonl com {item_id, response, ...} por linha")
+    ap.add_argument("--out", type=str, default=None, help="default: <log>.graded.jsonl")
+    ap.add_argument("--batch", type=int, default=100_000, help="respostas corrigidas por chamada")
+    args = ap.parse_args()
+
+    grader = Grader(load_items(args.bank))
+    log = Path(args.log)
+    out = Path(args.out) if args.out else log.with_name(log.stem + ".graded.jsonl")
+
+    n = n_ok = n_skip = 0
+    t_grade = 0.0
+
+    def flush(rows: list[dict], f) -> None:
+        nonlocal n, n_ok, n_skip, t_grade
+        ids = [r.get("item_id", "") for r in rows]
+        t0 = time.perf_counter()
+        correct = grader.grade(ids, [str(r.get("response", "")) for r in rows])
+        t_grade += time.perf_counter() - t0
+        ok = grader.gradable(ids)
+        for r, c, g in zip(rows, correct, ok):
+            r["correct"] = bool(c) if g else None #None = item sem gabarito (ou fora do banco)
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        n += len(rows)
+        n_ok += int(correct.sum())
+        n_skip += int((~ok).sum())
+
+    with log.open("r", encoding="utf-8") as fin, out.open("w", encoding="utf-8") as fout:
+        rows: list[dict] = []
+        for line in fin:
+            if line.strip():
+                rows.append(json.loads(line))
+            if len(rows) >= args.batch:
+                flush(rows, fout)
+                rows = []
+        if rows:
+            flush(rows, fout)
+
+    graded = max(1, n - n_skip)
+    print(f"{n} respostas | {n_ok / graded:.1%} corretas | {n_skip} sem gabarito | "
+          f"{n / max(t_grade, 1e-9):,.0f} respostas/s na correcao")
+    print(f"Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+##varredura de cenarios: avalia todas as politicas num hipercubo latino de configuracoes do simulador (SimConfig),
+##em paralelo e com o env vetorizado, e mede o quanto o ranking das politicas depende de cada constante
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+#faixa de cada constante (o default do SimConfig fica dentro de todas). "format_load.x" mexe numa carga só
+PARAM_RANGES = {
+    "format_load.short_text": (0.10, 0.30),
+    "format_load.multiple_choice": (0.25, 0.45),
+    "format_load.visual": (0.35, 0.55),
+    "format_load.scaffold": (0.55, 0.85),
+    "difficulty_scale": (0.40, 0.80),
+    "engagement_weight": (0.40, 1.20),
+    "eng_load": (0.05, 0.15),
+    "eng_difficulty": (0.015, 0.045),
+    "eng_correct": (0.03, 0.09),
+    "eng_wrong": (0.00, 0.04),
+    "eng_reading": (0.02, 0.06),
+    "abandon_threshold": (0.08, 0.16),
+    "reward_wrong": (-0.8, -0.2),
+    "abandon_penalty": (3.0, 7.0),
+    "unc_bonus": (0.0, 0.10),
+}
+
+
+#hipercubo latino: cada coluna tem exatamente um ponto em cada um dos n estratos de [0, 1)
+def latin_hypercube(n: int, d: int, rng: np.random.Generator) -> np.ndarray:
+    u = (rng.random((n, d)) + np.arange(n)[:, None]) / n
+    for j in range(d):
+        u[:, j] = u[rng.permutation(n), j]
+    return u
+
+
+def sample_points(n: int, seed: int) -> list[dict]:
+    names = list(PARAM_RANGES)
+    lo = np.array([PARAM_RANGES[k][0] for k in names])
+    hi = np.array([PARAM_RANGES[k][1] for k in names])
+    u = latin_hypercube(n, len(names), np.random.default_rng(seed))
+    return [dict(zip(names, map(float, row))) for row in lo + u * (hi - lo)]
+
+
+#um ponto do grid: todas as politicas nos mesmos alunos (mesma seed de reset -> CRN)
+def evaluate_point(point_id: int, overrides: dict, bank: str, episodes: int, seed: int, belief: str,
+                   model: str | None, registry: str) -> dict:
+    from tutor.envs.vec_tutor_env import VecFractionTutorEnv
+    from tutor.info_policy import PosteriorInfoPolicy
+    from tutor.policies import BASELINES, FnPolicy
+    from tutor.rollout import rollout_vec
+    from tutor.student_sim import SimConfig
+
+    cfg = SimConfig().with_overrides(**overrides)
+    policies = {name: (FnPolicy(fn, seed=seed + 10_000), belief) for name, fn in BASELINES.items()}
+    #mesma convencao do eval_baselines.py: info com posterior propria, no mesmo env (e recompensa) das outras
+    policies["info"] = (PosteriorInfoPolicy(), belief)
+    max_steps = {name: 20 for name in policies}
+    if model:
+        import torch
+        from tutor.model_registry import load_model
+        torch.set_num_threads(1) #um processo = um core (o paralelismo vem do pool)
+        ppo = load_model(model, bank=bank, root=registry)
+        if ppo.env_kwargs.get("history") or ppo.env_kwargs.get("topics"):
+            raise ValueError(f"Model {model} uses history/topics, which the vectorized env does not simulate.")
+        policies["ppo"] = (ppo, ppo.env_kwargs.get("belief", "heuristic"))
+        max_steps["ppo"] = ppo.env_kwargs["max_steps"]
+
+    envs = {}
+    out = {"point": point_id, "params": overrides, "policies": {}}
+    for name, (pol, bel) in policies.items():
+        key = (bel, max_steps[name])
+        if key not in envs:
+            envs[key] = VecFractionTutorEnv(bank, episodes, max_steps=max_steps[name], seed=seed, belief=bel, config=cfg)
+        res = rollout_vec(envs[key], pol, seed=seed)
+        out["policies"][name] = {
+            "mean_return": float(res["return"].mean()),
+            "abandon_rate": float(res["abandoned"].mean()),
+            "mean_steps": float(res["steps"].mean()),
+        }
+    return out
+
+
+def ranking_of(pols: dict) -> list[str]:
+    return sorted(pols, key=lambda k: -pols[k]["mean_return"])
+
+
+def _ranks(x: np.ndarray) -> np.ndarray:
+    r = np.empty(len(x))
+    r[np.argsort(x, kind="stable")] = np.arange(len(x))
+    return r
+
+
+#correlacao de Spearman (sem scipy): Pearson dos postos
+def spearman(x: np.ndarray, y: np.ndarray) -> float:
+    rx, ry = _ranks(np.asarray(x)), _ranks(np.asarray(y))
+    rx -= rx.mean()
+    ry -= ry.mean()
+    den = float(np.sqrt((rx ** 2).sum() * (ry ** 2).sum()))
+    return float((rx * ry).sum() / den) if den > 0 else 0.0
+
+
+#tabela de sensibilidade: Spearman de cada constante com o retorno de cada politica e com a folga entre
+#politicas vizinhas no ranking default (correlacao alta na folga = essa constante pode inverter o ranking)
+def sensitivity(results: list[dict], default: dict) -> dict:
+    base_rank = ranking_of(default["policies"])
+    names = list(PARAM_RANGES)
+    X = np.array([[r["params"][k] for k in names] for r in results])
+    ret = {p: np.array([r["policies"][p]["mean_return"] for r in results]) for p in base_rank}
+    pairs = list(zip(base_rank[:-1], base_rank[1:]))
+    gaps = {f"{a} - {b}": ret[a] - ret[b] for a, b in pairs}
+
+    table = {}
+    for j, k in enumerate(names):
+        row = {p: spearman(X[:, j], ret[p]) for p in base_rank}
+        row.update({g: spearman(X[:, j], v) for g, v in gaps.items()})
+        table[k] = row
+
+    ranks = [ranking_of(r["policies"]) for r in results]
+    return {
+        "default_ranking": base_rank,
+        "default": default["policies"],
+        "n_points": len(results),
+        "same_ranking": float(np.mean([rk == base_rank for rk in ranks])),
+        "same_top": float(np.mean([rk[0] == base_rank[0] for rk in ranks])),
+        "pair_order_kept": {g: float(np.mean(v > 0)) for g, v in gaps.items()},
+        "spearman": table,
+    }
+
+
+def write_points_csv(results: list[dict], path: Path) -> None:
+    names = list(PARAM_RANGES)
+    pols = list(results[0]["policies"])
+    with path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["point", *names, *(f"{p}_return" for p in pols), *(f"{p}_abandon" for p in pols), "ranking"])
+        for r in results:
+            w.writerow([r["point"], *(r["params"][k] for k in names),
+                        *(r["policies"][p]["mean_return"] for p in pols),
+                        *(r["policies"][p]["abandon_rate"] for p in pols),
+                        " > ".join(ranking_of(r["policies"]))])
+
+
+def print_table(sens: dict) -> None:
+    cols = list(next(iter(sens["spearman"].values())))
+    width = max(12, *(len(c) for c in cols))
+    print(f"{'':28s}" + "".join(f"{c:>{width + 1}s}" for c in cols))
+    for k, row in sens["spearman"].items():
+        print(f"{k:28s}" + "".join(f"{row[c]:>+{width + 1}.2f}" for c in cols))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default="data/items_bank.jsonl")
+    ap.add_argument("--points", type=int, default=64, help="configuracoes no hipercubo latino")
+    ap.add_argument("--episodes", type=int, default=2000, help="alunos por politica em cada configuracao")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--belief", choices=["heuristic", "bayes"], default="heuristic",
+                    help="estimativa de habilidade do env (todas as politicas, inclusive info, rodam no mesmo)")
+    ap.add_argument("--model", type=str, default=None, help="(opcional) PPO do registro pra entrar na comparacao")
+    ap.add_argument("--registry", type=str, default="models")
+    ap.add_argument("--outdir", type=str, default="runs/sweep")
+    args = ap.parse_args()
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    points = sample_points(args.points, args.seed)
+    eval_seed = 70_000 + args.seed
+
+    #ponto 0 = SimConfig default (referencia do ranking); o resto é o hipercubo
+    jobs = [(0, {})] + [(i + 1, p) for i, p in enumerate(points)]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futs = [pool.submit(evaluate_point, pid, ov, args.bank, args.episodes, eval_seed, args.belief,
+                            args.model, args.registry) for pid, ov in jobs]
+        results = [f.result() for f in futs]
+
+    default, swept = results[0], results[1:]
+    write_points_csv(swept, outdir / "points.csv")
+    sens = sensitivity(swept, default)
+    (outdir / "sensitivity.json").write_text(json.dumps(sens, indent=2), encoding="utf-8")
+
+    print(f"Default ranking: {' > '.join(sens['default_ranking'])}")
+    print(f"Same ranking in {sens['same_ranking']:.0%} of {sens['n_points']} configs, same top in {sens['same_top']:.0%}")
+    for g, v in sens["pair_order_kept"].items():
+        print(f"  {g}: order kept in {v:.0%}")
+    print("\nSpearman(constante, retorno / folga):")
+    print_table(sens)
+    print(f"\nWrote {outdir / 'points.csv'}")
+    print(f"Wrote {outdir / 'sensitivity.json'}")
+
+if __name__ == "__main__":
+    main()
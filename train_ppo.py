@@ -1,57 +1,104 @@
 ##treino do ppo
 from __future__ import annotations
 import argparse
+import json
 from pathlib import Path
-from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
 
+from tutor.curriculum import CurriculumScheduler
 from tutor.envs.fraction_tutor_env import FractionTutorEnv #importando meu tutor
+from tutor.model_registry import ModelRegistry, make_meta, save_bundle
 
 #pra poder usar no dummyvecenv
-def make_env(bank: str, seed: int):
+def make_env(bank: str, seed: int, max_steps: int = 20, curriculum: CurriculumScheduler | None = None,
+             belief: str = "heuristic", topics: list[str] | None = None, history: int = 0, time_feature: bool = False):
     def _thunk():
-        return FractionTutorEnv(bank_path=bank, max_steps=20, seed=seed)
+        return FractionTutorEnv(bank_path=bank, max_steps=max_steps, seed=seed, curriculum=curriculum, belief=belief,
+                                topics=topics, history=history, time_feature=time_feature)
     return _thunk
 
+#hiperparametros padrao do PPO (podem ser sobrescritos por um JSON do tune_ppo.py via --config)
+PPO_DEFAULTS = {
+    "n_steps": 1024, #rollout
+    "batch_size": 256,
+    "gamma": 0.99, #fator de desconto
+    "learning_rate": 3e-4, #taxa de aprendizado
+}
+
+def load_ppo_config(path: str | None) -> dict:
+    cfg = dict(PPO_DEFAULTS)
+    if path:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        cfg.update(data.get("ppo", data)) #aceita o best_config.json inteiro ou só o dict de hiperparametros
+    return cfg
+
 #definindo o treino
 def main():
     ap = argparse.ArgumentParser() 
     ap.add_argument("--bank", type=str, default="data/items_bank.jsonl")
     ap.add_argument("--timesteps", type=int, default=200_000) #aqui escolhi 200 passos
     ap.add_argument("--seed", type=int, default=0)
-    ap.add_argument("--out", type=str, default="models/ppo_20actions.zip") #pra salvar os treinos
+    ap.add_argument("--out", type=str, default="models/ppo_20actions.zip") #bundle (pesos + VecNormalize + config)
+    ap.add_argument("--name", type=str, default=None, help="nome no registro de modelos (default: nome do arquivo --out)")
+    ap.add_argument("--registry", type=str, default="models", help="pasta do registro (mesmo default do eval_baselines.py)")
+    ap.add_argument("--max_steps", type=int, default=20)
+    ap.add_argument("--config", type=str, default=None, help="JSON com hiperparametros do PPO (ex.: runs/tune/best_config.json)")
+    ap.add_argument("--curriculum", action="store_true", help="curriculo adaptativo sobre perfis de aluno e max_steps")
+    ap.add_argument("--belief", choices=["heuristic", "bayes"], default="heuristic",
+                    help="estimativa de habilidade na observacao (heuristica ou posterior bayesiana IRT)")
+    ap.add_argument("--topics", type=str, default=None,
+                    help="com --bank manifesto multi-topico (.json): topicos separados por virgula (default: todos)")
+    ap.add_argument("--history", type=int, default=0, help="ultimas N respostas na observacao (buffer circular)")
+    ap.add_argument("--time_feature", action="store_true",
+                    help="fracao da sessao que falta na observacao (sempre ligado com --curriculum, que varia o max_steps)")
+    ap.add_argument("--recurrent", action="store_true", help="RecurrentPPO com politica LSTM (precisa do sb3-contrib)")
+    ap.add_argument("--n_envs", type=int, default=1, help="envs em paralelo por rollout (sequencias em lote)")
     args = ap.parse_args()
+    topics = [t.strip() for t in args.topics.split(",")] if args.topics else None
+    time_feature = args.time_feature or args.curriculum
+    ppo_cfg = load_ppo_config(args.config)
+
+    #torch/SB3 demoram pra importar: só depois de validar os argumentos (e quem importa make_env nao paga)
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+    if args.recurrent:
+        from sb3_contrib import RecurrentPPO
 
 #criando o env vetorizado e anormalizacao
-    env = DummyVecEnv([make_env(args.bank, args.seed)])
+    #o curriculo é um objeto só, compartilhado pelo env (DummyVecEnv roda no mesmo processo)
+    curriculum = CurriculumScheduler(seed=args.seed) if args.curriculum else None
+    #n_envs envs com seeds diferentes: cada rollout coleta n_envs sequencias de n_steps em lote
+    env = DummyVecEnv([make_env(args.bank, args.seed + i, args.max_steps, curriculum, args.belief, topics, args.history,
+                                time_feature) for i in range(args.n_envs)])
     env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=5.0)
 
 #criando o modelo ppo
-    model = PPO(
-        "MlpPolicy",
+    algo = "RecurrentPPO" if args.recurrent else "PPO"
+    model = (RecurrentPPO if args.recurrent else PPO)(
+        "MlpLstmPolicy" if args.recurrent else "MlpPolicy",
         env,
         seed=args.seed,
         verbose=1,
-        n_steps=1024, #rollout
-        batch_size=256,
-        gamma=0.99, #fator de desconto
-        learning_rate=3e-4, #taxa de aprendizado
+        **ppo_cfg,
     )
     model.learn(total_timesteps=args.timesteps) #treino
 
-    Path("models").mkdir(exist_ok=True)
-
     #garantindo que a pasta do --out existe (caso o usuario mude o caminho)
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
 
-    model.save(args.out)
+    #um arquivo só com pesos + VecNormalize + config do env (evita carregar a normalizacao errada)
+    meta = make_meta(args.bank, seed=args.seed, max_steps=args.max_steps, algo=algo,
+                     env_kwargs={"belief": args.belief, "topics": topics, "history": args.history,
+                                 "time_feature": time_feature},
+                     n_envs=args.n_envs, timesteps=args.timesteps, ppo=ppo_cfg,
+                     curriculum=curriculum.summary() if curriculum is not None else None)
+    save_bundle(args.out, model, env, meta)
 
-    #salvando as estatisticas com nome ligado ao modelo (evita vecnormalize errado)
-    vn_path = Path(args.out).with_suffix(".vecnormalize.pkl")
-    env.save(str(vn_path)) #salvando as estatisticas
+    name = args.name or Path(args.out).stem
+    registry = ModelRegistry(args.registry)
+    registry.register(name, args.out, meta)
 
-    print(f"Saved model -> {args.out}")
-    print(f"Saved VecNormalize -> {vn_path}")
+    print(f"Saved model bundle -> {args.out}")
+    print(f"Registered as '{name}' in {registry.index_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,240 @@
+##busca de hiperparametros do PPO (ASHA: successive halving assincrono) com trials em paralelo
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+#espaco de busca: cada entrada sorteia um valor a partir de um random.Random
+SEARCH_SPACE = {
+    "n_steps": lambda r: r.choice([256, 512, 1024, 2048]),
+    "batch_size": lambda r: r.choice([64, 128, 256]),
+    "gamma": lambda r: 1.0 - 10 ** r.uniform(math.log10(0.005), math.log10(0.1)), #entre 0.9 e 0.995
+    "learning_rate": lambda r: 10 ** r.uniform(-5, -3),
+    "gae_lambda": lambda r: r.uniform(0.8, 0.99),
+    "ent_coef": lambda r: 10 ** r.uniform(-4, math.log10(0.05)),
+    "clip_range": lambda r: r.choice([0.1, 0.2, 0.3]),
+    "n_epochs": lambda r: r.choice([5, 10, 20]),
+}
+
+def sample_config(rng: random.Random) -> dict:
+    cfg = {k: fn(rng) for k, fn in SEARCH_SPACE.items()}
+    cfg["batch_size"] = min(cfg["batch_size"], cfg["n_steps"]) #o minibatch nao pode ser maior que o rollout
+    return cfg
+
+
+##estado da busca fica num sqlite (da pra interromper e continuar depois)
+class Study:
+    def __init__(self, path: Path, n_trials: int, min_ts: int, max_ts: int, eta: int, seed: int):
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS trials (
+                id INTEGER PRIMARY KEY, config TEXT, status TEXT, rung INTEGER, checkpoint TEXT);
+            CREATE TABLE IF NOT EXISTS results (
+                trial_id INTEGER, rung INTEGER, score REAL, timesteps INTEGER, wall REAL,
+                PRIMARY KEY (trial_id, rung));
+        """)
+        #as configuracoes de orcamento ficam gravadas na criacao (retomar com outros valores baguncaria os rungs)
+        settings = {"min_timesteps": min_ts, "max_timesteps": max_ts, "eta": eta, "seed": seed}
+        stored = dict(self.db.execute("SELECT key, value FROM settings").fetchall())
+        if stored:
+            settings = {k: int(stored[k]) for k in settings}
+        else:
+            self.db.executemany("INSERT INTO settings VALUES (?, ?)", [(k, str(v)) for k, v in settings.items()])
+        self.db.commit()
+
+        self.n_trials = n_trials
+        self.min_ts = settings["min_timesteps"]
+        self.eta = settings["eta"]
+        self.seed = settings["seed"]
+        #orcamento de cada rung: min_ts, min_ts*eta, min_ts*eta^2, ... ate max_ts
+        self.budgets = []
+        b = self.min_ts
+        while b < settings["max_timesteps"]:
+            self.budgets.append(b)
+            b *= self.eta
+        self.budgets.append(settings["max_timesteps"])
+
+        #trials que estavam rodando quando o processo morreu voltam pra fila
+        self.db.execute("UPDATE trials SET status = 'requeue' WHERE status = 'running'")
+        self.db.commit()
+
+    def _job(self, trial_id: int, rung: int) -> dict:
+        config, ckpt = self.db.execute("SELECT config, checkpoint FROM trials WHERE id = ?", (trial_id,)).fetchone()
+        self.db.execute("UPDATE trials SET status = 'running', rung = ? WHERE id = ?", (rung, trial_id))
+        self.db.commit()
+        return {
+            "trial_id": trial_id,
+            "rung": rung,
+            "config": json.loads(config),
+            "checkpoint": ckpt,
+            "budget": self.budgets[rung],
+            "seed": self.seed + trial_id,
+        }
+
+    #proximo trabalho: retomar, promover (do rung mais alto pro mais baixo) ou abrir um trial novo
+    def next_job(self) -> dict | None:
+        row = self.db.execute("SELECT id, rung FROM trials WHERE status = 'requeue' LIMIT 1").fetchone()
+        if row:
+            return self._job(row[0], row[1])
+
+        for rung in range(len(self.budgets) - 2, -1, -1):
+            scores = self.db.execute(
+                "SELECT trial_id FROM results WHERE rung = ? ORDER BY score DESC", (rung,)
+            ).fetchall()
+            k = len(scores) // self.eta #só o top 1/eta de quem ja terminou o rung sobe
+            for (trial_id,) in scores[:k]:
+                status, cur = self.db.execute("SELECT status, rung FROM trials WHERE id = ?", (trial_id,)).fetchone()
+                if status == "idle" and cur == rung:
+                    return self._job(trial_id, rung + 1)
+
+        n = self.db.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+        if n < self.n_trials:
+            cfg = sample_config(random.Random(self.seed * 100_003 + n))
+            cur = self.db.execute(
+                "INSERT INTO trials (config, status, rung, checkpoint) VALUES (?, 'idle', 0, NULL)", (json.dumps(cfg),)
+            )
+            return self._job(cur.lastrowid, 0)
+        return None
+
+    def record(self, res: dict) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            (res["trial_id"], res["rung"], res["score"], res["timesteps"], res["wall"]),
+        )
+        self.db.execute(
+            "UPDATE trials SET status = 'idle', checkpoint = ? WHERE id = ?", (res["checkpoint"], res["trial_id"])
+        )
+        self.db.commit()
+
+    def fail(self, trial_id: int) -> None:
+        self.db.execute("UPDATE trials SET status = 'failed' WHERE id = ?", (trial_id,))
+        self.db.commit()
+
+    #melhor trial = maior score no rung mais alto que alguem alcancou
+    def best(self) -> dict | None:
+        row = self.db.execute(
+            "SELECT r.trial_id, r.rung, r.score, r.timesteps, t.config FROM results r JOIN trials t ON t.id = r.trial_id "
+            "ORDER BY r.rung DESC, r.score DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        trial_id, rung, score, ts, config = row
+        return {"trial": trial_id, "rung": rung, "score": score, "timesteps": ts, "ppo": json.loads(config)}
+
+
+##o que cada processo do pool executa: treina o trial ate o orcamento do rung e avalia
+def run_trial(job: dict, bank: str, max_steps: int, eval_episodes: int, eval_seed: int, ckpt_dir: str) -> dict:
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+
+    from eval_baselines import run_episode
+    from train_ppo import make_env
+    from tutor.envs.fraction_tutor_env import FractionTutorEnv
+    from tutor.model_registry import LoadedModel, load_bundle, make_meta, save_bundle
+
+    torch.set_num_threads(1) #um processo = um core (o paralelismo vem do pool)
+    t0 = time.time()
+
+    done_ts = 0
+    if job["checkpoint"]:
+        #continua de onde o rung anterior parou (pesos + estatisticas do VecNormalize)
+        #env com a seed do trial (o default do load_bundle é 0: todo trial promovido treinaria nos mesmos
+        #alunos); deslocada por rung pra nao repetir no rung novo a sequencia de alunos do primeiro
+        loaded = load_bundle(job["checkpoint"], bank=bank, seed=job["seed"] + 10_000 * job["rung"])
+        model, venv = loaded.model, loaded.venv
+        venv.training = True
+        venv.norm_reward = True
+        done_ts = int(loaded.meta.get("timesteps", 0))
+    else:
+        venv = VecNormalize(DummyVecEnv([make_env(bank, job["seed"], max_steps)]), norm_obs=True, norm_reward=True, clip_obs=5.0)
+        model = PPO("MlpPolicy", venv, seed=job["seed"], verbose=0, **job["config"])
+
+    model.learn(total_timesteps=max(0, job["budget"] - done_ts), reset_num_timesteps=False)
+
+    ckpt = Path(ckpt_dir) / f"trial{job['trial_id']:04d}.zip"
+    meta = make_meta(bank, seed=job["seed"], max_steps=max_steps, timesteps=job["budget"], ppo=job["config"])
+    save_bundle(ckpt, model, venv, meta)
+
+    #avaliacao intermediaria: mesmos alunos/seeds pra todos os trials (comparacao justa)
+    venv.training = False
+    policy = LoadedModel(model=model, venv=venv, meta=meta, path=ckpt)
+    rets = []
+    for i in range(eval_episodes):
+        env = FractionTutorEnv(bank_path=bank, max_steps=max_steps, seed=eval_seed + i)
+        ep = run_episode(env, lambda obs, rng: int(policy.act(obs)[0]), random.Random(eval_seed + i), seed=eval_seed + i)
+        rets.append(ep.return_sum)
+
+    return {
+        "trial_id": job["trial_id"],
+        "rung": job["rung"],
+        "score": float(sum(rets) / len(rets)),
+        "timesteps": job["budget"],
+        "checkpoint": str(ckpt),
+        "wall": time.time() - t0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bank", type=str, default="data/items_bank.jsonl")
+    ap.add_argument("--study", type=str, default="runs/tune", help="pasta com study.db, checkpoints e best_config.json")
+    ap.add_argument("--trials", type=int, default=27)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--min_timesteps", type=int, default=8_192)
+    ap.add_argument("--max_timesteps", type=int, default=200_000)
+    ap.add_argument("--eta", type=int, default=3)
+    ap.add_argument("--eval_episodes", type=int, default=50)
+    ap.add_argument("--max_steps", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    study_dir = Path(args.study)
+    ckpt_dir = study_dir / "checkpoints"
+    ckpt_dir.mkdir(parents=True, exist_ok=True)
+    study = Study(study_dir / "study.db", args.trials, args.min_timesteps, args.max_timesteps, args.eta, args.seed)
+    print(f"Rung budgets (timesteps): {study.budgets}")
+
+    eval_seed = 50_000 + args.seed
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        running = {}
+        while True:
+            while len(running) < args.workers:
+                job = study.next_job()
+                if job is None:
+                    break
+                fut = pool.submit(run_trial, job, args.bank, args.max_steps, args.eval_episodes, eval_seed, str(ckpt_dir))
+                running[fut] = job
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                job = running.pop(fut)
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    print(f"[WARN] trial {job['trial_id']} failed at rung {job['rung']}: {e}")
+                    study.fail(job["trial_id"])
+                    continue
+                study.record(res)
+                print(f"trial {res['trial_id']:3d} | rung {res['rung']} | {res['timesteps']:>7d} steps | "
+                      f"return = {res['score']:.3f} | {res['wall']:.0f}s")
+
+    best = study.best()
+    if best is None:
+        print("[WARN] No finished trials.")
+        return
+    out = study_dir / "best_config.json"
+    out.write_text(json.dumps(best, indent=2), encoding="utf-8")
+    print(f"Best trial {best['trial']} (rung {best['rung']}, return {best['score']:.3f})")
+    print(f"Wrote {out}  (use: python train_ppo.py --config {out})")
+
+if __name__ == "__main__":
+    main()
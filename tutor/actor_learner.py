@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import time
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+#treino actor-learner (estilo IMPALA): N processos "actor" rodam o FractionTutorEnv com uma copia recente
+#da politica e mandam trechos de trajetoria (unroll de T passos) por buffers circulares em memoria
+#compartilhada; o learner treina sem parar com o que chega. Como o actor pode estar algumas versoes atras
+#(policy lag), o learner corrige com V-trace (importance sampling truncado: rho_bar, c_bar).
+#  - um ring por actor, produtor unico/consumidor unico: head/tail em int64 compartilhado, sem lock
+#    (o produtor escreve o slot e só depois anda o head; o consumidor copia e só depois anda o tail)
+#  - os pesos (+ media/var da normalizacao de obs) vao num quadro compartilhado com seqlock: versao impar =
+#    escrita em andamento; o actor só aceita a copia se a versao era par e nao mudou durante a leitura
+
+CLIP_OBS = 5.0 #mesmo clip do VecNormalize do train_ppo.py
+EPS = 1e-8
+
+
+#layout de um bloco compartilhado: campos (nome, dtype, shape) em sequencia, alinhados em 8 bytes
+def _layout(fields: List[Tuple[str, Any, tuple]]) -> Tuple[Dict[str, Tuple[int, Any, tuple]], int]:
+    out, off = {}, 0
+    for name, dtype, shape in fields:
+        dtype = np.dtype(dtype)
+        out[name] = (off, dtype, shape)
+        off += int(np.prod(shape)) * dtype.itemsize
+        off = (off + 7) // 8 * 8
+    return out, max(off, 8)
+
+
+class _SharedBlock:
+    def __init__(self, fields, name: Optional[str] = None):
+        layout, size = _layout(fields)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        for key, (off, dtype, shape) in layout.items():
+            setattr(self, key, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=off))
+        if self.owner:
+            np.frombuffer(self.shm.buf, dtype=np.uint8)[:] = 0
+
+    def close(self) -> None:
+        #as views numpy seguram o buffer: solta antes de fechar
+        for key in list(vars(self)):
+            if isinstance(getattr(self, key), np.ndarray):
+                setattr(self, key, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class TrajectoryRing(_SharedBlock):
+    def __init__(self, n_slots: int, unroll: int, obs_dim: int, name: Optional[str] = None):
+        self.spec = (n_slots, unroll, obs_dim)
+        S, T, D = n_slots, unroll, obs_dim
+        super().__init__([
+            ("ctrl", np.int64, (4,)), #head, tail, esperas do produtor com o ring cheio, -
+            ("obs", np.float32, (S, T + 1, D)), #obs cruas; a ultima é o bootstrap do trecho
+            ("actions", np.int64, (S, T)),
+            ("rewards", np.float32, (S, T)),
+            ("dones", np.float32, (S, T)),
+            ("logp", np.float32, (S, T)), #log pi_actor(a|x): denominador do V-trace
+            ("version", np.int64, (S,)), #versao da politica que gerou o trecho
+            ("ep_stats", np.float64, (S, 2)), #soma dos retornos e n de episodios que terminaram no trecho
+        ], name=name)
+
+    @property
+    def handle(self) -> tuple:
+        return (self.shm.name, *self.spec)
+
+    @classmethod
+    def attach(cls, handle: tuple) -> "TrajectoryRing":
+        name, *spec = handle
+        return cls(*spec, name=name)
+
+    @property
+    def n_slots(self) -> int:
+        return self.spec[0]
+
+    def free_slot(self) -> Optional[int]:
+        head, tail = int(self.ctrl[0]), int(self.ctrl[1])
+        return head % self.n_slots if head - tail < self.n_slots else None
+
+    def commit(self) -> None:
+        self.ctrl[0] += 1
+
+    def ready(self) -> int:
+        return int(self.ctrl[0] - self.ctrl[1])
+
+    def peek(self) -> int:
+        return int(self.ctrl[1]) % self.n_slots
+
+    def release(self) -> None:
+        self.ctrl[1] += 1
+
+
+class ParamBoard(_SharedBlock):
+    def __init__(self, n_params: int, obs_dim: int, name: Optional[str] = None):
+        self.spec = (n_params, obs_dim)
+        super().__init__([
+            ("seq", np.int64, (2,)), #seqlock, versao da politica (n de updates do learner)
+            ("params", np.float32, (n_params,)),
+            ("obs_mean", np.float64, (obs_dim,)),
+            ("obs_var", np.float64, (obs_dim,)),
+        ], name=name)
+
+    @property
+    def handle(self) -> tuple:
+        return (self.shm.name, *self.spec)
+
+    @classmethod
+    def attach(cls, handle: tuple) -> "ParamBoard":
+        name, *spec = handle
+        return cls(*spec, name=name)
+
+    def publish(self, params: np.ndarray, mean: np.ndarray, var: np.ndarray, version: int) -> None:
+        self.seq[0] += 1 #impar: escrevendo
+        self.params[:] = params
+        self.obs_mean[:] = mean
+        self.obs_var[:] = var
+        self.seq[1] = version
+        self.seq[0] += 1
+
+    #copia consistente (ou None se nao mudou desde `known`)
+    def fetch(self, known: int) -> Optional[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+        while True:
+            s0 = int(self.seq[0])
+            if s0 % 2:
+                time.sleep(0)
+                continue
+            version = int(self.seq[1])
+            if version == known:
+                return None
+            out = (version, self.params.copy(), self.obs_mean.copy(), self.obs_var.copy())
+            if int(self.seq[0]) == s0:
+                return out
+
+
+def normalize(obs: np.ndarray, mean: np.ndarray, var: np.ndarray) -> np.ndarray:
+    return np.clip((obs - mean) / np.sqrt(var + EPS), -CLIP_OBS, CLIP_OBS).astype(np.float32)
+
+
+#mesma rede do "MlpPolicy" do PPO do SB3 (pi e vf 64-64 tanh): os pesos entram direto num bundle PPO
+def make_policy(observation_space, action_space, lr: float = 3e-4):
+    from stable_baselines3.common.policies import ActorCriticPolicy
+    return ActorCriticPolicy(observation_space, action_space, lr_schedule=lambda _: lr)
+
+
+def get_flat(policy) -> np.ndarray:
+    from torch.nn.utils import parameters_to_vector
+    return parameters_to_vector(policy.parameters()).detach().cpu().numpy().astype(np.float32)
+
+
+def set_flat(policy, flat: np.ndarray) -> None:
+    import torch
+    from torch.nn.utils import vector_to_parameters
+    vector_to_parameters(torch.as_tensor(flat), policy.parameters())
+
+
+#inferencia do actor em numpy puro (MLP 64-64 de uma obs: ~10x mais rapido que o forward do torch, e o
+#actor é o gargalo quando o env roda passo a passo); os pesos sao views do vetor plano publicado pelo learner
+class NumpyActor:
+    def __init__(self, policy, seed: int = 0):
+        self.shapes = [(name, tuple(p.shape)) for name, p in policy.named_parameters()]
+        self.rng = np.random.default_rng(seed)
+        self.w: Dict[str, np.ndarray] = {}
+
+    def load(self, flat: np.ndarray) -> None:
+        off = 0
+        for name, shape in self.shapes:
+            n = int(np.prod(shape))
+            self.w[name] = flat[off:off + n].reshape(shape).astype(np.float64)
+            off += n
+
+    def _mlp(self, prefix: str, x: np.ndarray) -> np.ndarray:
+        w = self.w
+        h = np.tanh(w[f"mlp_extractor.{prefix}.0.weight"] @ x + w[f"mlp_extractor.{prefix}.0.bias"])
+        return np.tanh(w[f"mlp_extractor.{prefix}.2.weight"] @ h + w[f"mlp_extractor.{prefix}.2.bias"])
+
+    #acao amostrada da categorica + log-prob dela
+    def act(self, x: np.ndarray) -> Tuple[int, float]:
+        logits = self.w["action_net.weight"] @ self._mlp("policy_net", x) + self.w["action_net.bias"]
+        z = logits - logits.max()
+        logp = z - np.log(np.exp(z).sum())
+        a = int(np.searchsorted(np.cumsum(np.exp(logp)), self.rng.random() * np.exp(logp).sum()))
+        a = min(a, len(logp) - 1)
+        return a, float(logp[a])
+
+    def value(self, x: np.ndarray) -> float:
+        return float((self.w["value_net.weight"] @ self._mlp("value_net", x) + self.w["value_net.bias"])[0])
+
+
+##ACTOR
+
+def run_actor(worker_id: int, ring_handle: tuple, board_handle: tuple, bank: str, env_kwargs: Dict[str, Any],
+              seed: int, gamma: float, stop) -> None:
+    import torch
+    from .envs.fraction_tutor_env import FractionTutorEnv
+
+    torch.set_num_threads(1)
+    ring, board = TrajectoryRing.attach(ring_handle), ParamBoard.attach(board_handle)
+    try:
+        env = FractionTutorEnv(bank_path=bank, seed=seed, **env_kwargs)
+        actor = NumpyActor(make_policy(env.observation_space, env.action_space), seed=seed)
+        version, mean, var = -1, None, None
+        while version < 0 and not stop.is_set(): #espera o learner publicar a primeira versao
+            got = board.fetch(version)
+            if got is None:
+                time.sleep(0.001)
+                continue
+            version, flat, mean, var = got
+            actor.load(flat)
+
+        T = ring.spec[1]
+        obs, _ = env.reset(seed=seed)
+        ep_ret = 0.0
+        while not stop.is_set():
+            got = board.fetch(version) #pesos novos só entre trechos: um trecho = uma versao
+            if got is not None:
+                version, flat, mean, var = got
+                actor.load(flat)
+
+            slot = ring.free_slot()
+            while slot is None: #learner atrasado: espera (e conta a espera)
+                if stop.is_set():
+                    return
+                ring.ctrl[2] += 1
+                time.sleep(0.001)
+                slot = ring.free_slot()
+
+            ret_sum, n_eps = 0.0, 0
+            for t in range(T):
+                ring.obs[slot, t] = obs
+                a, logp = actor.act(normalize(obs, mean, var))
+                obs, r, terminated, truncated, _ = env.step(a)
+                ep_ret += float(r)
+                if truncated and not terminated:
+                    #fim por limite de passos: bootstrap com V(obs final), igual ao SB3
+                    r = float(r) + gamma * actor.value(normalize(obs, mean, var))
+                ring.actions[slot, t] = a
+                ring.rewards[slot, t] = r
+                ring.logp[slot, t] = logp
+                done = terminated or truncated
+                ring.dones[slot, t] = float(done)
+                if done:
+                    ret_sum += ep_ret
+                    n_eps += 1
+                    ep_ret = 0.0
+                    obs, _ = env.reset()
+            ring.obs[slot, T] = obs
+            ring.version[slot] = version
+            ring.ep_stats[slot] = (ret_sum, n_eps)
+            ring.commit()
+    finally:
+        ring.close()
+        board.close()
+
+
+##LEARNER
+
+#alvos do V-trace (Espeholt et al., 2018) pra um lote (B, T); values = V(x_0..x_{T-1}), bootstrap = V(x_T)
+def vtrace(behaviour_logp, target_logp, rewards, values, bootstrap, dones, gamma: float,
+           rho_bar: float = 1.0, c_bar: float = 1.0):
+    import torch
+    rho = torch.exp(target_logp - behaviour_logp)
+    rhos = torch.clamp(rho, max=rho_bar)
+    cs = torch.clamp(rho, max=c_bar)
+    disc = gamma * (1.0 - dones)
+    next_values = torch.cat([values[:, 1:], bootstrap[:, None]], dim=1)
+    deltas = rhos * (rewards + disc * next_values - values)
+    acc = torch.zeros_like(bootstrap)
+    vs_minus_v = torch.empty_like(values)
+    for t in range(values.shape[1] - 1, -1, -1):
+        acc = deltas[:, t] + disc[:, t] * cs[:, t] * acc
+        vs_minus_v[:, t] = acc
+    vs = vs_minus_v + values
+    next_vs = torch.cat([vs[:, 1:], bootstrap[:, None]], dim=1)
+    pg_adv = rhos * (rewards + disc * next_vs - values)
+    return vs, pg_adv
+
+
+@dataclass
+class LearnerConfig:
+    timesteps: int = 200_000
+    n_workers: int = 4
+    unroll: int = 32
+    batch_trajs: int = 16 #trechos por update
+    ring_slots: int = 8 #trechos em voo por actor
+    max_lag: int = 20 #trecho mais velho que isso (em updates) é descartado
+    gamma: float = 0.99
+    learning_rate: float = 5e-4
+    ent_coef: float = 0.01
+    vf_coef: float = 0.5
+    max_grad_norm: float = 0.5
+    rho_bar: float = 1.0
+    c_bar: float = 1.0
+    seed: int = 0
+    log_every: int = 20
+
+
+@dataclass
+class LearnerStats:
+    updates: int = 0
+    env_steps: int = 0
+    dropped: int = 0
+    seconds: float = 0.0
+    lags: List[int] = field(default_factory=list)
+    actor_waits: int = 0
+    learner_waits: float = 0.0 #segundos esperando trecho (actors nao dao conta)
+    episode_returns: List[float] = field(default_factory=list) #media por janela de log
+
+    def summary(self) -> Dict[str, Any]:
+        lags = np.asarray(self.lags or [0])
+        return {"updates": self.updates, "env_steps": self.env_steps, "dropped_trajectories": self.dropped,
+                "seconds": round(self.seconds, 2), "steps_per_sec": round(self.env_steps / max(self.seconds, 1e-9), 1),
+                "lag_mean": float(lags.mean()), "lag_p95": float(np.percentile(lags, 95)), "lag_max": int(lags.max()),
+                "actor_waits": self.actor_waits, "learner_wait_sec": round(self.learner_waits, 2)}
+
+
+def train(bank: str, env_kwargs: Dict[str, Any], cfg: LearnerConfig, log=print):
+    import torch
+    from stable_baselines3.common.running_mean_std import RunningMeanStd
+    from .envs.fraction_tutor_env import FractionTutorEnv
+
+    torch.manual_seed(cfg.seed)
+    probe = FractionTutorEnv(bank_path=bank, seed=cfg.seed, **env_kwargs)
+    obs_space, act_space = probe.observation_space, probe.action_space
+    D = obs_space.shape[0]
+    policy = make_policy(obs_space, act_space, lr=cfg.learning_rate)
+    policy.set_training_mode(True)
+    obs_rms = RunningMeanStd(shape=(D,))
+
+    board = ParamBoard(get_flat(policy).size, D)
+    rings = [TrajectoryRing(cfg.ring_slots, cfg.unroll, D) for _ in range(cfg.n_workers)]
+    board.publish(get_flat(policy), obs_rms.mean, obs_rms.var, 0)
+
+    ctx = mp.get_context("spawn") #torch + fork nao combinam bem
+    stop = ctx.Event()
+    procs = [ctx.Process(target=run_actor, daemon=True,
+                         args=(i, rings[i].handle, board.handle, bank, env_kwargs, cfg.seed + 1000 * (i + 1), cfg.gamma, stop))
+             for i in range(cfg.n_workers)]
+    for p in procs:
+        p.start()
+
+    B, T = cfg.batch_trajs, cfg.unroll
+    obs_b = np.empty((B, T + 1, D), dtype=np.float32)
+    act_b = np.empty((B, T), dtype=np.int64)
+    rew_b = np.empty((B, T), dtype=np.float32)
+    done_b = np.empty((B, T), dtype=np.float32)
+    logp_b = np.empty((B, T), dtype=np.float32)
+    stats = LearnerStats()
+    win_ret, win_eps, win_lag = 0.0, 0, []
+    t_start = time.perf_counter()
+    rr = 0 #proximo ring a olhar (round-robin: nenhum actor fica esquecido)
+    try:
+        while stats.env_steps < cfg.timesteps:
+            #junta B trechos dos rings (copia e libera o slot na hora: o actor ja pode reescrever)
+            n = 0
+            t_wait = time.perf_counter()
+            while n < B:
+                got = False
+                for _ in range(len(rings)):
+                    ring = rings[rr]
+                    rr = (rr + 1) % len(rings)
+                    if not ring.ready():
+                        continue
+                    s = ring.peek()
+                    lag = stats.updates - int(ring.version[s])
+                    if lag > cfg.max_lag:
+                        stats.dropped += 1
+                    else:
+                        obs_b[n], act_b[n], rew_b[n] = ring.obs[s], ring.actions[s], ring.rewards[s]
+                        done_b[n], logp_b[n] = ring.dones[s], ring.logp[s]
+                        win_ret += float(ring.ep_stats[s, 0])
+                        win_eps += int(ring.ep_stats[s, 1])
+                        stats.lags.append(lag)
+                        win_lag.append(lag)
+                        n += 1
+                    ring.release()
+                    got = True
+                    if n == B:
+                        break
+                if not got:
+                    if any(not p.is_alive() for p in procs):
+                        raise RuntimeError("An actor process died.")
+                    time.sleep(0.0005)
+            stats.learner_waits += time.perf_counter() - t_wait
+
+            #normalizacao de obs: estatisticas do learner (os actors recebem junto com os pesos)
+            obs_rms.update(obs_b[:, :T].reshape(-1, D))
+            obs_n = torch.as_tensor(normalize(obs_b, obs_rms.mean, obs_rms.var))
+            values, target_logp, entropy = policy.evaluate_actions(obs_n[:, :T].reshape(-1, D),
+                                                                   torch.as_tensor(act_b).reshape(-1))
+            values, target_logp, entropy = (x.reshape(B, T) for x in (values, target_logp, entropy))
+            with torch.no_grad():
+                bootstrap = policy.predict_values(obs_n[:, T]).reshape(B)
+
+            with torch.no_grad():
+                vs, pg_adv = vtrace(torch.as_tensor(logp_b), target_logp, torch.as_tensor(rew_b), values,
+                                    bootstrap, torch.as_tensor(done_b), cfg.gamma, cfg.rho_bar, cfg.c_bar)
+            pg_loss = -(pg_adv * target_logp).mean()
+            vf_loss = 0.5 * ((vs - values) ** 2).mean()
+            loss = pg_loss + cfg.vf_coef * vf_loss - cfg.ent_coef * entropy.mean()
+            policy.optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(policy.parameters(), cfg.max_grad_norm)
+            policy.optimizer.step()
+
+            stats.updates += 1
+            stats.env_steps += B * T
+            board.publish(get_flat(policy), obs_rms.mean, obs_rms.var, stats.updates)
+
+            if stats.updates % cfg.log_every == 0:
+                stats.seconds = time.perf_counter() - t_start
+                stats.actor_waits = int(sum(r.ctrl[2] for r in rings))
+                ep = win_ret / win_eps if win_eps else float("nan")
+                stats.episode_returns.append(ep)
+                log(f"update {stats.updates:5d} | steps {stats.env_steps:8d} | "
+                    f"{stats.env_steps / stats.seconds:8.0f} steps/s | ep return {ep:7.3f} | "
+                    f"lag mean {np.mean(win_lag):.1f} max {max(win_lag)} | dropped {stats.dropped} | "
+                    f"actor waits {stats.actor_waits} | vf {vf_loss.item():.3f}")
+                win_ret, win_eps, win_lag = 0.0, 0, []
+    finally:
+        stop.set()
+        for p in procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        stats.seconds = time.perf_counter() - t_start
+        stats.actor_waits = int(sum(r.ctrl[2] for r in rings))
+        for r in rings:
+            r.close()
+        board.close()
+
+    policy.set_training_mode(False)
+    return policy, obs_rms, stats
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .policies import N_ACTIONS
+from .student_sim import DEFAULT_CONFIG, SimConfig
+
+#bandit contextual linear (disjoint LinUCB / Thompson) sobre as 20 acoes (formato x dificuldade), com a
+#observacao de 6 campos + vies como contexto. Cada acao k tem uma regressao ridge A_k = lam*I + sum x x^T,
+#b_k = sum r x; a inversa de A_k é mantida com Sherman-Morrison (atualizacao de posto 1, O(d^2) por resposta),
+#entao aprender com uma resposta nova nao depende do tamanho do historico. Diferente do PPO, é miope:
+#a recompensa de cada decisao é a da resposta (acerto/erro e, se houver, a penalidade de abandono).
+
+ALGOS = ("ucb", "thompson")
+
+
+def features(obs: np.ndarray) -> np.ndarray:
+    obs = np.asarray(obs, dtype=np.float64)
+    if obs.ndim == 1:
+        obs = obs.reshape(1, -1)
+    return np.concatenate([obs, np.ones((len(obs), 1))], axis=1)
+
+
+#recompensa de um evento do log: "reward" se veio pronto, senao a mesma conta do env (acerto/erro - abandono)
+def event_reward(ev: Dict[str, Any], config: SimConfig | None = None) -> Optional[float]:
+    cfg = config or DEFAULT_CONFIG
+    if ev.get("reward") is not None:
+        return float(ev["reward"])
+    if ev.get("correct") is None:
+        return None
+    r = cfg.reward_correct if ev["correct"] else cfg.reward_wrong
+    return r - (cfg.abandon_penalty if ev.get("abandoned") else 0.0)
+
+
+class LinearBandit:
+    def __init__(self, obs_dim: int = 6, n_actions: int = N_ACTIONS, algo: str = "ucb", alpha: float = 1.0,
+                 v: float = 0.5, lam: float = 1.0, seed: int = 0):
+        if algo not in ALGOS:
+            raise ValueError(f"algo must be one of {ALGOS}, got {algo!r}")
+        self.obs_dim = obs_dim
+        self.n_actions = n_actions
+        self.algo = algo
+        self.alpha = alpha #peso do bonus de exploracao (UCB)
+        self.v = v #escala da posterior amostrada (Thompson)
+        self.lam = lam
+        self.explore = True #False = gulosa (avaliacao de um snapshot congelado)
+        self.rng = np.random.default_rng(seed)
+        d = obs_dim + 1
+        self.A = np.tile(np.eye(d) * lam, (n_actions, 1, 1))
+        self.b = np.zeros((n_actions, d))
+        self.counts = np.zeros(n_actions, dtype=np.int64)
+        self.A_inv = np.tile(np.eye(d) / lam, (n_actions, 1, 1))
+        self.theta = np.zeros((n_actions, d))
+        self._chol: Optional[np.ndarray] = None #cholesky de A_inv (Thompson), refeito só quando A muda
+
+    @property
+    def n_updates(self) -> int:
+        return int(self.counts.sum())
+
+    #lote (N, obs_dim) -> (N,) acoes
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        X = features(obs)
+        scores = X @ self.theta.T #(N, K)
+        if self.explore and self.algo == "ucb":
+            #x^T A_k^{-1} x pra todo par (linha, acao)
+            var = np.einsum("nd,kde,ne->nk", X, self.A_inv, X, optimize=True)
+            scores = scores + self.alpha * np.sqrt(np.maximum(var, 0.0))
+        elif self.explore:
+            if self._chol is None:
+                self._chol = np.linalg.cholesky(self.A_inv)
+            z = self.rng.standard_normal((len(X), self.n_actions, X.shape[1]))
+            #theta amostrado ~ N(theta_k, v^2 A_k^{-1}), um por linha e acao: so o produto com x importa
+            scores = scores + self.v * np.einsum("nd,kde,nke->nk", X, self._chol, z, optimize=True)
+        return np.argmax(scores, axis=1).astype(np.int64)
+
+    #uma resposta: atualizacao de posto 1 (Sherman-Morrison) de A_k^{-1} e theta_k
+    def update_one(self, obs: np.ndarray, action: int, reward: float) -> None:
+        x = features(obs)[0]
+        k = int(action)
+        P = self.A_inv[k]
+        u = P @ x
+        P -= np.outer(u, u) / (1.0 + x @ u)
+        self.A[k] += np.outer(x, x)
+        self.b[k] += reward * x
+        self.theta[k] = P @ self.b[k]
+        self.counts[k] += 1
+        self._chol = None
+
+    #lote de respostas: por acao, posto 1 se veio uma só; com varias, inverte A_k (d x d) direto, que sai
+    #mais barato que aplicar m atualizacoes de posto 1 (e nao acumula erro numerico)
+    def update(self, obs: np.ndarray, actions: np.ndarray, rewards: np.ndarray) -> None:
+        X = features(obs)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        if len(X) != len(actions) or len(X) != len(rewards):
+            raise ValueError(f"obs ({len(X)}), actions ({len(actions)}) and rewards ({len(rewards)}) must have the same length")
+        if len(actions) and (actions.min() < 0 or actions.max() >= self.n_actions):
+            raise ValueError(f"actions must be in [0, {self.n_actions})")
+        for k in np.unique(actions):
+            m = actions == k
+            if m.sum() == 1:
+                self.update_one(X[m, :-1][0], int(k), float(rewards[m][0]))
+                continue
+            Xk = X[m]
+            self.A[k] += Xk.T @ Xk
+            self.b[k] += Xk.T @ rewards[m]
+            self.A_inv[k] = np.linalg.inv(self.A[k])
+            self.theta[k] = self.A_inv[k] @ self.b[k]
+            self.counts[k] += int(m.sum())
+        self._chol = None
+
+    #eventos do log (dicts com obs, action e correct/reward) -> quantos foram usados
+    def update_events(self, events: Iterable[Dict[str, Any]], config: SimConfig | None = None) -> int:
+        obs, acts, rews = [], [], []
+        for ev in events:
+            r = event_reward(ev, config)
+            if r is None or ev.get("obs") is None or ev.get("action") is None:
+                continue
+            obs.append(ev["obs"])
+            acts.append(int(ev["action"]))
+            rews.append(r)
+        if obs:
+            self.update(np.asarray(obs, dtype=np.float64), np.asarray(acts), np.asarray(rews))
+        return len(obs)
+
+    def config(self) -> Dict[str, Any]:
+        return {"obs_dim": self.obs_dim, "n_actions": self.n_actions, "algo": self.algo,
+                "alpha": self.alpha, "v": self.v, "lam": self.lam}
+
+    #snapshot: estatisticas suficientes (A, b, contagens); A^{-1} e theta sao recalculados no load.
+    #escrito num arquivo temporario e renomeado: quem le o snapshot nunca ve um arquivo pela metade
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(f, A=self.A, b=self.b, counts=self.counts, config=json.dumps(self.config()))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path, seed: int = 0, **overrides) -> "LinearBandit":
+        with np.load(path) as z:
+            cfg = {**json.loads(str(z["config"])), **overrides}
+            bandit = cls(seed=seed, **cfg)
+            bandit.A[:] = z["A"]
+            bandit.b[:] = z["b"]
+            bandit.counts[:] = z["counts"]
+        bandit.A_inv = np.linalg.inv(bandit.A)
+        bandit.theta = np.einsum("kde,ke->kd", bandit.A_inv, bandit.b)
+        return bandit
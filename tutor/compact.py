@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .schema import Item
+
+#representacao compacta dos itens em memoria: o Item (pydantic) valida uma vez na leitura do banco e
+#depois vira um CompactItem (slots, imutavel). Skills/tags viram ids inteiros de um vocabulario
+#compartilhado, e tuplas repetidas (alternativas, listas de skills/tags) sao a mesma tupla em memoria.
+
+
+#vocabulario internado: string <-> id inteiro
+class Vocab:
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str) -> int:
+        i = self.ids.get(name)
+        if i is None:
+            i = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self.ids[name] = i
+        return i
+
+    def get(self, name: str) -> int:
+        return self.ids.get(name, -1)
+
+    def encode(self, names: Iterable[str]) -> Tuple[int, ...]:
+        return _shared(tuple(self.add(n) for n in names))
+
+    def decode(self, ids: Iterable[int]) -> Tuple[str, ...]:
+        return tuple(self.names[i] for i in ids)
+
+
+#vocabularios globais do processo (todos os bancos/topicos usam os mesmos ids)
+SKILLS = Vocab()
+TAGS = Vocab()
+TOPICS = Vocab() #topicos dos bancos multi-topico (tutor/question_bank.py, MultiTopicBank)
+
+#pool de tuplas: tuplas iguais viram o mesmo objeto (ex.: ("frações", "template") em quase todo item)
+_TUPLES: Dict[tuple, tuple] = {}
+
+def _shared(t: tuple) -> tuple:
+    return _TUPLES.setdefault(t, t)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactItem:
+    id: str
+    topic: str
+    format: str
+    difficulty: int
+    variation: int
+    statement: str
+    options: Tuple[str, ...]
+    correct_index: int
+    solution: str
+    skill_ids: Tuple[int, ...]
+    tag_ids: Tuple[int, ...]
+    reading_load: Optional[float]
+    answer: Optional[str] = None
+
+    #mesmos nomes de campo do Item, pra quem só le (env, relatorio) nao perceber a diferenca
+    @property
+    def skills(self) -> Tuple[str, ...]:
+        return SKILLS.decode(self.skill_ids)
+
+    @property
+    def tags(self) -> Tuple[str, ...]:
+        return TAGS.decode(self.tag_ids)
+
+    @classmethod
+    def from_item(cls, it: "Item") -> "CompactItem":
+        return cls(
+            id=it.id,
+            topic=sys.intern(it.topic),
+            format=sys.intern(it.format),
+            difficulty=it.difficulty,
+            variation=it.variation,
+            statement=it.statement,
+            options=_shared(tuple(sys.intern(o) for o in it.options)),
+            correct_index=it.correct_index,
+            solution=it.solution,
+            skill_ids=SKILLS.encode(it.skills),
+            tag_ids=TAGS.encode(it.tags),
+            reading_load=it.reading_load,
+            answer=it.answer,
+        )
+
+    #volta pro modelo pydantic (exportar/validar de novo)
+    def to_item(self) -> "Item":
+        from .schema import Item
+
+        return Item(
+            id=self.id, topic=self.topic, format=self.format, difficulty=self.difficulty,
+            variation=self.variation, statement=self.statement, options=list(self.options),
+            correct_index=self.correct_index, solution=self.solution,
+            skills=list(self.skills), tags=list(self.tags), reading_load=self.reading_load, answer=self.answer,
+        )
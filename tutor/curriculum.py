@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+from typing import Sequence, Tuple
+
+import numpy as np
+
+#curriculo adaptativo: divido o espaco de alunos (theta x reading_sensitivity) em celulas e combino com
+#alguns tamanhos de sessao (max_steps). Cada episodio sorteia uma celula com peso maior onde a politica
+#vai pior (mais abandono / retorno por passo abaixo da melhor celula), pra nao gastar amostras com aluno facil.
+class CurriculumScheduler:
+    def __init__(
+        self,
+        theta_edges: Sequence[float] = (-1.5, -0.75, 0.0, 0.75, 1.5), #mesmos limites do StudentSim.sample_student
+        rs_edges: Sequence[float] = (0.0, 1.0, 2.0),
+        max_steps_options: Sequence[int] = (10, 20, 30),
+        ema: float = 0.05, #quanto cada episodio novo pesa nas estatisticas
+        temperature: float = 0.3,
+        explore: float = 0.2, #fracao de sorteio uniforme (pra nenhuma celula sumir do treino)
+        seed: int = 0,
+    ):
+        self.theta_edges = np.asarray(theta_edges, dtype=float)
+        self.rs_edges = np.asarray(rs_edges, dtype=float)
+        self.max_steps_options = list(max_steps_options)
+        self.ema = ema
+        self.temperature = temperature
+        self.explore = explore
+        self.rng = random.Random(seed)
+
+        self.shape = (len(self.theta_edges) - 1, len(self.rs_edges) - 1, len(self.max_steps_options))
+        n = int(np.prod(self.shape))
+        #estatisticas incrementais por celula (atualizadas a cada fim de episodio, O(1))
+        self.count = np.zeros(n, dtype=np.int64)
+        self.abandon_ema = np.zeros(n, dtype=float)
+        self.ret_ema = np.zeros(n, dtype=float) #retorno por passo (pra comparar sessoes de tamanhos diferentes)
+        self._weights = np.full(n, 1.0 / n)
+
+    @property
+    def n_cells(self) -> int:
+        return self.count.size
+
+    def cell_bounds(self, cell: int) -> Tuple[Tuple[float, float], Tuple[float, float], int]:
+        i, j, k = np.unravel_index(cell, self.shape)
+        theta = (float(self.theta_edges[i]), float(self.theta_edges[i + 1]))
+        rs = (float(self.rs_edges[j]), float(self.rs_edges[j + 1]))
+        return theta, rs, int(self.max_steps_options[k])
+
+    #dificuldade de cada celula: taxa de abandono + quanto o retorno por passo fica atras da melhor celula
+    def scores(self) -> np.ndarray:
+        seen = self.count > 0
+        if not seen.any():
+            return np.ones(self.n_cells)
+        regret = self.ret_ema[seen].max() - self.ret_ema
+        s = self.abandon_ema + regret
+        s[~seen] = s[seen].max() + 1.0 #celula nunca vista vai pra frente da fila
+        return s
+
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    def _refresh(self) -> None:
+        s = self.scores() / max(self.temperature, 1e-6)
+        p = np.exp(s - s.max())
+        p /= p.sum()
+        self._weights = (1.0 - self.explore) * p + self.explore / self.n_cells
+
+    #sorteia a celula do proximo episodio: (celula, faixa de theta, faixa de reading_sensitivity, max_steps)
+    def sample(self) -> Tuple[int, Tuple[float, float], Tuple[float, float], int]:
+        cell = self.rng.choices(range(self.n_cells), weights=self._weights)[0]
+        theta, rs, max_steps = self.cell_bounds(cell)
+        return cell, theta, rs, max_steps
+
+    def update(self, cell: int, ep_return: float, abandoned: bool, steps: int) -> None:
+        a = 1.0 if self.count[cell] == 0 else self.ema #primeira visita substitui o zero inicial
+        self.count[cell] += 1
+        self.abandon_ema[cell] += a * ((1.0 if abandoned else 0.0) - self.abandon_ema[cell])
+        self.ret_ema[cell] += a * (ep_return / max(1, steps) - self.ret_ema[cell])
+        self._refresh()
+
+    def summary(self) -> list[dict]:
+        out = []
+        for c in range(self.n_cells):
+            theta, rs, max_steps = self.cell_bounds(c)
+            out.append({
+                "theta": theta,
+                "reading_sensitivity": rs,
+                "max_steps": max_steps,
+                "episodes": int(self.count[c]),
+                "abandon_rate": float(self.abandon_ema[c]),
+                "return_per_step": float(self.ret_ema[c]),
+                "weight": float(self._weights[c]),
+            })
+        return out
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+#deteccao de itens repetidos/quase repetidos no banco, em dois niveis:
+#  1) chave matematica canonica: mesmo texto depois de normalizar e reduzir as fracoes (1/2 + 1/3 == 2/4 + 1/3),
+#     com os operandos de + e × em ordem fixa (1/2 + 1/3 == 1/3 + 1/2). Exato, O(n) com dicionario.
+#  2) MinHash + LSH sobre shingles de palavras com os numeros mascarados, dentro de cada grupo com o mesmo
+#     multiconjunto de numeros: pega o mesmo exercicio com outra redacao (ex.: "Calcule: 1/2 + 1/3." e a
+#     versao de multipla escolha), sem juntar exercicios do mesmo template com numeros diferentes.
+#os dois viram arestas de um union-find e cada componente é um "cluster" de conteudo equivalente.
+
+_FRAC = re.compile(r"(\d+)\s*/\s*(\d+)")
+_COMMUTATIVE = re.compile(r"(\d+/\d+) ([+×]) (\d+/\d+)")
+_WS = re.compile(r"\s+")
+_NUM = re.compile(r"\d+/\d+|\d+|[+\-×÷]")
+_MERSENNE = (1 << 61) - 1
+
+
+def normalize_statement(text: str) -> str:
+    t = unicodedata.normalize("NFKC", text).lower().replace("−", "-")
+    t = _WS.sub(" ", t).strip()
+
+    def _reduce(m: re.Match) -> str:
+        n, d = int(m.group(1)), int(m.group(2))
+        if d == 0:
+            return m.group(0)
+        f = Fraction(n, d)
+        return f"{f.numerator}/{f.denominator}"
+
+    return _FRAC.sub(_reduce, t)
+
+
+def canonical_key(text: str) -> str:
+    t = normalize_statement(text)
+
+    def _order(m: re.Match) -> str:
+        a, op, b = m.group(1), m.group(2), m.group(3)
+        if Fraction(b) < Fraction(a):
+            a, b = b, a
+        return f"{a} {op} {b}"
+
+    return _COMMUTATIVE.sub(_order, t)
+
+
+#numeros (fracoes ja reduzidas) e operadores do enunciado, ordenados: o "conteudo matematico" independente da redacao
+def numbers_key(text: str) -> str:
+    return " ".join(sorted(_NUM.findall(normalize_statement(text))))
+
+
+def shingles(text: str, k: int = 3) -> np.ndarray:
+    toks = _NUM.sub("#", normalize_statement(text)).split()
+    if len(toks) < k:
+        toks = toks + [""] * (k - len(toks))
+    grams = {" ".join(toks[i:i + k]) for i in range(len(toks) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+#assinaturas MinHash (n_itens, num_perm) com hashes universais (a*x + b) mod primo de Mersenne
+def minhash_signatures(texts: Sequence[str], num_perm: int = 64, k: int = 3, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    #a, b < 2^31 e x < 2^32 (crc32): a*x + b cabe em uint64 sem estourar
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+    sig = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, t in enumerate(texts):
+        x = shingles(t, k)[:, None]
+        sig[i] = ((a * x + b) % _MERSENNE).min(axis=0)
+    return sig
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+#cluster_id por item (ids compactos 0..n_clusters-1, na ordem de primeira aparicao)
+def cluster_statements(texts: Sequence[str], threshold: float = 0.5, num_perm: int = 64,
+                       bands: int = 16, use_minhash: bool = True) -> np.ndarray:
+    n = len(texts)
+    uf = _UnionFind(n)
+
+    first: Dict[str, int] = {}
+    for i, t in enumerate(texts):
+        j = first.setdefault(canonical_key(t), i)
+        if j != i:
+            uf.union(i, j)
+
+    if use_minhash and n > 1:
+        sig = minhash_signatures(texts, num_perm=num_perm)
+        nums = [numbers_key(t).encode("utf-8") for t in texts]
+        rows = num_perm // bands
+        for bnd in range(bands):
+            buckets: Dict[bytes, List[int]] = {}
+            block = np.ascontiguousarray(sig[:, bnd * rows:(bnd + 1) * rows])
+            for i in range(n):
+                #o balde inclui os numeros: só compara redacoes diferentes do MESMO conteudo
+                buckets.setdefault(nums[i] + b"|" + block[i].tobytes(), []).append(i)
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                #candidatos do LSH: confirmo pela similaridade estimada (fracao de minhashes iguais).
+                #balde pequeno compara todos os pares; balde enorme só contra o primeiro (evita O(m^2))
+                heads = members if len(members) <= 64 else members[:1]
+                for hi, h in enumerate(heads):
+                    for j in members[hi + 1:]:
+                        if uf.find(j) != uf.find(h) and float(np.mean(sig[h] == sig[j])) >= threshold:
+                            uf.union(h, j)
+
+    roots = [uf.find(i) for i in range(n)]
+    remap: Dict[int, int] = {}
+    return np.asarray([remap.setdefault(r, len(remap)) for r in roots], dtype=np.int32)
+
+
+##clusters salvos ao lado do banco (<banco>.clusters.npz), com uma assinatura dos itens pra nao usar arquivo velho
+
+def clusters_path(bank_path: str | Path) -> Path:
+    p = Path(bank_path)
+    return p.with_name(p.name + ".clusters.npz")
+
+
+def items_signature(items) -> int:
+    h = 0
+    for it in items:
+        h = zlib.crc32(it.id.encode("utf-8"), h)
+        h = zlib.crc32(it.statement.encode("utf-8"), h)
+    return h
+
+
+def save_clusters(bank_path: str | Path, items, groups: np.ndarray) -> Path:
+    out = clusters_path(bank_path)
+    np.savez_compressed(out, groups=groups.astype(np.int32), signature=np.int64(items_signature(items)))
+    return out
+
+
+def load_clusters(bank_path: str | Path, items) -> Optional[np.ndarray]:
+    p = clusters_path(bank_path)
+    if not p.exists():
+        return None
+    with np.load(p) as z:
+        groups, sig = z["groups"], int(z["signature"])
+    if len(groups) != len(items) or sig != items_signature(items):
+        return None
+    return groups
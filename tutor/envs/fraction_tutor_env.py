@@ -1,12 +1,19 @@
 from __future__ import annotations
 import numpy as np
 import gymnasium as gym
+from dataclasses import replace
+from typing import Sequence
 from gymnasium import spaces #espaços de ação (aqui serao acoes do tipo discretas)
-from ..question_bank import QuestionBank #banco de questoes
-from ..student_sim import StudentSim #aluno simulado (parametros+probabilidade de erro+engajamento)
+from ..question_bank import MultiTopicBank, QuestionBank, is_manifest #banco de questoes (um topico ou varios shards)
+from ..student_sim import DEFAULT_CONFIG, SimConfig, StudentSim #aluno simulado (parametros+probabilidade de erro+engajamento)
+from ..curriculum import CurriculumScheduler #curriculo adaptativo (opcional, so no treino)
+from ..knowledge import GridBelief #knowledge tracing bayesiano (opcional)
 
 FORMATS = ["short_text", "multiple_choice", "visual", "scaffold"] #formatos de questao que estou utilizando
 DIFFICULTIES = [1, 2, 3, 4, 5] #nivel de dificuldade que posso ter
+N_CELLS = len(FORMATS) * len(DIFFICULTIES)
+TOPIC_SPREAD = 0.5 #desvio da habilidade de cada topico em torno do theta geral do aluno
+HIST_FEATURES = 4 #por resposta no historico: [valido, acertou, dificuldade_norm, carga]
 
 #mapeando a acao a ser tomada pelo agente
 def action_to_cell(a: int) -> tuple[str, int]: #transformando a ação no par (formato, dificuldade)
@@ -20,17 +27,68 @@ class FractionTutorEnv(gym.Env):
     metadata = {"render_modes": []}
 
 #construtor do ambiente
-    def __init__(self, bank_path: str, max_steps: int = 20, seed: int = 0): #20 questoes por sessao
+    def __init__(self, bank_path: str, max_steps: int = 20, seed: int = 0,
+                 curriculum: CurriculumScheduler | None = None, belief: str = "heuristic",
+                 config: SimConfig | None = None, topics: Sequence[str] | None = None,
+                 history: int = 0, time_feature: bool = False): #20 questoes por sessao
         super().__init__() #inicializando o gym.Env
+        #constantes do simulador e da recompensa (default = valores originais)
+        self.cfg = config or DEFAULT_CONFIG
         self.max_steps = max_steps
-        self.bank = QuestionBank(bank_path, seed=seed)
-        self.sim = StudentSim(seed=seed) #simulador do aluno
+        #se tiver curriculo, cada reset sorteia a faixa do aluno e o tamanho da sessao
+        self.curriculum = curriculum
+        self.cur_cell = -1
+        self.ep_return = 0.0
+        #como o tutor estima a habilidade: "heuristic" (ganho fixo por acerto/erro) ou "bayes" (posterior em grid)
+        if belief not in ("heuristic", "bayes"):
+            raise ValueError(f"belief must be 'heuristic' or 'bayes', got {belief!r}")
+        self.belief = belief
+        #multi-topico: bank_path é um manifesto (ver MultiTopicBank) e a acao ganha a dimensao do topico:
+        #acao = topico * 20 + formato * 5 + (dificuldade - 1). Só os shards dos topicos usados sao carregados.
+        if is_manifest(bank_path):
+            self.bank = MultiTopicBank(bank_path, seed=seed, no_repeat=True, topics=topics)
+            self.topics = self.bank.topics
+        else:
+            if topics is not None:
+                raise ValueError("topics requires a multi-topic manifest (.json) as bank_path")
+            self.bank = QuestionBank(bank_path, seed=seed, no_repeat=True) #sem repetir conteudo dentro da sessao
+            self.topics = None
+        n_topics = len(self.topics) if self.topics else 1
+        self.cur_topic = 0 #topico da ultima questao
+        #crenca por topico (uma linha do GridBelief por topico); com um topico só fica igual a antes
+        self.posterior = GridBelief(n_topics, config=self.cfg) if belief == "bayes" else None
+        self.topic_est = np.zeros(n_topics)
+        self.topic_unc = np.full(n_topics, 2.0)
+        self.sim = StudentSim(seed=seed, config=self.cfg) #simulador do aluno
 
 #definindo os limites do vetor de observação
-        self.action_space = spaces.Discrete(len(FORMATS) * len(DIFFICULTIES))
+        #multi-topico: obs = [6 campos do topico da ultima questao] + one-hot do topico + estimativa de cada topico
+        low = [-3.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+        high = [3.0, 5.0, 1.0, 1.0, 1.0, 1.0]
+        if self.topics:
+            low += [0.0] * n_topics + [-3.0] * n_topics
+            high += [1.0] * n_topics + [3.0] * n_topics
+        #historico: as ultimas `history` respostas (da mais recente pra mais antiga), HIST_FEATURES campos cada
+        if history < 0:
+            raise ValueError(f"history must be >= 0, got {history}")
+        self.history = history
+        self._n_base = len(low)
+        low += [0.0] * (history * HIST_FEATURES)
+        high += [1.0] * (history * HIST_FEATURES)
+        #fracao da sessao que ainda falta (1 -> 0) no fim da obs: com o curriculo o max_steps muda a cada
+        #episodio, e sem isso o PPO nao sabe em qual horizonte está (o valor fica misturado entre tamanhos)
+        self.time_feature = time_feature
+        if time_feature:
+            low.append(0.0)
+            high.append(1.0)
+        #buffer circular de tamanho fixo: cada passo escreve uma linha no lugar (sem concatenar/realocar)
+        self._hist = np.zeros((history, HIST_FEATURES), dtype=np.float32)
+        self._hist_pos = 0 #onde entra a proxima resposta
+        self._obs_buf = np.zeros(len(low), dtype=np.float32)
+        self.action_space = spaces.Discrete(n_topics * N_CELLS)
         self.observation_space = spaces.Box(
-            low=np.array([-3.0, 0.0, 0.0, 0.0, 0.0, 0.0], dtype=np.float32),
-            high=np.array([ 3.0, 5.0, 1.0, 1.0, 1.0, 1.0], dtype=np.float32),
+            low=np.array(low, dtype=np.float32),
+            high=np.array(high, dtype=np.float32),
             dtype=np.float32,
         )
 
@@ -43,8 +101,9 @@ class FractionTutorEnv(gym.Env):
         self.last_d = 1 #dificuldade da ultima questao respondida
         self.last_load = 0.2 #carga de leitura do ultimo item
 
-        #guardando o "aluno"
+        #guardando o "aluno" (e a versao dele em cada topico, com theta deslocado)
         self.student = None
+        self.topic_students = []
 
         #estimativa atual da habilidade do aluno e a incerteza dessa estimativa (diminuindo conforme tutor aprende sobre o aluno)
         self.skill_est = 0.0
@@ -62,25 +121,63 @@ class FractionTutorEnv(gym.Env):
         self.last_d = 1
         self.last_load = 0.2
 
-        self.student = self.sim.sample_student() #criando um novo aluno
+        self.ep_return = 0.0
+        self.bank.start_session()
+        if self.curriculum is not None:
+            self.cur_cell, theta_rng, rs_rng, self.max_steps = self.curriculum.sample()
+            self.student = self.sim.sample_student(theta_rng, rs_rng)
+        else:
+            self.student = self.sim.sample_student() #criando um novo aluno
+        if self.topics:
+            self.topic_students = [replace(self.student, theta=self.student.theta + self.sim.rng.gauss(0.0, TOPIC_SPREAD))
+                                   for _ in self.topics]
+        else:
+            self.topic_students = [self.student]
+        self.cur_topic = 0
+        self._hist[:] = 0.0
+        self._hist_pos = 0
         self.skill_est = 0.0 #reiniciando o tutor
         self.skill_unc = 2.0 #começo do 2 pq no começo o tutor nao sabe mto sobre o aluno (incerteza alta)
+        if self.posterior is not None:
+            self.posterior.reset()
+            self.skill_est, self.skill_unc = self.posterior.mean_std_one(0)
+        self.topic_est[:] = self.skill_est
+        self.topic_unc[:] = self.skill_unc
 
         return self._obs(), {}
 
 #montando nosso vetor obs
     def _obs(self):
-        return np.array([
-            self.skill_est,
-            self.skill_unc,
-            self.engagement,
-            self.last_correct,
-            (self.last_d - 1) / 4.0,
-            self.last_load,
-        ], dtype=np.float32)
+        o = self._obs_buf
+        o[0] = self.skill_est
+        o[1] = self.skill_unc
+        o[2] = self.engagement
+        o[3] = self.last_correct
+        o[4] = (self.last_d - 1) / 4.0
+        o[5] = self.last_load
+        if self.topics:
+            k = len(self.topics)
+            o[6:6 + k] = 0.0
+            o[6 + self.cur_topic] = 1.0
+            o[6 + k:6 + 2 * k] = self.topic_est
+        if self.history:
+            #desenrola o buffer circular direto no vetor de obs: [pos-1, pos-2, ..., 0, H-1, ..., pos]
+            h = o[self._n_base:self._n_base + self.history * HIST_FEATURES].reshape(self.history, HIST_FEATURES)
+            pos = self._hist_pos
+            h[:pos] = self._hist[:pos][::-1]
+            h[pos:] = self._hist[pos:][::-1]
+        if self.time_feature:
+            o[-1] = max(0.0, 1.0 - self.t / self.max_steps)
+        return o.copy() #copia: quem guarda a obs (rollout, buffer do PPO) nao ve o proximo passo
     
 #Atualização da crença do tutor: o ganho base cresce conforme a dificuldade, e acertar o item dificil aumenta mais a habilidade estimada
-    def _update_belief(self, d: int, fmt: str, correct: bool):
+    def _update_belief(self, d: int, fmt: str, correct: bool, engagement: float = 1.0, topic: int = 0):
+        if self.posterior is not None:
+            #bayes: mesma verossimilhanca do simulador, com o engajamento de antes da resposta
+            self.posterior.update_one(topic, d, FORMATS.index(fmt), engagement, correct)
+            est, self.skill_unc = self.posterior.mean_std_one(topic)
+            self.skill_est = min(3.0, max(-3.0, est))
+            return
         gain = 0.18 + 0.05 * (d - 1) #escolhi valores pequenos pra ficar mais estavel e diferenciar dificuldades
         if not correct:
             gain *= -0.12 #a penalização está leve, pra tentar deixar o sistema mais estavel
@@ -91,46 +188,74 @@ class FractionTutorEnv(gym.Env):
         self.skill_est = float(np.clip(self.skill_est + gain, -3.0, 3.0)) #atualizando a habilidade
         self.skill_unc = float(max(0.2, self.skill_unc * 0.96)) #aqui eu deixei um "piso" pra não zerar a habilidade
 
+#fim de episodio: alimento as estatisticas do curriculo (retorno, abandono, tamanho)
+    def _end_episode(self, abandoned: bool) -> None:
+        if self.curriculum is not None and self.cur_cell >= 0:
+            self.curriculum.update(self.cur_cell, self.ep_return, abandoned, max(1, self.t))
+            self.cur_cell = -1 #evita contar o mesmo episodio duas vezes
+
     def step(self, action: int):
-        fmt, d = action_to_cell(int(action))
+        topic, cell = divmod(int(action), N_CELLS)
+        fmt, d = action_to_cell(cell)
+        if self.topics:
+            name = self.topics[topic]
+            has_cell = self.bank.has_cell(name, fmt, d) #pelo indice do manifesto, sem carregar o shard
+        else:
+            has_cell = self.bank.has_cell(fmt, d)
 
         # estou forçando o banco de questoes a convergir: se não existe questão naquele formato/dificuldade, eu termino o ep
-        if not self.bank.has_cell(fmt, d):
+        if not has_cell:
             obs = self._obs()
-            return obs, -3.0, True, False, {"reason": "empty_cell", "cell": (fmt, d)}
+            self.ep_return += -self.cfg.empty_cell_penalty
+            self._end_episode(abandoned=False)
+            return obs, -self.cfg.empty_cell_penalty, True, False, {"reason": "empty_cell", "cell": (fmt, d)}
 
-        item = self.bank.sample(fmt, d) #pegando um item
+        item = self.bank.sample(name, fmt, d) if self.topics else self.bank.sample(fmt, d) #pegando um item
+        student = self.topic_students[topic]
+        if self.topics and topic != self.cur_topic: #troca de topico: a estimativa no obs passa a ser a desse topico
+            self.topic_est[self.cur_topic], self.topic_unc[self.cur_topic] = self.skill_est, self.skill_unc
+            self.skill_est, self.skill_unc = float(self.topic_est[topic]), float(self.topic_unc[topic])
+        self.cur_topic = topic
         load = float(item.reading_load or 0.4) #pegando a carga de leitura do item (se nao tiver nenhuma, eu deixei como 0.4)
 
 #PROBABILIDADE DE ACERTO DO ALUNO NESSE DADO ITEM
-        p = self.sim.p_correct(self.student, d, fmt, self.engagement)
+        p = self.sim.p_correct(student, d, fmt, self.engagement)
         correct = bool(self.rng.random() < p)
 
         # atualizando engajamento
-        self.engagement = self.sim.step_engagement(self.student, d, fmt, self.engagement, correct)
+        prev_eng = self.engagement
+        self.engagement = self.sim.step_engagement(student, d, fmt, self.engagement, correct)
 
         # atualizando o histórico
         self.last_correct = 1.0 if correct else 0.0
         self.last_d = d
         self.last_load = load
         prev_unc = self.skill_unc #guardando a incerteza
-        self._update_belief(d, fmt, correct)
+        self._update_belief(d, fmt, correct, prev_eng, topic)
+        self.topic_est[topic], self.topic_unc[topic] = self.skill_est, self.skill_unc
+        if self.history:
+            row = self._hist[self._hist_pos]
+            row[0], row[1], row[2], row[3] = 1.0, self.last_correct, (d - 1) / 4.0, load
+            self._hist_pos = (self._hist_pos + 1) % self.history
 
         # recompensa do aprendizado!!! aqui considerei a penalidade menor que o acerto
-        r = (1.0 if correct else -0.4)
+        r = (self.cfg.reward_correct if correct else self.cfg.reward_wrong)
 
         # penalizando o abandono da questao (engajamento muito baixo)
         done = False
         truncated = False
-        if self.engagement <= 0.12:
-            r -= 5.0
+        if self.engagement <= self.cfg.abandon_threshold:
+            r -= self.cfg.abandon_penalty
             done = True
 
-        r += 0.05 * (prev_unc - self.skill_unc)
+        r += self.cfg.unc_bonus * (prev_unc - self.skill_unc)
 
         self.t += 1
         if self.t >= self.max_steps:
             truncated = True
+        self.ep_return += float(r)
+        if done or truncated:
+            self._end_episode(abandoned=done)
 
         info = {
             "fmt": fmt,
@@ -140,4 +265,6 @@ class FractionTutorEnv(gym.Env):
             "engagement": float(self.engagement),
             "item_id": item.id,
         }
+        if self.topics:
+            info["topic"] = item.topic
         return self._obs(), float(r), done, truncated, info
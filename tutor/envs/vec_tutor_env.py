@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import numpy as np
+
+from ..knowledge import GridBelief
+from ..question_bank import QuestionBank
+from ..student_sim import DEFAULT_CONFIG, SimConfig
+from .fraction_tutor_env import DIFFICULTIES, FORMATS
+
+#versao vetorizada do FractionTutorEnv: N alunos simulados em arrays NumPy, um passo pra todos de uma vez.
+#mesma dinamica do env escalar (StudentSim + recompensa), feita pra avaliar politicas em lote (sweep.py).
+#diferencas: nao tem curriculo nem no_repeat (o item só entra pela carga de leitura) e o episodio nao
+#reinicia sozinho - quem terminou fica inativo ate o proximo reset.
+
+N_ACTIONS = len(FORMATS) * len(DIFFICULTIES)
+
+
+class VecFractionTutorEnv:
+    def __init__(self, bank_path: str, n_envs: int, max_steps: int = 20, seed: int = 0,
+                 belief: str = "heuristic", config: SimConfig | None = None):
+        if belief not in ("heuristic", "bayes"):
+            raise ValueError(f"belief must be 'heuristic' or 'bayes', got {belief!r}")
+        self.n = n_envs
+        self.max_steps = max_steps
+        self.belief = belief
+        self.cfg = config or DEFAULT_CONFIG
+        self.rng = np.random.default_rng(seed)
+
+        bank = QuestionBank(bank_path, seed=seed)
+        #pools de cada acao concatenados: item da acao a = pool[start[a] + floor(u * size[a])]
+        pools = [bank.cell_index.get(cell, np.zeros(0, dtype=np.int32))
+                 for cell in ((f, d) for f in FORMATS for d in DIFFICULTIES)]
+        self.pool_size = np.array([p.size for p in pools], dtype=np.int64)
+        self.pool_start = np.concatenate([[0], np.cumsum(self.pool_size)[:-1]]).astype(np.int64)
+        self.pool = np.concatenate(pools) if self.pool_size.sum() else np.zeros(0, dtype=np.int32)
+        self.item_load = np.array([float(it.reading_load or 0.4) for it in bank.items], dtype=np.float32)
+
+        #constantes do simulador por acao
+        self.act_fmt = np.repeat(np.arange(len(FORMATS)), len(DIFFICULTIES))
+        self.act_d = np.tile(np.asarray(DIFFICULTIES), len(FORMATS))
+        self.act_sim_load = np.array([self.cfg.load(f) for f in FORMATS], dtype=np.float64)[self.act_fmt]
+
+        self.posterior = GridBelief(n_envs, config=self.cfg) if belief == "bayes" else None
+        self.obs_buf = np.zeros((n_envs, 6), dtype=np.float32)
+        self.reset()
+
+    def reset(self, seed: int | None = None) -> np.ndarray:
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        n = self.n
+        #mesmo sorteio do StudentSim.sample_student (faixas default)
+        self.theta = self.rng.uniform(-1.5, 1.5, n)
+        self.rs = self.rng.uniform(0.0, 2.0, n)
+        self.noise = np.full(n, 0.15)
+
+        self.t = np.zeros(n, dtype=np.int64)
+        self.engagement = np.ones(n)
+        self.last_correct = np.zeros(n)
+        self.last_d = np.ones(n, dtype=np.int64)
+        self.last_load = np.full(n, 0.2)
+        self.active = np.ones(n, dtype=bool)
+        self.skill_est = np.zeros(n)
+        self.skill_unc = np.full(n, 2.0)
+        if self.posterior is not None:
+            self.posterior.reset()
+            self.skill_est, self.skill_unc = (a.astype(np.float64) for a in self.posterior.mean_std())
+        return self._obs()
+
+    def _obs(self) -> np.ndarray:
+        o = self.obs_buf
+        o[:, 0] = self.skill_est
+        o[:, 1] = self.skill_unc
+        o[:, 2] = self.engagement
+        o[:, 3] = self.last_correct
+        o[:, 4] = (self.last_d - 1) / 4.0
+        o[:, 5] = self.last_load
+        return o
+
+    #acoes (N,) -> obs (N, 6), recompensa, terminated, truncated, info; envs inativos ignoram a acao (r = 0)
+    def step(self, actions: np.ndarray):
+        cfg = self.cfg
+        n = self.n
+        actions = np.asarray(actions, dtype=np.int64)
+        idx = np.flatnonzero(self.active)
+        a = actions[idx]
+        r = np.zeros(n)
+        terminated = np.zeros(n, dtype=bool)
+        truncated = np.zeros(n, dtype=bool)
+        correct_out = np.zeros(n, dtype=bool)
+        p_out = np.zeros(n)
+        empty_out = np.zeros(n, dtype=bool)
+
+        #celula vazia: penaliza e encerra (igual ao env escalar, sem contar passo)
+        empty = self.pool_size[a] == 0
+        if empty.any():
+            e_idx = idx[empty]
+            r[e_idx] = -cfg.empty_cell_penalty
+            terminated[e_idx] = True
+            empty_out[e_idx] = True
+            self.active[e_idx] = False
+            idx, a = idx[~empty], a[~empty]
+
+        if idx.size:
+            k = idx.size
+            fmt_i, d = self.act_fmt[a], self.act_d[a]
+            sim_load = self.act_sim_load[a]
+            pos = self.pool[self.pool_start[a] + (self.rng.random(k) * self.pool_size[a]).astype(np.int64)]
+            load = self.item_load[pos].astype(np.float64)
+
+            #StudentSim.p_correct
+            eng = self.engagement[idx]
+            x = (self.theta[idx] - (d - 3) * cfg.difficulty_scale - sim_load * self.rs[idx]
+                 + cfg.engagement_weight * (eng - 0.5))
+            x += self.rng.normal(0.0, 1.0, k) * self.noise[idx]
+            p = 1.0 / (1.0 + np.exp(-x))
+            correct = self.rng.random(k) < p
+
+            #StudentSim.step_engagement
+            delta = -cfg.eng_load * sim_load - cfg.eng_difficulty * (d - 1)
+            delta += np.where(correct, cfg.eng_correct, -cfg.eng_wrong)
+            delta -= cfg.eng_reading * sim_load * self.rs[idx]
+            self.engagement[idx] = np.clip(eng + delta, 0.0, 1.0)
+
+            self.last_correct[idx] = correct
+            self.last_d[idx] = d
+            self.last_load[idx] = load
+            prev_unc = self.skill_unc[idx].copy()
+            if self.posterior is not None:
+                self.posterior.update(idx, d, fmt_i, eng, correct)
+                est, unc = self.posterior.mean_std(idx)
+                self.skill_est[idx] = np.clip(est, -3.0, 3.0)
+                self.skill_unc[idx] = unc
+            else: #mesma heuristica do FractionTutorEnv._update_belief
+                gain = (0.18 + 0.05 * (d - 1)) * np.where(correct, 1.0, -0.12) * (1.0 - 0.3 * load)
+                self.skill_est[idx] = np.clip(self.skill_est[idx] + gain, -3.0, 3.0)
+                self.skill_unc[idx] = np.maximum(0.2, self.skill_unc[idx] * 0.96)
+
+            rr = np.where(correct, cfg.reward_correct, cfg.reward_wrong)
+            done = self.engagement[idx] <= cfg.abandon_threshold
+            rr -= np.where(done, cfg.abandon_penalty, 0.0)
+            rr += cfg.unc_bonus * (prev_unc - self.skill_unc[idx])
+            r[idx] = rr
+
+            self.t[idx] += 1
+            trunc = self.t[idx] >= self.max_steps
+            terminated[idx] = done
+            truncated[idx] = trunc
+            self.active[idx[done | trunc]] = False
+            correct_out[idx] = correct
+            p_out[idx] = p
+
+        info: Dict[str, np.ndarray] = {"correct": correct_out, "p_correct": p_out, "empty_cell": empty_out}
+        return self._obs(), r, terminated, truncated, info
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+#correcao automatica das respostas dos alunos contra o campo `answer` dos itens do banco.
+#toda resposta vira um codigo (tipo, numerador, denominador) com a fracao ja reduzida:
+#  NUMBER   -> "3/4", "6/8", "1 1/2" (numero misto), "1,5", "0.75", "45%" (= 45/100), "-2/3"
+#  RELATION -> "maior"/"menor"/"igual" (ou >, <, =) dos itens visuais de comparacao; num = 1/-1/0
+#  CHOICE   -> "b", "letra b", "(b)" nos itens de multipla escolha; num = indice da alternativa
+#alem disso, nos itens de multipla escolha o texto da alternativa certa também vale ("Beto" quando as opcoes
+#sao nomes): comparado pelo texto normalizado, só pras respostas que nao bateram pelo codigo.
+#o gabarito de cada item é calculado uma vez (arrays indexados pela posicao do item) e a correcao de um lote
+#é: parse de cada texto DISTINTO do lote (com cache entre chamadas) + comparacao vetorizada com o gabarito.
+
+INVALID, NUMBER, RELATION, CHOICE = 0, 1, 2, 3
+_MAX = 1 << 62 #numerador/denominador precisam caber em int64
+
+_RELATIONS = {"maior": 1, ">": 1, "menor": -1, "<": -1, "igual": 0, "=": 0, "iguais": 0}
+_PREFIX = re.compile(r"^(?:resposta|resp|r)\s*[:=]\s*")
+_RELATION = re.compile(r"^(?:a primeira (?:fração )?)?(?:é\s+)?(?:(maior|menor|iguais|igual)\b|([<>=]))")
+_CHOICE = re.compile(r"^(?:letra|alternativa|opção|opcao)?\s*\(?([a-d])\)?[.)]?$")
+_MIXED = re.compile(r"^(-?)(\d+)\s+(\d+)\s*/\s*(\d+)$")
+_FRACTION = re.compile(r"^(-?\d+)\s*/\s*(-?\d+)$")
+_DECIMAL = re.compile(r"^(-?)(\d*)(?:[.,](\d+))?\s*(%)?$")
+
+Code = Tuple[int, int, int]
+_BAD: Code = (INVALID, 0, 1)
+
+
+def _norm(text: str) -> str:
+    t = unicodedata.normalize("NFKC", str(text)).lower().replace("−", "-").strip()
+    t = _PREFIX.sub("", t)
+    return t.rstrip(".!").strip()
+
+
+#texto de alternativa normalizado pra comparacao (caixa, espacos, prefixo "resposta:", ponto final)
+@lru_cache(maxsize=1 << 16)
+def option_text(text: str) -> str:
+    return " ".join(_norm(text).split())
+
+
+def _number(f: Fraction) -> Code:
+    if abs(f.numerator) >= _MAX or f.denominator >= _MAX:
+        return _BAD
+    return (NUMBER, f.numerator, f.denominator)
+
+
+#texto -> codigo; cacheado (logs e sessoes repetem muito as mesmas respostas)
+@lru_cache(maxsize=1 << 16)
+def parse_answer(text: str) -> Code:
+    t = _norm(text)
+    if not t:
+        return _BAD
+    m = _FRACTION.match(t)
+    if m:
+        n, d = int(m.group(1)), int(m.group(2))
+        return _number(Fraction(n, d)) if d != 0 else _BAD
+    m = _MIXED.match(t)
+    if m:
+        whole, n, d = int(m.group(2)), int(m.group(3)), int(m.group(4))
+        if d == 0:
+            return _BAD
+        f = whole + Fraction(n, d)
+        return _number(-f if m.group(1) else f)
+    m = _DECIMAL.match(t)
+    if m and (m.group(2) or m.group(3)):
+        digits = (m.group(2) or "0") + (m.group(3) or "")
+        f = Fraction(int(digits), 10 ** len(m.group(3) or ""))
+        if m.group(4):
+            f /= 100
+        return _number(-f if m.group(1) else f)
+    m = _RELATION.match(t)
+    if m:
+        return (RELATION, _RELATIONS[m.group(1) or m.group(2)], 1)
+    m = _CHOICE.match(t)
+    if m:
+        return (CHOICE, ord(m.group(1)) - ord("a"), 1)
+    return _BAD
+
+
+def canonical(text: Optional[str]) -> Optional[Fraction | str]:
+    if text is None:
+        return None
+    kind, n, d = parse_answer(text)
+    if kind == NUMBER:
+        return Fraction(n, d)
+    if kind == RELATION:
+        return {1: "maior", -1: "menor", 0: "igual"}[n]
+    return None
+
+
+#parse de um lote: cada texto distinto uma vez só -> arrays (kind, num, den) alinhados com `responses`
+def parse_batch(responses: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    uniq: Dict[str, int] = {}
+    inv = np.fromiter((uniq.setdefault(r, len(uniq)) for r in responses), dtype=np.int64, count=len(responses))
+    codes = np.array([parse_answer(u) for u in uniq] or [_BAD], dtype=np.int64).reshape(-1, 3)
+    return codes[inv, 0], codes[inv, 1], codes[inv, 2]
+
+
+class Grader:
+    def __init__(self, items: Iterable):
+        items = list(items)
+        self.row: Dict[str, int] = {it.id: i for i, it in enumerate(items)}
+        n = len(items)
+        #gabarito por item: valor da resposta (NUMBER/RELATION) + indice da alternativa certa (MCQ, senao -1)
+        self.key_kind = np.zeros(n, dtype=np.int64)
+        self.key_num = np.zeros(n, dtype=np.int64)
+        self.key_den = np.ones(n, dtype=np.int64)
+        self.key_choice = np.full(n, -1, dtype=np.int64)
+        #textos normalizados das alternativas de cada item + o da certa ("" = sem alternativa)
+        self.options: List[Tuple[str, ...]] = []
+        self.key_text = np.full(n, "", dtype=object)
+        for i, it in enumerate(items):
+            opts = tuple(option_text(o) for o in (it.options or ()))
+            self.options.append(opts)
+            if 0 <= it.correct_index < len(opts):
+                self.key_text[i] = opts[it.correct_index]
+            answer = it.answer
+            if answer is None and it.correct_index >= 0:
+                answer = it.options[it.correct_index]
+            if answer is not None:
+                kind, num, den = parse_answer(answer)
+                if kind in (NUMBER, RELATION):
+                    self.key_kind[i], self.key_num[i], self.key_den[i] = kind, num, den
+            self.key_choice[i] = it.correct_index
+
+    @classmethod
+    def from_bank(cls, bank) -> "Grader":
+        return cls(bank.items)
+
+    #itens que dá pra corrigir (tem resposta numerica/relacao ou alternativa certa)
+    def gradable(self, item_ids: Sequence[str]) -> np.ndarray:
+        rows = self.rows(item_ids)
+        ok = rows >= 0
+        r = rows[ok]
+        out = np.zeros(len(rows), dtype=bool)
+        out[ok] = (self.key_kind[r] != INVALID) | (self.key_choice[r] >= 0)
+        return out
+
+    def rows(self, item_ids: Sequence[str]) -> np.ndarray:
+        get = self.row.get
+        return np.fromiter((get(i, -1) for i in item_ids), dtype=np.int64, count=len(item_ids))
+
+    #corrige um lote (item_ids[i], responses[i]) -> acertou (bool); item desconhecido ou sem gabarito -> False
+    def grade(self, item_ids: Sequence[str], responses: Sequence[str]) -> np.ndarray:
+        if len(item_ids) != len(responses):
+            raise ValueError(f"item_ids ({len(item_ids)}) and responses ({len(responses)}) must have the same length")
+        rows = self.rows(item_ids)
+        kind, num, den = parse_batch(responses)
+        known = rows >= 0
+        r = np.where(known, rows, 0)
+        #valor igual (fracoes ja reduzidas: basta comparar numerador e denominador)
+        same_value = (kind == self.key_kind[r]) & (kind != INVALID) & (num == self.key_num[r]) & (den == self.key_den[r])
+        #ou a letra da alternativa certa
+        same_choice = (kind == CHOICE) & (num == self.key_choice[r]) & (self.key_choice[r] >= 0)
+        ok = known & (same_value | same_choice)
+        #ou o texto da alternativa certa (só onde ainda nao bateu e o item tem alternativas)
+        for i in np.flatnonzero(known & ~ok & (self.key_text[r] != "")):
+            ok[i] = option_text(str(responses[i])) == self.key_text[r[i]]
+        return ok
+
+    #gabarito canonico de um item (Fraction ou "maior"/"menor"/"igual"), ja calculado na construcao
+    def canonical_answer(self, item_id: str) -> Optional[Fraction | str]:
+        i = self.row[item_id]
+        kind, n, d = int(self.key_kind[i]), int(self.key_num[i]), int(self.key_den[i])
+        if kind == NUMBER:
+            return Fraction(n, d)
+        if kind == RELATION:
+            return {1: "maior", -1: "menor", 0: "igual"}[n]
+        return None
+
+    def grade_one(self, item_id: str, response: str) -> bool:
+        return bool(self.grade([item_id], [response])[0])
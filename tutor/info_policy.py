@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .knowledge import FORMAT_ORDER, THETA_GRID, GridBelief
+from .policies import ENGAGEMENT, LAST_CORRECT, N_DIFFICULTIES, SKILL_EST
+from .student_sim import DEFAULT_CONFIG, SimConfig, StudentParams, StudentSim
+
+#politica de informacao: escolhe o (formato, dificuldade) que mais informa sobre theta (informacao de Fisher
+#da logistica, p(1-p)), descontando a queda de engajamento prevista pelo StudentSim.step_engagement.
+#tudo é pre-calculado numa tabela (theta x engajamento) -> acao, entao decidir é só indexar (sem torch)
+
+ENG_GRID = np.linspace(0.0, 1.0, 41, dtype=np.float32)
+#ganho esperado de cada acao num ponto (theta, engajamento): info de Fisher - custo da queda de engajamento
+#- penalidade pela chance de o aluno abandonar logo depois dessa questao
+def action_scores(theta: float, engagement: float, reading_sensitivity: float = 1.0, noise: float = 0.15,
+                  drop_weight: float = 0.5, abandon_weight: float = 5.0, config: SimConfig | None = None) -> np.ndarray:
+    cfg = config or DEFAULT_CONFIG
+    sim = StudentSim(config=cfg)
+    abandon_at = cfg.abandon_threshold #mesmo limiar do FractionTutorEnv
+    student = StudentParams(theta=theta, reading_sensitivity=reading_sensitivity, noise=noise)
+    kappa = 1.0 / math.sqrt(1.0 + math.pi * noise ** 2 / 8.0) #ruido do simulador achata a logistica (ver knowledge.py)
+    scores = np.empty(len(FORMAT_ORDER) * N_DIFFICULTIES, dtype=np.float64)
+    for fi, fmt in enumerate(FORMAT_ORDER):
+        load = cfg.load(fmt)
+        for di in range(N_DIFFICULTIES):
+            d = di + 1
+            x = kappa * (theta - sim.item_difficulty_bias(d) - load * reading_sensitivity
+                         + cfg.engagement_weight * (engagement - 0.5))
+            p = 1.0 / (1.0 + math.exp(-x))
+            info = kappa * kappa * p * (1.0 - p)
+            e_ok = sim.step_engagement(student, d, fmt, engagement, True)
+            e_bad = sim.step_engagement(student, d, fmt, engagement, False)
+            #queda relativa à margem que ainda resta até o abandono: no começo da sessao quase nao pesa,
+            #perto do limiar domina (e a politica recua pra itens leves/faceis)
+            drop = (engagement - (p * e_ok + (1.0 - p) * e_bad)) / max(engagement - abandon_at, 0.01)
+            p_abandon = p * (e_ok <= abandon_at) + (1.0 - p) * (e_bad <= abandon_at)
+            scores[fi * N_DIFFICULTIES + di] = info - drop_weight * drop - abandon_weight * p_abandon
+    return scores
+
+
+#tabela (len(THETA_GRID), len(ENG_GRID)) de acoes em uint8; cacheada por configuracao
+@lru_cache(maxsize=8)
+def build_table(reading_sensitivity: float = 1.0, noise: float = 0.15, drop_weight: float = 0.5,
+                abandon_weight: float = 5.0, config: SimConfig | None = None) -> np.ndarray:
+    table = np.empty((len(THETA_GRID), len(ENG_GRID)), dtype=np.uint8)
+    for i, th in enumerate(THETA_GRID):
+        for j, e in enumerate(ENG_GRID):
+            table[i, j] = int(np.argmax(action_scores(float(th), float(e), reading_sensitivity, noise,
+                                                      drop_weight, abandon_weight, config)))
+    table.flags.writeable = False
+    return table
+
+
+class InfoGainPolicy:
+    def __init__(self, table: np.ndarray | None = None):
+        self.table = build_table() if table is None else table
+        self._th_scale = (len(THETA_GRID) - 1) / float(THETA_GRID[-1] - THETA_GRID[0])
+        self._e_scale = (len(ENG_GRID) - 1) / float(ENG_GRID[-1] - ENG_GRID[0])
+
+    #lote de observacoes (N, obs_dim) -> (N,) acoes: arredonda pro ponto mais proximo do grid e indexa
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        obs = np.asarray(obs)
+        if obs.ndim == 1:
+            obs = obs.reshape(1, -1)
+        i = np.rint((obs[:, SKILL_EST] - THETA_GRID[0]) * self._th_scale).astype(np.int64)
+        j = np.rint((obs[:, ENGAGEMENT] - ENG_GRID[0]) * self._e_scale).astype(np.int64)
+        i = np.clip(i, 0, self.table.shape[0] - 1)
+        j = np.clip(j, 0, self.table.shape[1] - 1)
+        return self.table[i, j].astype(np.int64)
+
+
+#a mesma politica com posterior propria: a tabela está na escala do theta, mas no env heuristico o skill_est
+#da obs nao está. Aqui a politica mantem um GridBelief por episodio (uma linha por env, protocolo
+#reset_state/act_rows do rollout) e atualiza com o que a obs mostra: a acao anterior (formato, dificuldade),
+#o engajamento de antes da resposta e last_correct. Assim roda no mesmo env (e na mesma recompensa) das outras
+class PosteriorInfoPolicy(InfoGainPolicy):
+    def __init__(self, table: np.ndarray | None = None):
+        super().__init__(table)
+        self.reset_state(1)
+
+    def reset_state(self, n: int) -> None:
+        self.belief = GridBelief(n)
+        self._prev_a = np.full(n, -1, dtype=np.int64) #-1 = episodio ainda sem resposta
+        self._prev_eng = np.zeros(n, dtype=np.float32)
+
+    def act_rows(self, obs: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        obs = np.asarray(obs)
+        rows = np.asarray(rows, dtype=np.int64)
+        seen = self._prev_a[rows] >= 0
+        if seen.any():
+            r, a = rows[seen], self._prev_a[rows[seen]]
+            self.belief.update(r, a % N_DIFFICULTIES + 1, a // N_DIFFICULTIES, self._prev_eng[r],
+                               obs[seen, LAST_CORRECT] >= 0.5)
+        theta, _ = self.belief.mean_std(rows)
+        query = obs.copy()
+        query[:, SKILL_EST] = theta
+        actions = self.act(query)
+        self._prev_a[rows] = actions
+        self._prev_eng[rows] = obs[:, ENGAGEMENT]
+        return actions
+
+
+#mesma assinatura das baselines em tutor/policies.py (o rng nao é usado: a politica é deterministica)
+def info_batch(obs: np.ndarray, rng: np.random.Generator | None = None) -> np.ndarray:
+    return _default_policy().act(obs)
+
+
+@lru_cache(maxsize=1)
+def _default_policy() -> InfoGainPolicy:
+    return InfoGainPolicy()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from .student_sim import DEFAULT_CONFIG, SimConfig
+
+#knowledge tracing bayesiano: posterior de theta (habilidade) num grid fixo, atualizado com a MESMA
+#verossimilhanca logistica do StudentSim.p_correct. Tudo em lote: uma linha por aluno, entao o mesmo
+#objeto serve pro env (1 aluno) e pro serving (muitos alunos de uma vez). Memoria fixa por aluno.
+
+THETA_GRID = np.linspace(-3.0, 3.0, 61, dtype=np.float32)
+FORMAT_ORDER = ["short_text", "multiple_choice", "visual", "scaffold"]
+
+
+class GridBelief:
+    def __init__(self, n: int, grid: np.ndarray = THETA_GRID, prior_mean: float = 0.0, prior_sd: float = 1.0,
+                 reading_sensitivity: float = 1.0, noise: float = 0.15, config: SimConfig | None = None):
+        cfg = config or DEFAULT_CONFIG
+        self.difficulty_scale = cfg.difficulty_scale
+        self.engagement_weight = cfg.engagement_weight
+        self.loads = np.array([cfg.load(f) for f in FORMAT_ORDER], dtype=np.float32)
+        self.grid = np.asarray(grid, dtype=np.float32)
+        #prior gaussiano em log (a normalizacao nao importa, so as diferencas), guardado pra reiniciar linhas
+        self.log_prior = (-0.5 * ((self.grid - prior_mean) / prior_sd) ** 2).astype(np.float32)
+        self.log_post = np.tile(self.log_prior, (n, 1)) #(n_alunos, G) float32 -> 4*G bytes por aluno
+        #o tutor nao conhece a sensibilidade a leitura do aluno: uso o valor medio da populacao do simulador
+        self.reading_sensitivity = reading_sensitivity
+        #o ruido gaussiano no score do simulador achata a logistica (aprox. probit): logit efetivo * kappa
+        self.kappa = 1.0 / math.sqrt(1.0 + math.pi * noise ** 2 / 8.0)
+        self._grid_sq = self.grid ** 2
+
+    @property
+    def n(self) -> int:
+        return self.log_post.shape[0]
+
+    def reset(self, idx: Optional[np.ndarray] = None) -> None:
+        if idx is None:
+            self.log_post[:] = self.log_prior
+        else:
+            self.log_post[idx] = self.log_prior
+
+    #cresce/encolhe o lote (ex.: session store realocando slots); linhas novas comecam no prior
+    def resize(self, n: int) -> None:
+        old = self.log_post
+        self.log_post = np.tile(self.log_prior, (n, 1))
+        k = min(n, old.shape[0])
+        self.log_post[:k] = old[:k]
+
+    #atualizacao bayesiana em lote: idx (k,) alunos, d (k,) dificuldades, fmt_i (k,) indice do formato,
+    #engagement (k,) engajamento ANTES da resposta, correct (k,) bool
+    def update(self, idx, d, fmt_i, engagement, correct) -> None:
+        idx = np.asarray(idx)
+        d = np.asarray(d, dtype=np.float32)
+        load = self.loads[np.asarray(fmt_i)]
+        eng = np.asarray(engagement, dtype=np.float32)
+        offset = -(d - 3.0) * self.difficulty_scale - load * self.reading_sensitivity \
+            + self.engagement_weight * (eng - 0.5)
+        x = self.kappa * (self.grid[None, :] + offset[:, None]) #(k, G)
+        #log p(acerto) = -log(1+e^-x), log p(erro) = -log(1+e^x)
+        sign = np.where(np.asarray(correct, dtype=bool), -1.0, 1.0).astype(np.float32)[:, None]
+        lp = self.log_post[idx] - np.logaddexp(0.0, sign * x)
+        self.log_post[idx] = lp - lp.max(axis=1, keepdims=True) #renormalizo pelo maximo (estabilidade)
+
+    #caminho rapido pra um aluno só (o env chama isso a cada passo): mesma conta sem montar arrays de entrada
+    def update_one(self, i: int, d: int, fmt_i: int, engagement: float, correct: bool) -> None:
+        offset = -(d - 3.0) * self.difficulty_scale - float(self.loads[fmt_i]) * self.reading_sensitivity \
+            + self.engagement_weight * (engagement - 0.5)
+        row = self.log_post[i]
+        row -= np.logaddexp(0.0, (-self.kappa if correct else self.kappa) * (self.grid + offset))
+        row -= row.max()
+
+    def mean_std_one(self, i: int) -> tuple[float, float]:
+        w = np.exp(self.log_post[i])
+        z = float(w.sum())
+        mean = float(w @ self.grid) / z
+        var = float(w @ self._grid_sq) / z - mean * mean
+        return mean, math.sqrt(max(var, 0.0))
+
+    #media e desvio padrao da posterior -> (skill_est, skill_unc) do vetor de observacao
+    def mean_std(self, idx: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        lp = self.log_post if idx is None else self.log_post[idx]
+        w = np.exp(lp - lp.max(axis=-1, keepdims=True))
+        w /= w.sum(axis=-1, keepdims=True)
+        mean = w @ self.grid
+        var = w @ self._grid_sq - mean ** 2
+        return mean, np.sqrt(np.maximum(var, 0.0))
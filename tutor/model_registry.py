@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import pickle
+import time
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+#bundle de modelo = um unico .zip com tudo que o PPO precisa pra rodar igual ao treino:
+#  meta.json        -> versao do formato, config do env (max_steps, banco + hash), seed, algoritmo
+#  policy.zip       -> pesos do SB3 (o mesmo arquivo que model.save gera)
+#  vecnormalize.pkl -> estatisticas de normalizacao de obs/recompensa
+BUNDLE_VERSION = 1
+DEFAULT_ROOT = "models"
+REGISTRY_FILE = "registry.json"
+
+
+def _hash_file(h, path: Path) -> None:
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+
+#hash do banco de questoes (pra detectar quando o modelo foi treinado com outro banco); num manifesto
+#multi-topico entra o manifesto + cada shard que ele lista (editar um shard tambem muda o hash)
+def bank_hash(path: str | Path) -> str:
+    path = Path(path)
+    h = hashlib.sha256()
+    _hash_file(h, path)
+    if path.suffix.lower() == ".json":
+        topics = json.loads(path.read_text(encoding="utf-8")).get("topics", {})
+        for topic, entry in sorted(topics.items()):
+            shard = Path(entry["path"])
+            shard = shard if shard.is_absolute() else path.parent / shard
+            h.update(topic.encode("utf-8"))
+            if shard.is_file():
+                _hash_file(h, shard)
+            else:
+                h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def is_bundle(path: str | Path) -> bool:
+    p = Path(path)
+    if not p.is_file() or not zipfile.is_zipfile(p):
+        return False
+    with zipfile.ZipFile(p) as zf:
+        return "meta.json" in zf.namelist()
+
+
+#monta o meta.json a partir da config usada no treino
+#env_kwargs: outros argumentos do FractionTutorEnv usados no treino (ex.: belief), pra recriar o mesmo env
+def make_meta(bank: str, seed: int, max_steps: int = 20, algo: str = "PPO",
+              env_kwargs: Optional[Dict[str, Any]] = None, **extra: Any) -> Dict[str, Any]:
+    return {
+        "bundle_version": BUNDLE_VERSION,
+        "algo": algo,
+        "seed": seed,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "env": {
+            "max_steps": max_steps,
+            "bank_path": str(bank),
+            "bank_hash": bank_hash(bank),
+            **(env_kwargs or {}),
+        },
+        **extra,
+    }
+
+
+#salvando o modelo treinado + VecNormalize num arquivo só
+def save_bundle(path: str | Path, model, venv, meta: Dict[str, Any]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    policy_buf = io.BytesIO()
+    model.save(policy_buf)
+
+    #mesmo formato do VecNormalize.save (o __getstate__ dele ja descarta o env interno)
+    vn_bytes = pickle.dumps(venv)
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("meta.json", json.dumps(meta, indent=2, ensure_ascii=False))
+        zf.writestr("policy.zip", policy_buf.getvalue())
+        zf.writestr("vecnormalize.pkl", vn_bytes)
+    tmp.replace(path) #escrita atomica pra nunca deixar bundle pela metade
+    return path
+
+
+#modelo carregado e pronto pra usar (pesos + normalizacao + config do env)
+@dataclass
+class LoadedModel:
+    model: Any
+    venv: Any
+    meta: Dict[str, Any]
+    path: Path
+
+    @property
+    def env_config(self) -> Dict[str, Any]:
+        return self.meta.get("env", {})
+
+    #argumentos pra recriar o env do treino: FractionTutorEnv(bank_path=..., seed=..., **env_kwargs)
+    @property
+    def env_kwargs(self) -> Dict[str, Any]:
+        return env_kwargs_from(self.env_config)
+
+    @property
+    def recurrent(self) -> bool:
+        return self.meta.get("algo") == "RecurrentPPO"
+
+    #acao deterministica para um lote de observacoes cruas (N, obs_dim) -> (N,)
+    #(recorrente sem reset_state: cada linha é um aluno e o estado continua entre chamadas com o mesmo N)
+    def act(self, obs) -> np.ndarray:
+        obs_arr = np.asarray(obs, dtype=np.float32)
+        if obs_arr.ndim == 1:
+            obs_arr = obs_arr.reshape(1, -1)
+        if self.recurrent:
+            if getattr(self, "_h", None) is None or self._h.shape[1] != len(obs_arr):
+                self.reset_state(len(obs_arr))
+            return self.act_rows(obs_arr, np.arange(len(obs_arr)))
+        a, _ = self.model.predict(self.venv.normalize_obs(obs_arr), deterministic=True)
+        return np.asarray(a, dtype=np.int64).reshape(-1)
+
+    ##estado da LSTM por aluno (so pro RecurrentPPO): rollout_batch/rollout_vec chamam reset_state(n) no
+    ##inicio e act_rows(obs, rows) a cada passo, com rows = indices dos episodios ainda ativos
+    def reset_state(self, n: int) -> None:
+        if not self.recurrent:
+            return
+        n_layers, _, hidden = self.model.policy.lstm_hidden_state_shape
+        self._h = np.zeros((n_layers, n, hidden), dtype=np.float32)
+        self._c = np.zeros((n_layers, n, hidden), dtype=np.float32)
+        self._starts = np.ones(n, dtype=bool)
+
+    def act_rows(self, obs, rows) -> np.ndarray:
+        if not self.recurrent:
+            return self.act(obs)
+        rows = np.asarray(rows)
+        obs_arr = self.venv.normalize_obs(np.asarray(obs, dtype=np.float32))
+        a, (h, c) = self.model.predict(obs_arr, state=(self._h[:, rows], self._c[:, rows]),
+                                       episode_start=self._starts[rows], deterministic=True)
+        self._h[:, rows], self._c[:, rows] = h, c
+        self._starts[rows] = False
+        return np.asarray(a, dtype=np.int64).reshape(-1)
+
+
+_ENV_META_ONLY = ("bank_path", "bank_hash")
+
+def env_kwargs_from(env_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    kw = {k: v for k, v in env_cfg.items() if k not in _ENV_META_ONLY}
+    kw["max_steps"] = int(kw.get("max_steps", 20))
+    return kw
+
+
+def _make_venv(env_cfg: Dict[str, Any], bank: Optional[str], seed: int = 0):
+    from stable_baselines3.common.vec_env import DummyVecEnv
+    from .envs.fraction_tutor_env import FractionTutorEnv
+
+    bank_path = bank or env_cfg["bank_path"]
+    kwargs = env_kwargs_from(env_cfg)
+
+    def _thunk():
+        return FractionTutorEnv(bank_path=bank_path, seed=seed, **kwargs)
+
+    return DummyVecEnv([_thunk])
+
+
+#classe do SB3 pelo meta["algo"] (sb3_contrib só é importado se o bundle for recorrente)
+def _algo_class(algo: str):
+    if algo == "RecurrentPPO":
+        from sb3_contrib import RecurrentPPO
+        return RecurrentPPO
+    from stable_baselines3 import PPO
+    return PPO
+
+
+#seed: do env interno (só importa pra quem continua treinando o modelo carregado, ex.: tune_ppo)
+def load_bundle(path: str | Path, bank: Optional[str] = None, seed: int = 0) -> LoadedModel:
+    path = Path(path)
+    with zipfile.ZipFile(path) as zf:
+        meta = json.loads(zf.read("meta.json").decode("utf-8"))
+        policy_bytes = zf.read("policy.zip")
+        vn_bytes = zf.read("vecnormalize.pkl")
+
+    version = int(meta.get("bundle_version", 0))
+    if version > BUNDLE_VERSION:
+        raise ValueError(f"Bundle {path} has version {version}; this code reads up to {BUNDLE_VERSION}.")
+
+    env_cfg = meta.get("env", {})
+    bank_path = bank or env_cfg.get("bank_path")
+    if bank_path and env_cfg.get("bank_hash") and Path(bank_path).exists():
+        if bank_hash(bank_path) != env_cfg["bank_hash"]:
+            print(f"[WARN] Bank {bank_path} differs from the one used to train {path.name}.")
+
+    venv = _make_venv(env_cfg, bank, seed)
+    vn = pickle.loads(vn_bytes)
+    vn.set_venv(venv)
+    #modo avaliacao: nao atualiza estatisticas e nao normaliza a recompensa
+    vn.training = False
+    vn.norm_reward = False
+
+    model = _algo_class(meta.get("algo", "PPO")).load(io.BytesIO(policy_bytes), env=vn)
+    return LoadedModel(model=model, venv=vn, meta=meta, path=path)
+
+
+#formato antigo: <out>.zip do SB3 + <out>.vecnormalize.pkl do lado
+def load_legacy(model_path: str | Path, bank: str, max_steps: int = 20) -> LoadedModel:
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    model_path = Path(model_path)
+    vn_path = model_path.with_suffix(".vecnormalize.pkl")
+    if not vn_path.exists():
+        raise FileNotFoundError(f"VecNormalize stats not found next to model: {vn_path}")
+
+    venv = _make_venv({"bank_path": bank, "max_steps": max_steps}, bank)
+    vn = VecNormalize.load(str(vn_path), venv)
+    vn.training = False
+    vn.norm_reward = False
+    model = PPO.load(str(model_path), env=vn)
+    meta = {"bundle_version": 0, "algo": "PPO", "env": {"bank_path": bank, "max_steps": max_steps}}
+    return LoadedModel(model=model, venv=vn, meta=meta, path=model_path)
+
+
+#registro local: models/registry.json mapeia nome -> bundle (com um resumo do meta)
+@dataclass
+class ModelRegistry:
+    root: Path = field(default_factory=lambda: Path(DEFAULT_ROOT))
+
+    def __post_init__(self):
+        self.root = Path(self.root)
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / REGISTRY_FILE
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path.exists():
+            return {}
+        return json.loads(self.index_path.read_text(encoding="utf-8"))
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(entries, indent=2, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.index_path)
+
+    def names(self) -> list[str]:
+        return sorted(self._read())
+
+    def register(self, name: str, bundle_path: str | Path, meta: Optional[Dict[str, Any]] = None) -> None:
+        bundle_path = Path(bundle_path)
+        if meta is None:
+            with zipfile.ZipFile(bundle_path) as zf:
+                meta = json.loads(zf.read("meta.json").decode("utf-8"))
+        entries = self._read()
+        #caminho relativo ao registro quando possivel (pra poder mover a pasta models/ inteira)
+        try:
+            stored = str(bundle_path.resolve().relative_to(self.root.resolve()))
+        except ValueError:
+            stored = str(bundle_path.resolve())
+        entries[name] = {"path": stored, "meta": meta}
+        self._write(entries)
+
+    def resolve(self, name_or_path: str | Path) -> Path:
+        entries = self._read()
+        key = str(name_or_path)
+        if key in entries:
+            p = Path(entries[key]["path"])
+            return p if p.is_absolute() else self.root / p
+        p = Path(name_or_path)
+        if p.exists():
+            return p
+        raise KeyError(f"Model '{name_or_path}' not found in registry {self.index_path} nor on disk.")
+
+    def load(self, name_or_path: str | Path, bank: Optional[str] = None) -> LoadedModel:
+        path = self.resolve(name_or_path)
+        #cache em memoria: a chave inclui mtime, entao re-treinar com o mesmo nome invalida sozinho
+        key = (str(path.resolve()), path.stat().st_mtime_ns, bank)
+        cached = _CACHE.get(key)
+        if cached is not None:
+            return cached
+        loaded = load_bundle(path, bank=bank) if is_bundle(path) else load_legacy(path, bank=bank or "data/items_bank.jsonl")
+        _CACHE[key] = loaded
+        return loaded
+
+
+_CACHE: Dict[tuple, LoadedModel] = {}
+
+
+def clear_cache() -> None:
+    _CACHE.clear()
+
+
+#atalho pra quem so quer "o modelo X" (eval, notebook, serving)
+def load_model(name_or_path: str | Path, bank: Optional[str] = None, root: str | Path = DEFAULT_ROOT) -> LoadedModel:
+    return ModelRegistry(Path(root)).load(name_or_path, bank=bank)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+#executor de DAG com cache de artefatos por hash de conteudo. Cada etapa escreve num diretorio proprio
+#(runs/cache/<etapa>-<chave>/) e a chave é o hash de: parametros, codigo-fonte da funcao da etapa, conteudo
+#dos arquivos de codigo/dados que ela declara e o hash da SAIDA de cada dependencia. Se a chave ja tem
+#artefato completo, a etapa é pulada; etapas independentes rodam em paralelo (threads: o trabalho pesado
+#é subprocesso). Uma etapa que regera uma saida identica nao invalida as de baixo.
+
+MANIFEST = "manifest.json"
+_CHUNK = 1 << 20
+
+
+def file_hash(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+#hash do conteudo de um diretorio (caminhos relativos + conteudo), ignorando o manifesto
+def tree_hash(root: str | Path) -> str:
+    root = Path(root)
+    h = hashlib.sha256()
+    for p in sorted(root.rglob("*")):
+        if p.is_file() and p.name != MANIFEST:
+            h.update(p.relative_to(root).as_posix().encode())
+            h.update(file_hash(p).encode())
+    return h.hexdigest()
+
+
+#codigo da funcao da etapa (mudar o corpo dela invalida só essa etapa)
+def _source(fn: Callable) -> str:
+    try:
+        return inspect.getsource(fn)
+    except (OSError, TypeError):
+        return getattr(fn, "__qualname__", repr(fn))
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Path, Dict[str, Path]], None] #(diretorio de saida, {dependencia: diretorio dela})
+    deps: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    code: Sequence[str] = () #globs de codigo-fonte (relativos à raiz) que mudam o resultado
+    inputs: Sequence[str] = () #arquivos de dados lidos direto (ausente tambem entra na chave)
+
+
+@dataclass
+class StageResult:
+    name: str
+    key: str
+    path: Path
+    cached: bool
+    seconds: float
+    output_hash: str
+
+
+class Pipeline:
+    def __init__(self, stages: Iterable[Stage], cache_root: str | Path = "runs/cache", root: str | Path = ".",
+                 workers: int = 4, log: Callable[[str], None] = print):
+        self.stages: Dict[str, Stage] = {}
+        for st in stages:
+            if st.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {st.name}")
+            self.stages[st.name] = st
+        for st in self.stages.values():
+            missing = [d for d in st.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {st.name} depends on unknown stage(s): {missing}")
+        self.cache_root = Path(cache_root)
+        self.root = Path(root)
+        self.workers = max(1, workers)
+        self.log = log
+        self._order = self._toposort()
+
+    def _toposort(self) -> list[str]:
+        order, state = [], {}
+
+        def visit(name: str, path: tuple):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for d in self.stages[name].deps:
+                visit(d, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    #etapas necessarias pra produzir `targets` (todas se None), em ordem topologica
+    def closure(self, targets: Optional[Sequence[str]] = None) -> list[str]:
+        if not targets:
+            return list(self._order)
+        need, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name not in need:
+                need.add(name)
+                stack.extend(self.stages[name].deps)
+        return [n for n in self._order if n in need]
+
+    def _code_hashes(self, st: Stage) -> Dict[str, str]:
+        out = {}
+        for pattern in st.code:
+            matches = sorted(p for p in self.root.glob(pattern) if p.is_file())
+            for p in matches:
+                out[p.relative_to(self.root).as_posix()] = file_hash(p)
+        return out
+
+    def key(self, st: Stage, dep_hashes: Dict[str, str]) -> str:
+        inputs = {}
+        for rel in st.inputs:
+            p = self.root / rel
+            inputs[rel] = file_hash(p) if p.is_file() else None
+        payload = {
+            "name": st.name,
+            "params": st.params,
+            "run": _source(st.run),
+            "code": self._code_hashes(st),
+            "inputs": inputs,
+            "deps": {d: dep_hashes[d] for d in st.deps},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def artifact_dir(self, name: str, key: str) -> Path:
+        return self.cache_root / f"{name}-{key[:16]}"
+
+    @staticmethod
+    def read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+        m = path / MANIFEST
+        return json.loads(m.read_text(encoding="utf-8")) if m.is_file() else None
+
+    #roda uma etapa num diretorio temporario e só "publica" (rename) quando terminar sem erro
+    def _execute(self, st: Stage, key: str, dep_dirs: Dict[str, Path]) -> StageResult:
+        final = self.artifact_dir(st.name, key)
+        tmp = final.with_name(final.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        t0 = time.perf_counter()
+        try:
+            st.run(tmp, dep_dirs)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        seconds = time.perf_counter() - t0
+        out_hash = tree_hash(tmp)
+        manifest = {"stage": st.name, "key": key, "params": st.params, "deps": {d: str(p) for d, p in dep_dirs.items()},
+                    "output_hash": out_hash, "seconds": seconds, "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+        shutil.rmtree(final, ignore_errors=True)
+        tmp.rename(final)
+        return StageResult(st.name, key, final, False, seconds, out_hash)
+
+    #roda o DAG (ou só o necessario pra `targets`); `force` recalcula essas etapas mesmo com cache
+    def run(self, targets: Optional[Sequence[str]] = None, force: Sequence[str] = ()) -> Dict[str, StageResult]:
+        todo = self.closure(targets)
+        done: Dict[str, StageResult] = {}
+        running: Dict[Future, tuple] = {}
+        pending = list(todo)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while pending or running:
+                #tudo que ja tem as dependencias prontas: cache hit resolve na hora, o resto vai pro pool
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for name in list(pending):
+                        st = self.stages[name]
+                        if not all(d in done for d in st.deps):
+                            continue
+                        pending.remove(name)
+                        progressed = True
+                        key = self.key(st, {d: done[d].output_hash for d in st.deps})
+                        path = self.artifact_dir(name, key)
+                        manifest = self.read_manifest(path)
+                        if manifest is not None and name not in force:
+                            done[name] = StageResult(name, key, path, True, 0.0, manifest["output_hash"])
+                            self.log(f"[cached] {name} ({path})")
+                            continue
+                        self.log(f"[run]    {name}")
+                        fut = pool.submit(self._execute, st, key, {d: done[d].path for d in st.deps})
+                        running[fut] = (name, key)
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name, _ = running.pop(fut)
+                    try:
+                        done[name] = fut.result()
+                    except Exception as e:
+                        for other in running:
+                            other.cancel()
+                        raise RuntimeError(f"Stage {name} failed: {e}") from e
+                    self.log(f"[done]   {name} in {done[name].seconds:.1f}s ({done[name].path})")
+        return done
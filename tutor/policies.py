@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import random
+from typing import Callable, Protocol
+
+import numpy as np
+
+#indice dos campos no vetor de observacao do FractionTutorEnv
+SKILL_EST, SKILL_UNC, ENGAGEMENT, LAST_CORRECT, LAST_D_NORM, LAST_LOAD = range(6)
+
+N_ACTIONS = 20
+N_DIFFICULTIES = 5
+MCQ = 1 #indice de "multiple_choice" em FORMATS
+
+
+#qualquer politica (heuristica, tabular, PPO) que recebe um lote de observacoes (N, obs_dim) e devolve (N,) acoes
+class BatchPolicy(Protocol):
+    def act(self, obs: np.ndarray) -> np.ndarray: ...
+
+
+##BASELINES VETORIZADAS (mesmas regras das versoes escalares do eval_baselines.py)
+
+def random_batch(obs: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    return rng.integers(0, N_ACTIONS, size=len(obs))
+
+#escadinha: sobe a dificuldade se acertou, desce se errou (formato fixo em multipla escolha)
+def _staircase_d(obs: np.ndarray) -> np.ndarray:
+    d = np.rint(obs[:, LAST_D_NORM].astype(np.float64) * 4).astype(np.int64) + 1
+    up = obs[:, LAST_CORRECT] >= 0.5
+    return np.where(up, np.minimum(5, d + 1), np.maximum(1, d - 1))
+
+def staircase_batch(obs: np.ndarray, rng: np.random.Generator | None = None) -> np.ndarray:
+    return MCQ * N_DIFFICULTIES + (_staircase_d(obs) - 1)
+
+#consciente de engajamento: com engajamento baixo ou carga alta, cai pra dificuldade 1-2
+def engagement_batch(obs: np.ndarray, rng: np.random.Generator | None = None) -> np.ndarray:
+    eng = obs[:, ENGAGEMENT]
+    careful = (eng < 0.35) | (obs[:, LAST_LOAD] > 0.70)
+    d = np.where(careful, np.where(eng < 0.25, 1, 2), _staircase_d(obs))
+    return MCQ * N_DIFFICULTIES + (d - 1)
+
+
+#adaptador: funcao batch (obs, rng) -> acoes vira um BatchPolicy
+class FnPolicy:
+    def __init__(self, fn: Callable[[np.ndarray, np.random.Generator], np.ndarray], seed: int = 0):
+        self.fn = fn
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        return np.asarray(self.fn(np.asarray(obs), self.rng), dtype=np.int64)
+
+
+#adaptador pras politicas escalares antigas (obs, random.Random) -> int, aplicadas linha a linha
+class ScalarPolicy:
+    def __init__(self, fn: Callable[[np.ndarray, random.Random], int], seed: int = 0):
+        self.fn = fn
+        self.rng = random.Random(seed)
+
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        return np.array([self.fn(o, self.rng) for o in np.asarray(obs)], dtype=np.int64)
+
+
+BASELINES = {
+    "random": random_batch,
+    "staircase": staircase_batch,
+    "engagement": engagement_batch,
+}
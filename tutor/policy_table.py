@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from .policies import N_ACTIONS
+
+#"compila" qualquer politica (PPO, baselines, info) numa tabela de acoes uint8 sobre um grid da observacao
+#de 6 campos. Tres campos ja sao (quase) discretos: last_correct (0/1), last_difficulty_norm (quintos) e
+#last_load (poucos valores do READING_LOAD); os outros tres (skill_est, skill_unc, engagement) sao
+#quantizados em celulas com resolucao configuravel. Decidir vira: 6 arredondamentos + 1 indice, sem rede neural.
+
+#faixa de cada campo continuo (dividida em celulas iguais); valores fora caem na celula da borda
+DEFAULT_RANGES = {"skill_est": (-3.0, 3.0), "skill_unc": (0.0, 2.0), "engagement": (0.0, 1.0)}
+DEFAULT_RESOLUTION = {"skill_est": 24, "skill_unc": 8, "engagement": 20}
+#valores de carga que aparecem na obs: 0.2 (inicio do episodio e short_text), READING_LOAD e o default 0.4
+DEFAULT_LOADS = (0.20, 0.35, 0.40, 0.45, 0.70)
+N_D = 5 #last_difficulty_norm em {0, 1/4, ..., 1}
+
+
+@dataclass
+class PolicyTable:
+    table: np.ndarray #uint8 (n_est, n_unc, n_eng, 2, N_D, n_load)
+    ranges: Dict[str, tuple]
+    loads: np.ndarray
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.table = np.ascontiguousarray(self.table, dtype=np.uint8)
+        self.loads = np.asarray(self.loads, dtype=np.float64)
+        self._load_mid = (self.loads[1:] + self.loads[:-1]) / 2 #fronteiras do valor de carga mais proximo
+        n_est, n_unc, n_eng = self.table.shape[:3]
+        (e0, e1), (u0, u1), (g0, g1) = (self.ranges[k] for k in ("skill_est", "skill_unc", "engagement"))
+        #(origem, 1/largura da celula, n) de cada campo continuo
+        self._axes = [(e0, n_est / (e1 - e0), n_est), (u0, n_unc / (u1 - u0), n_unc), (g0, n_eng / (g1 - g0), n_eng)]
+        self._strides = [s // self.table.itemsize for s in self.table.strides]
+        self._axes = [(float(o), float(inv), int(n)) for o, inv, n in self._axes]
+        self.act_one = self._scalar_path()
+
+    @property
+    def shape(self) -> tuple:
+        return self.table.shape
+
+    #lote (N, 6) -> (N,) acoes
+    def act(self, obs: np.ndarray) -> np.ndarray:
+        obs = np.asarray(obs, dtype=np.float64)
+        if obs.ndim == 1:
+            obs = obs.reshape(1, -1)
+        idx = [np.clip(np.floor((obs[:, j] - o) * inv), 0, n - 1).astype(np.int64)
+               for j, (o, inv, n) in enumerate(self._axes)]
+        idx.append((obs[:, 3] >= 0.5).astype(np.int64))
+        idx.append(np.clip(np.rint(obs[:, 4] * (N_D - 1)), 0, N_D - 1).astype(np.int64))
+        idx.append(np.searchsorted(self._load_mid, obs[:, 5]))
+        return self.table[tuple(idx)].astype(np.int64)
+
+    #uma observacao só, em python puro (sem overhead de array do numpy): é o caminho de serving. Vira uma
+    #closure com tudo pre-calculado em variaveis locais do python (nada de escalar numpy nem busca de atributo):
+    #campo continuo -> floor(x * escala + deslocamento) com a origem ja dobrada no deslocamento, e os 3 campos
+    #discretos (last_correct, d, carga) num dict pelo valor exato da obs (float64 e float32) -> parte do indice.
+    #obs fora do dict (carga que nao está na tabela) calcula a parte discreta como o act
+    def _scalar_path(self):
+        (e0, ei, en), (u0, ui, un), (g0, gi, gn) = self._axes
+        se, su, sg, sc, sd = self._strides[:5]
+        mids = tuple(float(m) for m in self._load_mid)
+
+        def tail_of(c: float, d: float, load: float) -> int:
+            di = int(d * (N_D - 1) + 0.5)
+            return (c >= 0.5) * sc + (0 if di < 0 else N_D - 1 if di >= N_D else di) * sd + sum(load > b for b in mids)
+
+        tails = {}
+        for c in (0.0, 1.0):
+            for d in np.linspace(0.0, 1.0, N_D):
+                for load in self.loads:
+                    for key in ((float(c), float(d), float(load)),
+                                (float(c), float(np.float32(d)), float(np.float32(load)))):
+                        tails[key] = tail_of(*key)
+
+        flat, get, floor = self.table.tobytes(), tails.get, math.floor
+        eb, ub, gb = -e0 * ei, -u0 * ui, -g0 * gi
+        en, un, gn = en - 1, un - 1, gn - 1
+
+        def act_one(obs: Sequence[float]) -> int:
+            x0, x1, x2, c, d, load = obs
+            i = floor(x0 * ei + eb)
+            j = floor(x1 * ui + ub)
+            k = floor(x2 * gi + gb)
+            t = get((c, d, load))
+            if t is None:
+                t = tail_of(c, d, load)
+            return flat[(0 if i < 0 else en if i > en else i) * se + (0 if j < 0 else un if j > un else j) * su
+                        + (0 if k < 0 else gn if k > gn else k) * sg + t]
+
+        return act_one
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f: #file handle: o numpy nao acrescenta .npz no nome
+            np.savez_compressed(f, table=self.table, loads=self.loads,
+                                ranges=json.dumps(self.ranges), meta=json.dumps(self.meta, ensure_ascii=False))
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "PolicyTable":
+        with np.load(path) as z:
+            ranges = {k: tuple(v) for k, v in json.loads(str(z["ranges"])).items()}
+            return cls(table=z["table"], ranges=ranges, loads=z["loads"], meta=json.loads(str(z["meta"])))
+
+
+#valores de cada eixo da tabela: centro das celulas nos campos continuos (o limiar de uma regra tipo
+#"engagement < 0.35" cai na borda entre celulas e a tabela reproduz a regra exatamente), valores exatos nos discretos
+def grid_points(resolution: Dict[str, int], ranges: Dict[str, tuple], loads: Sequence[float]):
+    axes = []
+    for k in ("skill_est", "skill_unc", "engagement"):
+        lo, hi = ranges[k]
+        w = (hi - lo) / resolution[k]
+        axes.append(lo + w * (np.arange(resolution[k]) + 0.5))
+    axes += [np.array([0.0, 1.0]), np.linspace(0.0, 1.0, N_D), np.asarray(loads, dtype=np.float64)]
+    return axes
+
+
+def compile_policy(policy, resolution: Dict[str, int] | None = None, ranges: Dict[str, tuple] | None = None,
+                   loads: Sequence[float] = DEFAULT_LOADS, batch: int = 1 << 16,
+                   meta: Dict[str, Any] | None = None) -> PolicyTable:
+    resolution = {**DEFAULT_RESOLUTION, **(resolution or {})}
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+    loads = sorted(loads)
+    axes = grid_points(resolution, ranges, loads)
+    shape = tuple(len(a) for a in axes)
+    total = int(np.prod(shape))
+    if N_ACTIONS > 256:
+        raise ValueError("uint8 table holds at most 256 actions")
+
+    out = np.empty(total, dtype=np.uint8)
+    for start in range(0, total, batch): #uma passada em lote: cada bloco é um act() da politica
+        flat = np.arange(start, min(start + batch, total))
+        idx = np.unravel_index(flat, shape)
+        obs = np.stack([axes[j][idx[j]] for j in range(6)], axis=1).astype(np.float32)
+        out[start:start + len(flat)] = np.asarray(policy.act(obs), dtype=np.int64)
+    return PolicyTable(table=out.reshape(shape), ranges=ranges, loads=np.asarray(loads), meta=dict(meta or {}))
+
+
+#fracao de observacoes em que a tabela escolhe a mesma acao que a politica original
+def agreement(table: PolicyTable, policy, obs: np.ndarray) -> float:
+    obs = np.asarray(obs, dtype=np.float32)
+    if not len(obs):
+        return float("nan")
+    return float(np.mean(table.act(obs) == np.asarray(policy.act(obs), dtype=np.int64)))
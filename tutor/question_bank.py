@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import json
 import random
+import zlib
 from pathlib import Path
-from typing import Dict, List, Tuple #pra deixar o codigo mais claro
-from .schema import Item, Format
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple #pra deixar o codigo mais claro
 
-Cell = Tuple[Format, int]  # a ação a ser tomada tem a ver com a tupla (formato, dificuldade)
+import numpy as np
+
+from .compact import SKILLS, TAGS, TOPICS, CompactItem
+
+#o schema puxa o pydantic (import lento); só carrego quando for validar um banco de verdade
+if TYPE_CHECKING:
+    from .schema import Format
+
+Cell = Tuple[str, int]  # a ação a ser tomada tem a ver com a tupla (formato, dificuldade)
 
 #só pra assegurar que o campo seja compativel com o item gerado offline e tambem com o LLM
 READING_LOAD = {
@@ -16,22 +24,59 @@ READING_LOAD = {
     "scaffold": 0.70,
 }
 
+#cache dos bancos ja lidos nesse processo: a avaliacao cria um env (e um QuestionBank) por episodio,
+#entao reaproveito os itens validados enquanto o arquivo nao mudar (cada instancia continua com seu rng)
+_PARSED: Dict[tuple, dict] = {}
+#atributos que sao do banco (compartilhados entre instancias) e nao da sessao
+_SHARED = ("items", "by_cell", "cell_index", "skill_index", "tag_index", "topic_index", "_query_cache",
+           "group_of", "group_arr", "n_groups")
+
 #organizo os itens do jsonl por celula e amostro de forma aleatoria dentro da celula
 #considero um banco estatico, em que o rl escolhe apenas o formato e a dificuldade da questao (e o item especifico é sorteado pra evitar a memorização)
 class QuestionBank:
-    def __init__(self, path: str | Path, seed: int = 0):
+    def __init__(self, path: str | Path, seed: int = 0, no_repeat: bool = False):
         self.path = Path(path)
         self.rng = random.Random(seed)
+        #no_repeat: dentro de uma sessao (start_session) nao serve de novo o mesmo conteudo
+        self.no_repeat = no_repeat
 
-        self.items: List[Item] = []
-        self.by_cell: Dict[Cell, List[Item]] = {} #pra mapear a chave e o valor/lista de itens naquela celula
+        #itens ficam na forma compacta (CompactItem); o pydantic só valida na leitura
+        self.items: List[CompactItem] = []
+        self.by_cell: Dict[Cell, List[CompactItem]] = {} #pra mapear a chave e o valor/lista de itens naquela celula
+        #indices invertidos: chave -> posicoes (em self.items) ordenadas, como int32
+        self.cell_index: Dict[Cell, np.ndarray] = {}
+        self.skill_index: Dict[int, np.ndarray] = {} #chave = id no vocabulario SKILLS
+        self.tag_index: Dict[int, np.ndarray] = {} #chave = id no vocabulario TAGS
+        self.topic_index: Dict[str, np.ndarray] = {}
+        self._query_cache: Dict[tuple, np.ndarray] = {}
+        #cluster de conteudo de cada item (duplicatas e quase-duplicatas tem o mesmo id, ver tutor/dedup.py)
+        self.group_of: List[int] = []
+        self.group_arr = np.zeros(0, dtype=np.int64) #o mesmo, como array (mascara vetorizada em _pick)
+        self.n_groups = 0
         self._load()
+        #bitset dos clusters ja servidos na sessao atual (1 bit por cluster) + quais bits liguei (pra limpar em O(k))
+        self._served = bytearray((self.n_groups + 7) // 8)
+        self._served_list: List[int] = []
 
     def _load(self) -> None:
         if not self.path.exists():
             raise FileNotFoundError(f"Bank not found: {self.path}") #pra verificar que o arquivo existe
 
-        items: List[Item] = []
+        from .dedup import clusters_path
+
+        st = self.path.stat()
+        #o arquivo de clusters (scripts/analyze_bank.py) entra na chave: recalcular os clusters invalida o cache
+        cl = clusters_path(self.path)
+        cl_sig = (cl.stat().st_mtime_ns, cl.stat().st_size) if cl.exists() else None
+        cache_key = (str(self.path.resolve()), st.st_mtime_ns, st.st_size, cl_sig)
+        if cache_key in _PARSED:
+            for name, value in _PARSED[cache_key].items():
+                setattr(self, name, value)
+            return
+
+        from .schema import Item
+
+        items: List[CompactItem] = []
         with self.path.open("r", encoding="utf-8") as f: #vou lendo o arquivo linha por linha, remov espacos e quebras de linha
             for line in f:
                 line = line.strip()
@@ -40,23 +85,269 @@ class QuestionBank:
                 obj = json.loads(line)
                 # Fill default reading_load if missing
                 obj.setdefault("reading_load", READING_LOAD.get(obj.get("format"), None))
-                items.append(Item.model_validate(obj)) #valido e converto pra um item
+                items.append(CompactItem.from_item(Item.model_validate(obj))) #valido e converto pra um item compacto
 
         self.items = items
-        by_cell: Dict[Cell, List[Item]] = {}
+        by_cell: Dict[Cell, List[CompactItem]] = {}
         for it in items:
             key: Cell = (it.format, it.difficulty)
             by_cell.setdefault(key, []).append(it)
         self.by_cell = by_cell #ou seja, consigo acessat rapido o item
+        self._build_indexes()
+        self._load_groups()
+        _PARSED[cache_key] = {name: getattr(self, name) for name in _SHARED}
+
+    #clusters: usa o arquivo gerado pelo scripts/analyze_bank.py (MinHash/LSH) se ele bater com o banco;
+    #senao fica só com a chave canonica (exata e O(n), barata pra fazer na carga)
+    def _load_groups(self) -> None:
+        from .dedup import cluster_statements, load_clusters
+
+        groups = load_clusters(self.path, self.items)
+        if groups is None:
+            groups = cluster_statements([it.statement for it in self.items], use_minhash=False)
+        self.group_of = groups.tolist()
+        self.group_arr = np.asarray(groups, dtype=np.int64)
+        self.n_groups = int(groups.max()) + 1 if len(groups) else 0
+
+    def _build_indexes(self) -> None:
+        cells: Dict[Cell, List[int]] = {}
+        skills: Dict[int, List[int]] = {}
+        tags: Dict[int, List[int]] = {}
+        topics: Dict[str, List[int]] = {}
+        for pos, it in enumerate(self.items): #posicoes crescentes -> listas ja saem ordenadas
+            cells.setdefault((it.format, it.difficulty), []).append(pos)
+            topics.setdefault(it.topic, []).append(pos)
+            for sid in set(it.skill_ids):
+                skills.setdefault(sid, []).append(pos)
+            for tid in set(it.tag_ids):
+                tags.setdefault(tid, []).append(pos)
+
+        def _arr(d):
+            return {k: np.asarray(v, dtype=np.int32) for k, v in d.items()}
+
+        self.cell_index = _arr(cells)
+        self.skill_index = _arr(skills)
+        self.tag_index = _arr(tags)
+        self.topic_index = _arr(topics)
+        self._query_cache = {}
 
 #uso pra penalizar quando tenho uma celula vazia
     def has_cell(self, fmt: Format, difficulty: int) -> bool:
         return (fmt, difficulty) in self.by_cell and len(self.by_cell[(fmt, difficulty)]) > 0
 
 #sorteio um item
-    def sample(self, fmt: Format, difficulty: int) -> Item:
+    def sample(self, fmt: Format, difficulty: int) -> CompactItem:
         key: Cell = (fmt, difficulty) #monto a chave
-        pool = self.by_cell.get(key)
-        if not pool:
+        pool = self.cell_index.get(key)
+        if pool is None or not pool.size:
             raise KeyError(f"No items for cell={key}. Generate/fill the bank first.")
-        return self.rng.choice(pool) #escolho aleaytoriamente um item da lista
+        return self.items[self._pick(pool)] #escolho aleaytoriamente um item da lista
+
+#nova sessao (novo aluno): esquece o que ja foi servido
+    def start_session(self) -> None:
+        for g in self._served_list:
+            self._served[g >> 3] = 0
+        self._served_list.clear()
+
+    def served(self, pos: int) -> bool:
+        g = self.group_of[pos]
+        return bool(self._served[g >> 3] >> (g & 7) & 1)
+
+    def _mark(self, pos: int) -> None:
+        g = self.group_of[pos]
+        self._served[g >> 3] |= 1 << (g & 7)
+        self._served_list.append(g)
+
+    #mascara dos itens do pool cujo cluster ainda nao foi servido (le o bitset direto, sem loop em python)
+    def _unserved(self, pool: np.ndarray) -> np.ndarray:
+        g = self.group_arr[pool]
+        bits = np.frombuffer(self._served, dtype=np.uint8)
+        return (bits[g >> 3] >> (g & 7) & 1) == 0
+
+#sorteio de uma posicao do pool (uniforme ou com os pesos); com no_repeat, evita clusters ja servidos na sessao
+#(tenta algumas vezes ao acaso, depois filtra o pool; se a celula esgotou, repete - nao tem o que fazer).
+#as novas tentativas e o filtro usam os mesmos pesos, entao o sorteio ponderado nao vira uniforme com o uso
+    def _pick(self, pool: np.ndarray, weights: Optional[np.ndarray] = None) -> int:
+        def draw(p: np.ndarray, w: Optional[np.ndarray]) -> int:
+            if w is not None:
+                return int(self.rng.choices(p, weights=w)[0])
+            return int(p[self.rng.randrange(p.size)])
+
+        pos = draw(pool, weights)
+        if not self.no_repeat:
+            return pos
+        tries = 0
+        while self.served(pos) and tries < 8:
+            pos = draw(pool, weights)
+            tries += 1
+        if self.served(pos):
+            mask = self._unserved(pool)
+            w = None if weights is None else weights[mask]
+            #item com peso 0 nunca sai: se só sobraram esses, repete um ja servido
+            if mask.any() and (w is None or w.sum() > 0):
+                pos = draw(pool[mask], w)
+        self._mark(pos)
+        return pos
+
+#consulta com varios criterios (todos precisam valer): intersecta os indices invertidos, comecando pelo menor.
+#o resultado de cada combinacao fica em cache (o tutor repete muito as mesmas consultas), entao a partir da
+#segunda vez é só um lookup de dicionario
+    def query(self, format: Optional[str] = None, difficulty: Optional[int] = None,
+              skill: str | Iterable[str] | None = None, tag: str | Iterable[str] | None = None,
+              topic: Optional[str] = None) -> np.ndarray:
+        skills = (skill,) if isinstance(skill, str) else tuple(skill or ())
+        tags = (tag,) if isinstance(tag, str) else tuple(tag or ())
+        key = (format, difficulty, skills, tags, topic)
+        hit = self._query_cache.get(key)
+        if hit is not None:
+            return hit
+
+        parts: List[np.ndarray] = []
+        if format is not None or difficulty is not None:
+            if format is not None and difficulty is not None:
+                parts.append(self.cell_index.get((format, difficulty), _EMPTY))
+            else: #só um dos dois: junta as celulas que batem
+                sel = [v for (f, d), v in self.cell_index.items()
+                       if (format is None or f == format) and (difficulty is None or d == difficulty)]
+                parts.append(np.sort(np.concatenate(sel)) if sel else _EMPTY)
+        parts += [self.skill_index.get(SKILLS.get(sk), _EMPTY) for sk in skills]
+        parts += [self.tag_index.get(TAGS.get(tg), _EMPTY) for tg in tags]
+        if topic is not None:
+            parts.append(self.topic_index.get(topic, _EMPTY))
+
+        if not parts:
+            res = np.arange(len(self.items), dtype=np.int32)
+        else:
+            parts.sort(key=len)
+            res = parts[0]
+            for other in parts[1:]:
+                if not res.size:
+                    break
+                res = np.intersect1d(res, other, assume_unique=True)
+        res.flags.writeable = False #o mesmo array volta do cache pra todo mundo
+        self._query_cache[key] = res
+        return res
+
+#sorteio um item entre os que batem com a consulta (uniforme ou com peso por item, ex.: peso por skill fraca)
+    def sample_where(self, weights: Optional[Sequence[float] | np.ndarray] = None, **criteria) -> CompactItem:
+        idx = self.query(**criteria)
+        if not idx.size:
+            raise KeyError(f"No items for query={criteria}.")
+        w = None if weights is None else np.asarray(weights, dtype=float)[idx] #um valor por item do banco
+        return self.items[self._pick(idx, w)]
+
+    def with_skill(self, skill: str) -> List[CompactItem]:
+        return [self.items[i] for i in self.query(skill=skill)]
+
+    def with_tag(self, tag: str) -> List[CompactItem]:
+        return [self.items[i] for i in self.query(tag=tag)]
+
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+_EMPTY.flags.writeable = False
+
+
+##BANCO MULTI-TOPICO
+#varios bancos (um jsonl por topico: frações, decimais, porcentagem...) descritos num manifesto json.
+#cada topico é um shard (um QuestionBank) carregado só quando for usado; os vocabularios (SKILLS/TAGS/TOPICS)
+#sao globais, entao os ids sao os mesmos em todos os shards. O manifesto guarda um indice compacto
+#(quantos itens por celula de cada topico), o que responde has_cell sem carregar o shard.
+
+MANIFEST_VERSION = 1
+
+
+def is_manifest(path: str | Path) -> bool:
+    return Path(path).suffix.lower() == ".json"
+
+
+#contagem por celula lendo o jsonl cru (sem pydantic): "formato/dificuldade" -> n
+def _scan_bank(path: Path) -> Tuple[Optional[str], Dict[str, int]]:
+    topic: Optional[str] = None
+    cells: Dict[str, int] = {}
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            topic = topic or obj.get("topic", "frações")
+            key = f"{obj['format']}/{int(obj['difficulty'])}"
+            cells[key] = cells.get(key, 0) + 1
+    return topic, cells
+
+
+#cria/atualiza o manifesto com um banco; o topico vem do proprio jsonl se nao for passado
+def update_manifest(manifest: str | Path, bank_path: str | Path, topic: Optional[str] = None) -> Path:
+    manifest, bank_path = Path(manifest), Path(bank_path)
+    data = json.loads(manifest.read_text(encoding="utf-8")) if manifest.exists() else {}
+    data.setdefault("version", MANIFEST_VERSION)
+    entries = data.setdefault("topics", {})
+    found, cells = _scan_bank(bank_path)
+    topic = topic or found or bank_path.stem
+    try: #caminho relativo ao manifesto quando possivel (pra mover a pasta data/ inteira)
+        rel = str(bank_path.resolve().relative_to(manifest.resolve().parent))
+    except ValueError:
+        rel = str(bank_path.resolve())
+    entries[topic] = {"path": rel, "n_items": sum(cells.values()), "cells": cells}
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    return manifest
+
+
+class MultiTopicBank:
+    def __init__(self, manifest: str | Path, seed: int = 0, no_repeat: bool = False,
+                 topics: Optional[Sequence[str]] = None):
+        self.path = Path(manifest)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Manifest not found: {self.path}")
+        entries = json.loads(self.path.read_text(encoding="utf-8"))["topics"]
+        #topics: subconjunto (e ordem) dos topicos que esse processo usa; os outros nunca sao carregados
+        names = list(entries) if topics is None else list(topics)
+        missing = [t for t in names if t not in entries]
+        if missing:
+            raise KeyError(f"Topics {missing} not in manifest {self.path} (has {list(entries)}).")
+        self.topics: List[str] = names
+        for t in names: #ids no vocabulario global na ordem do manifesto (nao na ordem em que os shards carregam)
+            TOPICS.add(t)
+        self.entries = {t: entries[t] for t in names}
+        self.seed = seed
+        self.no_repeat = no_repeat
+        self._shards: Dict[str, QuestionBank] = {}
+
+    def bank_path(self, topic: str) -> Path:
+        p = Path(self.entries[topic]["path"])
+        return p if p.is_absolute() else self.path.parent / p
+
+    #carrega o shard na primeira vez (o parse fica no cache _PARSED, entao outro env do mesmo processo reaproveita)
+    def shard(self, topic: str) -> QuestionBank:
+        bank = self._shards.get(topic)
+        if bank is None:
+            #seed derivada do nome do topico (nao da ordem de carga, que depende das acoes da politica): duas
+            #politicas no mesmo env seed sorteiam os mesmos itens de cada topico (comparacao pareada/CRN)
+            bank = QuestionBank(self.bank_path(topic), seed=self.seed + zlib.crc32(topic.encode("utf-8")),
+                                no_repeat=self.no_repeat)
+            self._shards[topic] = bank
+        return bank
+
+    @property
+    def loaded(self) -> List[str]:
+        return list(self._shards)
+
+    def has_cell(self, topic: str, fmt: str, difficulty: int) -> bool:
+        cells = self.entries[topic].get("cells")
+        if cells is None: #manifesto sem indice: precisa olhar o shard
+            return self.shard(topic).has_cell(fmt, difficulty)
+        return cells.get(f"{fmt}/{difficulty}", 0) > 0
+
+    def sample(self, topic: str, fmt: str, difficulty: int) -> CompactItem:
+        return self.shard(topic).sample(fmt, difficulty)
+
+    def start_session(self) -> None:
+        for bank in self._shards.values():
+            bank.start_session()
+
+    def query(self, topic: str, **criteria) -> np.ndarray:
+        return self.shard(topic).query(**criteria)
+
+    def sample_where(self, topic: str, weights=None, **criteria) -> CompactItem:
+        return self.shard(topic).sample_where(weights=weights, **criteria)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from .policies import BatchPolicy
+
+##resultado de um episodio
+@dataclass
+class EpisodeResult:
+    return_sum: float #soma total das recompensas do episodio
+    abandoned: bool #se o aluno abandonou (baixo engaj)
+    steps: int #numero de questoes feitas
+    completed: bool
+    reason: str | None
+
+
+def episode_reason(last_info: dict, done: bool, truncated: bool) -> str | None:
+    reason = last_info.get("reason", None)
+    if reason is None:
+        if truncated:
+            reason = "time_limit"
+        elif done:
+            reason = "low_engagement"
+    return reason
+
+
+#roda varios episodios em paralelo (em passo travado): a politica decide todos os envs ativos numa chamada só
+def rollout_batch(envs: Sequence, policy: BatchPolicy, seeds: Sequence[int]) -> list[EpisodeResult]:
+    n = len(envs)
+    first, _ = envs[0].reset(seed=int(seeds[0]))
+    obs = np.empty((n, first.shape[0]), dtype=np.float32) #buffer de observacoes reaproveitado a cada passo
+    obs[0] = first
+    for i in range(1, n):
+        obs[i], _ = envs[i].reset(seed=int(seeds[i]))
+
+    rets = np.zeros(n, dtype=float)
+    steps = np.zeros(n, dtype=np.int64)
+    results: list[EpisodeResult | None] = [None] * n
+    active = np.arange(n)
+    #politica com estado (ex.: PPO recorrente): um estado por episodio, indexado pela linha
+    stateful = hasattr(policy, "reset_state")
+    if stateful:
+        policy.reset_state(n)
+
+    while active.size:
+        actions = policy.act_rows(obs[active], active) if stateful else policy.act(obs[active])
+        still = []
+        for i, a in zip(active, actions):
+            o, r, done, truncated, info = envs[i].step(int(a))
+            rets[i] += float(r)
+            steps[i] += 1
+            if done or truncated:
+                reason = episode_reason(info if isinstance(info, dict) else {}, done, truncated)
+                results[i] = EpisodeResult(
+                    return_sum=float(rets[i]),
+                    abandoned=(reason == "low_engagement"),
+                    steps=int(steps[i]),
+                    completed=(reason == "time_limit"),
+                    reason=reason,
+                )
+            else:
+                obs[i] = o
+                still.append(i)
+        active = np.asarray(still, dtype=np.int64)
+
+    return results
+
+
+#roda um episodio em cada um dos N alunos de um VecFractionTutorEnv; devolve arrays (N,) em vez de EpisodeResult
+#(abandono segue o episode_reason: terminou por engajamento baixo antes do limite de passos)
+def rollout_vec(venv, policy: BatchPolicy, seed: int | None = None) -> dict[str, np.ndarray]:
+    obs = venv.reset(seed=seed)
+    n = venv.n
+    rets = np.zeros(n)
+    steps = np.zeros(n, dtype=np.int64)
+    abandoned = np.zeros(n, dtype=bool)
+    stateful = hasattr(policy, "reset_state")
+    if stateful:
+        policy.reset_state(n)
+    while venv.active.any():
+        was_active = venv.active.copy()
+        actions = np.zeros(n, dtype=np.int64)
+        rows = np.flatnonzero(was_active)
+        actions[rows] = policy.act_rows(obs[rows], rows) if stateful else policy.act(obs[rows])
+        obs, r, terminated, truncated, info = venv.step(actions)
+        rets += r
+        steps += was_active & ~info["empty_cell"]
+        abandoned |= terminated & ~truncated & ~info["empty_cell"]
+    return {"return": rets, "abandoned": abandoned, "steps": steps}
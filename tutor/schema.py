@@ -7,7 +7,7 @@ Format = Literal["short_text", "multiple_choice", "visual", "scaffold"] #formato
 
 #representa uma questao do meu banco
 class Item(BaseModel):
-    # para não quebrar se o JSONL tiver campos a mais (ex.: "answer" vindo do templates)
+    # para não quebrar se o JSONL tiver campos a mais (ex.: campos internos de outros geradores)
     model_config = ConfigDict(extra="ignore")
 
     id: str
@@ -21,6 +21,7 @@ class Item(BaseModel):
     correct_index: int = -1 #se nao for multipla escolha fica -1
 
     solution: str #explicacao curta da questao
+    answer: Optional[str] = None #resposta esperada em texto ("5/6", "maior", "6,6", "45%"); usada na correcao (tutor/grading.py)
     skills: List[str] = Field(default_factory=list) #habilidades envolvidas
     tags: List[str] = Field(default_factory=list)
 
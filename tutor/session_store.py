@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+#estado do tutor por aluno (o mesmo que cada FractionTutorEnv guarda em atributos) num array estruturado
+#pre-alocado, uma linha por slot de sessao: ~21 bytes por aluno, 10^6 sessoes em ~21 MB. Slots liberados
+#voltam numa pilha (free list) e sao reaproveitados. Leitura/escrita em lote por vetor de slots, e
+#obs_batch monta direto a observacao de 6 campos do env pra decidir um micro-lote de alunos numa chamada.
+#persistencia (opcional, com `path`): snapshot do array inteiro num .npy escrito via memmap + log de escrita
+#(WAL) com as linhas alteradas depois do snapshot; abrir o diretorio de novo = snapshot + replay do WAL.
+
+STATE_DTYPE = np.dtype([
+    ("skill_est", "<f4"),
+    ("skill_unc", "<f4"),
+    ("engagement", "<f4"),
+    ("last_load", "<f4"),
+    ("step", "<u2"),
+    ("last_correct", "u1"),
+    ("last_d", "u1"),
+    ("alive", "u1"),
+])
+#mesmo estado inicial do FractionTutorEnv.reset (estimativa heuristica)
+INITIAL = {"skill_est": 0.0, "skill_unc": 2.0, "engagement": 1.0, "last_load": 0.2, "step": 0,
+           "last_correct": 0, "last_d": 1, "alive": 1}
+
+SNAPSHOT = "state.npy"
+WAL = "wal.log"
+META = "meta.json"
+#registro do WAL: magic, n de linhas, crc32 do payload; payload = slots (u4) + linhas (STATE_DTYPE)
+_HEADER = struct.Struct("<III")
+_MAGIC = 0x53455353
+
+
+class SessionStore:
+    def __init__(self, capacity: int = 1024, path: str | Path | None = None, snapshot_every: int = 1_000_000,
+                 durable: bool = False):
+        self.path = Path(path) if path is not None else None
+        self.snapshot_every = snapshot_every #linhas no WAL que disparam um snapshot automatico
+        self.durable = durable #fsync a cada escrita no WAL (senao: sobrevive a crash do processo, nao a queda de energia)
+        self.state = np.zeros(max(1, capacity), dtype=STATE_DTYPE)
+        self._free = np.arange(len(self.state) - 1, -1, -1, dtype=np.int64) #pilha: topo = menor slot livre
+        self._n_free = len(self.state)
+        self._wal = None
+        self._wal_rows = 0
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._recover()
+            self._wal = (self.path / WAL).open("ab")
+
+    @property
+    def capacity(self) -> int:
+        return len(self.state)
+
+    def __len__(self) -> int:
+        return self.capacity - self._n_free
+
+    @property
+    def nbytes(self) -> int:
+        return self.state.nbytes + self._free.nbytes
+
+    def _grow(self, need: int) -> None:
+        old = self.capacity
+        new = max(need, 2 * old)
+        state = np.zeros(new, dtype=STATE_DTYPE)
+        state[:old] = self.state
+        self.state = state
+        #slots novos entram embaixo da pilha (os livres antigos continuam saindo primeiro)
+        fresh = np.arange(new - 1, old - 1, -1, dtype=np.int64)
+        self._free = np.concatenate([fresh, self._free[:self._n_free]])
+        self._n_free += len(fresh)
+
+    def _rebuild_free(self) -> None:
+        free = np.flatnonzero(self.state["alive"] == 0)[::-1]
+        self._free = free.astype(np.int64)
+        self._n_free = len(free)
+
+    def _check(self, slots) -> np.ndarray:
+        slots = np.asarray(slots, dtype=np.int64).reshape(-1)
+        if len(slots) and (slots.min() < 0 or slots.max() >= self.capacity or not self.state["alive"][slots].all()):
+            raise KeyError("unknown or closed session slot in batch")
+        return slots
+
+    ##sessoes
+
+    #abre n sessoes com o estado inicial -> slots
+    def open(self, n: int = 1) -> np.ndarray:
+        if n > self._n_free:
+            self._grow(len(self) + n)
+        top = self._n_free
+        slots = self._free[top - n:top][::-1].copy()
+        self._n_free -= n
+        for k, v in INITIAL.items():
+            self.state[k][slots] = v
+        self._log(slots)
+        return slots
+
+    def close(self, slots) -> None:
+        slots = self._check(slots)
+        self.state["alive"][slots] = 0
+        n = len(slots)
+        if self._n_free + n > len(self._free):
+            self._free = np.resize(self._free, self._n_free + n)
+        self._free[self._n_free:self._n_free + n] = slots
+        self._n_free += n
+        self._log(slots)
+
+    ##leitura/escrita em lote
+
+    def get(self, slots) -> np.ndarray:
+        return self.state[self._check(slots)]
+
+    #escreve campos de um lote: update(slots, engagement=..., skill_est=...)
+    def update(self, slots, **fields) -> None:
+        slots = self._check(slots)
+        for k, v in fields.items():
+            if k not in STATE_DTYPE.names or k == "alive":
+                raise KeyError(f"unknown state field: {k}")
+            self.state[k][slots] = v
+        self._log(slots)
+
+    #observacao do FractionTutorEnv (N, 6) pros slots, pronta pra qualquer BatchPolicy
+    def obs_batch(self, slots, out: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = self.state[self._check(slots)]
+        if out is None:
+            out = np.empty((len(rows), 6), dtype=np.float32)
+        out[:, 0] = rows["skill_est"]
+        out[:, 1] = rows["skill_unc"]
+        out[:, 2] = rows["engagement"]
+        out[:, 3] = rows["last_correct"]
+        out[:, 4] = (rows["last_d"].astype(np.float32) - 1) / 4.0
+        out[:, 5] = rows["last_load"]
+        return out
+
+    #registra a resposta de um lote de alunos: mesma atualizacao heuristica do FractionTutorEnv._update_belief
+    #(d = dificuldade 1..5, load = carga de leitura do item); engajamento vem de quem mede (se tiver)
+    def record(self, slots, d, correct, load, engagement=None) -> None:
+        slots = self._check(slots)
+        st = self.state
+        d = np.asarray(d, dtype=np.float32)
+        correct = np.asarray(correct, dtype=bool)
+        load = np.asarray(load, dtype=np.float32)
+        gain = (0.18 + 0.05 * (d - 1)) * np.where(correct, 1.0, -0.12) * (1.0 - 0.3 * load)
+        st["skill_est"][slots] = np.clip(st["skill_est"][slots] + gain, -3.0, 3.0)
+        st["skill_unc"][slots] = np.maximum(0.2, st["skill_unc"][slots] * 0.96)
+        st["last_correct"][slots] = correct
+        st["last_d"][slots] = d
+        st["last_load"][slots] = load
+        st["step"][slots] = np.minimum(st["step"][slots].astype(np.int64) + 1, np.iinfo(np.uint16).max)
+        if engagement is not None:
+            st["engagement"][slots] = engagement
+        self._log(slots)
+
+    ##persistencia
+
+    def _log(self, slots: np.ndarray) -> None:
+        if self._wal is None or not len(slots):
+            return
+        payload = slots.astype("<u4").tobytes() + self.state[slots].tobytes()
+        self._wal.write(_HEADER.pack(_MAGIC, len(slots), zlib.crc32(payload)) + payload)
+        self._wal.flush()
+        if self.durable:
+            os.fsync(self._wal.fileno())
+        self._wal_rows += len(slots)
+        if self.snapshot_every and self._wal_rows >= self.snapshot_every:
+            self.snapshot()
+
+    #grava o array inteiro (via memmap, num arquivo temporario + rename) e zera o WAL
+    def snapshot(self) -> Path:
+        if self.path is None:
+            raise ValueError("SessionStore without path has nothing to snapshot to")
+        tmp = self.path / (SNAPSHOT + ".tmp")
+        mm = np.lib.format.open_memmap(tmp, mode="w+", dtype=STATE_DTYPE, shape=self.state.shape)
+        mm[:] = self.state
+        mm.flush()
+        del mm
+        with tmp.open("rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path / SNAPSHOT)
+        (self.path / META).write_text(json.dumps({"capacity": self.capacity, "alive": len(self),
+                                                  "dtype": STATE_DTYPE.descr}), encoding="utf-8")
+        #um crash entre o rename e aqui so reaplica linhas que o snapshot ja tem (idempotente)
+        if self._wal is not None:
+            self._wal.close()
+        self._wal = (self.path / WAL).open("wb")
+        self._wal_rows = 0
+        return self.path / SNAPSHOT
+
+    #snapshot (memmap, só leitura) + replay do WAL ate o primeiro registro incompleto/corrompido
+    def _recover(self) -> None:
+        snap = self.path / SNAPSHOT
+        if snap.is_file():
+            mm = np.load(snap, mmap_mode="r")
+            if mm.dtype != STATE_DTYPE:
+                raise ValueError(f"{snap} has dtype {mm.dtype}, expected {STATE_DTYPE}")
+            if len(mm) > self.capacity:
+                self.state = np.zeros(len(mm), dtype=STATE_DTYPE)
+            self.state[:len(mm)] = mm
+            del mm
+        wal = self.path / WAL
+        if wal.is_file():
+            data = wal.read_bytes()
+            pos, good = 0, 0
+            row = STATE_DTYPE.itemsize
+            while pos + _HEADER.size <= len(data):
+                magic, n, crc = _HEADER.unpack_from(data, pos)
+                end = pos + _HEADER.size + n * (4 + row)
+                if magic != _MAGIC or end > len(data):
+                    break
+                payload = data[pos + _HEADER.size:end]
+                if zlib.crc32(payload) != crc:
+                    break
+                slots = np.frombuffer(payload, dtype="<u4", count=n).astype(np.int64)
+                rows = np.frombuffer(payload, dtype=STATE_DTYPE, count=n, offset=4 * n)
+                if len(slots) and slots.max() >= self.capacity:
+                    state = np.zeros(max(int(slots.max()) + 1, 2 * self.capacity), dtype=STATE_DTYPE)
+                    state[:self.capacity] = self.state
+                    self.state = state
+                self.state[slots] = rows
+                self._wal_rows += n
+                pos = good = end
+            if good < len(data): #cauda escrita pela metade (crash no meio do registro): descarta
+                with wal.open("rb+") as f:
+                    f.truncate(good)
+        self._rebuild_free()
+
+    def sync(self) -> None:
+        if self._wal is not None:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+
+    def close_store(self) -> None:
+        if self._wal is not None:
+            self._wal.close()
+            self._wal = None
+
+    def __enter__(self) -> "SessionStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close_store()
+
+    def stats(self) -> Dict[str, int]:
+        wal = self.path / WAL if self.path is not None else None
+        return {"capacity": self.capacity, "alive": len(self), "state_bytes": int(self.state.nbytes),
+                "wal_rows": self._wal_rows, "wal_bytes": wal.stat().st_size if wal is not None and wal.exists() else 0}
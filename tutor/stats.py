@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from itertools import combinations
+from statistics import NormalDist
+from typing import Dict
+
+import numpy as np
+
+#comparacao estatistica entre politicas avaliadas nos MESMOS episodios (mesmas seeds de env = numeros
+#aleatorios comuns). Cada metrica chega como array (n_episodios,) ou (n_seeds, n_episodios) por politica,
+#e o bootstrap reamostra os mesmos indices pra todas as politicas (pareado), tudo de uma vez em numpy.
+
+
+def _as_2d(x) -> np.ndarray:
+    a = np.asarray(x, dtype=float)
+    return a.reshape(1, -1) if a.ndim == 1 else a
+
+
+#medias bootstrap de um bloco (P, S, n) -> (P, B); reamostra seeds e episodios com os mesmos indices p/ todos
+def bootstrap_means(x: np.ndarray, n_boot: int = 2000, seed: int = 0) -> np.ndarray:
+    P, S, n = x.shape
+    rng = np.random.default_rng(seed)
+    ep_idx = rng.integers(0, n, size=(n_boot, n))
+    if S == 1:
+        return x[:, 0, ep_idx].mean(axis=-1)
+    seed_idx = rng.integers(0, S, size=(n_boot, S))
+    return x[:, seed_idx[:, :, None], ep_idx[:, None, :]].mean(axis=(-1, -2))
+
+
+def _ci(boot: np.ndarray, alpha: float) -> np.ndarray:
+    return np.quantile(boot, [alpha / 2, 1 - alpha / 2], axis=-1).T #(P, 2)
+
+
+def bootstrap_ci(x, n_boot: int = 2000, alpha: float = 0.05, seed: int = 0) -> tuple[float, float]:
+    lo, hi = _ci(bootstrap_means(_as_2d(x)[None], n_boot, seed), alpha)[0]
+    return float(lo), float(hi)
+
+
+#quantos episodios precisaria pra um IC de largura `width` (aprox. normal, a partir do desvio observado)
+def episodes_needed(x, width: float, alpha: float = 0.05) -> int:
+    sd = float(np.std(np.asarray(x, dtype=float), ddof=1))
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    return int(np.ceil((2 * z * sd / width) ** 2))
+
+
+#p-valores ajustados por Holm-Bonferroni (step-down): o menor é multiplicado por m, o seguinte por m-1, ...
+def holm(p_values) -> np.ndarray:
+    p = np.asarray(p_values, dtype=float)
+    m = len(p)
+    order = np.argsort(p)
+    adj = np.maximum.accumulate(p[order] * (m - np.arange(m)))
+    out = np.empty(m)
+    out[order] = np.minimum(adj, 1.0)
+    return out
+
+
+#resumo completo: IC de cada politica + IC das diferencas pareadas + se o ranking ja esta decidido
+def compare(returns: Dict[str, np.ndarray], abandons: Dict[str, np.ndarray] | None = None,
+            n_boot: int = 2000, alpha: float = 0.05, seed: int = 0, target_width: float | None = None) -> dict:
+    names = list(returns)
+    R = np.stack([_as_2d(returns[k]) for k in names]) #(P, S, n): exige o mesmo numero de episodios (CRN)
+    boot = bootstrap_means(R, n_boot, seed)
+    ci = _ci(boot, alpha)
+    means = R.mean(axis=(1, 2))
+
+    ab_ci = None
+    if abandons is not None:
+        A = np.stack([_as_2d(abandons[k]) for k in names])
+        ab_ci = _ci(bootstrap_means(A, n_boot, seed), alpha)
+
+    per_policy = {}
+    for p, k in enumerate(names):
+        per_policy[k] = {
+            "mean_return": float(means[p]),
+            "ci_return": [float(ci[p, 0]), float(ci[p, 1])],
+            "ci_width": float(ci[p, 1] - ci[p, 0]),
+        }
+        if target_width:
+            per_policy[k]["episodes_needed"] = episodes_needed(R[p].ravel(), target_width, alpha)
+        if ab_ci is not None:
+            per_policy[k]["abandon_rate"] = float(A[p].mean())
+            per_policy[k]["ci_abandon"] = [float(ab_ci[p, 0]), float(ab_ci[p, 1])]
+
+    #diferencas pareadas: como o bootstrap usou os mesmos indices, boot[i] - boot[j] ja é a diferenca pareada.
+    #com P politicas sao P(P-1)/2 testes: "significant" usa o p-valor bootstrap corrigido por Holm (erro da
+    #familia inteira <= alpha); o "ci" de cada dupla continua sendo o IC marginal, sem correcao
+    pairs = {}
+    idx = list(combinations(range(len(names)), 2))
+    p_raw = []
+    for i, j in idx:
+        d = boot[i] - boot[j]
+        lo, hi = np.quantile(d, [alpha / 2, 1 - alpha / 2])
+        p = min(1.0, 2 * (min((d <= 0).sum(), (d >= 0).sum()) + 1) / (len(d) + 1)) #bicaudal
+        p_raw.append(p)
+        pairs[f"{names[i]} - {names[j]}"] = {
+            "mean_diff": float(means[i] - means[j]),
+            "ci": [float(lo), float(hi)],
+            "p_value": float(p),
+        }
+    for key, p in zip(pairs, holm(p_raw)):
+        pairs[key]["p_holm"] = float(p)
+        pairs[key]["significant"] = bool(p < alpha)
+
+    #ranking decidido = toda dupla vizinha na ordem das medias é significativa (ja com a correcao de Holm).
+    #vale pra UMA olhada nos dados: parar no primeiro bloco em que isso aparece infla o erro (parada opcional)
+    order = [names[p] for p in np.argsort(-means)]
+    settled = True
+    for a, b in zip(order, order[1:]):
+        key = f"{a} - {b}" if f"{a} - {b}" in pairs else f"{b} - {a}"
+        settled &= pairs[key]["significant"]
+
+    return {
+        "n_episodes": int(R.shape[1] * R.shape[2]),
+        "alpha": alpha,
+        "policies": per_policy,
+        "pairwise": pairs,
+        "ranking": order,
+        "ranking_settled": bool(settled),
+    }
@@ -1,7 +1,8 @@
 from __future__ import annotations
 import math
 import random
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import Any, Dict, Mapping
 
 #a ideia é conectar o formato da questao com a performance do aluno (no sentido de que a prob de acerto pra alunos com problema de leitura é menor e o engajamento é mais 
 #rapido em itens mais "pesados" em relacao a texto)
@@ -12,6 +13,65 @@ FORMAT_LOAD = {
     "scaffold": 0.70,
 }
 
+#quanto cada nivel de dificuldade (em torno do 3) pesa no score do aluno
+DIFFICULTY_SCALE = 0.6
+ENGAGEMENT_WEIGHT = 0.8
+
+#todas as constantes do simulador (aluno + recompensa do env) num lugar só, pra poder variar em cenarios
+#(ver sweep.py). Os defaults sao exatamente os valores originais.
+@dataclass(frozen=True)
+class SimConfig:
+    format_load: Mapping[str, float] = field(default_factory=lambda: dict(FORMAT_LOAD))
+    difficulty_scale: float = DIFFICULTY_SCALE #peso de cada nivel de dificuldade no score
+    engagement_weight: float = ENGAGEMENT_WEIGHT #quanto o engajamento ajuda a acertar
+    #variacao do engajamento por questao: -eng_load*carga - eng_difficulty*(d-1) + eng_correct (ou - eng_wrong)
+    # - eng_reading*carga*sensibilidade_leitura
+    eng_load: float = 0.10
+    eng_difficulty: float = 0.03
+    eng_correct: float = 0.06
+    eng_wrong: float = 0.02
+    eng_reading: float = 0.04
+    abandon_threshold: float = 0.12 #engajamento <= isso encerra o episodio (abandono)
+    #recompensa do env
+    reward_correct: float = 1.0
+    reward_wrong: float = -0.4
+    abandon_penalty: float = 5.0
+    empty_cell_penalty: float = 3.0
+    unc_bonus: float = 0.05 #bonus por reduzir a incerteza da estimativa
+
+    #frozen com dict dentro: o hash usa os itens do dict (pra poder usar como chave de cache)
+    def __hash__(self) -> int:
+        return hash(tuple((f.name, tuple(sorted(v.items())) if isinstance(v, Mapping) else v)
+                          for f in fields(self) for v in [getattr(self, f.name)]))
+
+    def load(self, fmt: str) -> float:
+        return self.format_load.get(fmt, 0.4)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["format_load"] = dict(self.format_load)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> "SimConfig":
+        return cls().with_overrides(**d)
+
+    #copia com alguns valores trocados; aceita "format_load.visual" pra mexer numa carga só
+    def with_overrides(self, **overrides: Any) -> "SimConfig":
+        loads = dict(self.format_load)
+        plain: Dict[str, Any] = {}
+        for k, v in overrides.items():
+            if k.startswith("format_load."):
+                loads[k.split(".", 1)[1]] = float(v)
+            elif k == "format_load":
+                loads.update(v)
+            else:
+                plain[k] = v
+        return replace(self, format_load=loads, **plain)
+
+
+DEFAULT_CONFIG = SimConfig()
+
 #definindo o quao favoravel é o item para o aluno
 def sigmoid(x: float) -> float:
     return 1.0 / (1.0 + math.exp(-x))
@@ -24,40 +84,43 @@ class StudentParams:
     noise: float = 0.15       # quanto aleatoriedade tem nas respostas
 
 class StudentSim:
-    def __init__(self, seed: int = 0):
+    def __init__(self, seed: int = 0, config: SimConfig | None = None):
         self.rng = random.Random(seed)
+        self.cfg = config or DEFAULT_CONFIG
 
-    def sample_student(self) -> StudentParams: #crio um novo aluno e sorteio cada parametro definido anteriormente
-        theta = self.rng.uniform(-1.5, 1.5)
-        rs = self.rng.uniform(0.0, 2.0)
+    #crio um novo aluno e sorteio cada parametro definido anteriormente (as faixas podem vir do curriculo)
+    def sample_student(self, theta_range: tuple[float, float] = (-1.5, 1.5), rs_range: tuple[float, float] = (0.0, 2.0)) -> StudentParams:
+        theta = self.rng.uniform(*theta_range)
+        rs = self.rng.uniform(*rs_range)
         return StudentParams(theta=theta, reading_sensitivity=rs)
 
 #convertendo a dificuldade em um "numero" (pra depois subtrair no acerto da questao)
     def item_difficulty_bias(self, d: int) -> float:
-        return (d - 3) * 0.6
+        return (d - 3) * self.cfg.difficulty_scale
     
 #probabilidade de acerto no item
     def p_correct(self, params: StudentParams, d: int, fmt: str, engagement: float) -> float:
-        load = FORMAT_LOAD.get(fmt, 0.4)
+        load = self.cfg.load(fmt)
         #montando o score do aluno
         x = (params.theta
              - self.item_difficulty_bias(d)
              - load * params.reading_sensitivity
-             + 0.8 * (engagement - 0.5))
+             + self.cfg.engagement_weight * (engagement - 0.5))
         # add noise by jittering x
         x += self.rng.gauss(0.0, params.noise)
         return sigmoid(x) ##pra transformar o score em probabilidade
 
 #atualizando o engagamento apos resolver a questao
     def step_engagement(self, params: StudentParams, d: int, fmt: str, engagement: float, correct: bool) -> float:
-        load = FORMAT_LOAD.get(fmt, 0.4)
+        cfg = self.cfg
+        load = cfg.load(fmt)
         # o delta representa uma queda do engajamento devido a leitura e a dificuldade da questao (e tambem acrescenta o efeito do erro e acerto)
-        delta = -0.10 * load - 0.03 * (d - 1)
+        delta = -cfg.eng_load * load - cfg.eng_difficulty * (d - 1)
         if correct:
-            delta += 0.06
+            delta += cfg.eng_correct
         else:
-            delta -= 0.02
+            delta -= cfg.eng_wrong
         # aqui criei uma penalidade extra caso o aluno tenha alta sensibilidade e o item tenha muito texto
-        delta -= 0.04 * load * params.reading_sensitivity
+        delta -= cfg.eng_reading * load * params.reading_sensitivity
         new_e = max(0.0, min(1.0, engagement + delta))
         return new_e